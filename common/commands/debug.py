@@ -4,7 +4,7 @@ Sublime commands related to development and debugging.
 
 from sublime_plugin import WindowCommand
 
-from ..util import debug, reload
+from ..util import debug, perf, reload
 from ...core.settings import GitSavvySettings
 
 REPORT_URL_TEMPLATE = "https://github.com/divmain/GitSavvy/issues/new?{q}"
@@ -58,3 +58,32 @@ class GsViewGitLog(WindowCommand):
             "text": log,
             "nuke_cursors": True
         })
+
+
+class GsPerfReportCommand(WindowCommand):
+
+    """
+    Displays timing statistics of the git commands run so far, either
+    as a table or, with `json` set, as JSON for further processing.
+    """
+
+    def run(self, json=False):
+        view = self.window.new_file()
+        view.set_scratch(True)
+        view.set_name("GitSavvy: performance report")
+        if json:
+            view.settings().set("syntax", "Packages/JavaScript/JSON.sublime-syntax")
+        view.run_command("gs_replace_view_text", {
+            "text": perf.as_json() if json else perf.as_text(),
+            "nuke_cursors": True
+        })
+
+
+class GsPerfResetCommand(WindowCommand):
+
+    """
+    Clears the recorded timing statistics.
+    """
+
+    def run(self):
+        perf.reset()
@@ -2,6 +2,9 @@ import sublime
 from sublime_plugin import EventListener, WindowCommand
 
 from . import util
+from . import view_registry
+from ..core import settings
+from ..core import watcher
 from ..core.settings import SettingsMixin
 
 
@@ -12,11 +15,44 @@ class GsInterfaceFocusEventListener(EventListener):
     """
 
     def on_activated(self, view):
+        settings.reset_active()
+        watcher.watch_view(view)
+        # Views only showing the git dir of a watched repo are refreshed
+        # by the watcher as needed.
+        if watcher.is_fresh(view):
+            return
         # status bar is handled by GsStatusBarEventListener
         util.view.refresh_gitsavvy(view, refresh_status_bar=False)
 
     def on_close(self, view):
         util.view.handle_closed_view(view)
+        view_registry.forget(view.id())
+        settings.forget_view(view.id())
+        sublime.set_timeout_async(view_registry.prune, 100)
+        sublime.set_timeout_async(watcher.prune, 100)
+        sublime.set_timeout_async(settings.prune, 100)
+
+
+class GsProjectSettingsListener(EventListener):
+
+    """
+    Drop the settings snapshots when project settings may have changed.
+    """
+
+    def on_post_save(self, view):
+        file_name = view.file_name()
+        if file_name and file_name.endswith(".sublime-project"):
+            settings.invalidate()
+
+    def on_load_project(self, window):
+        settings.invalidate()
+
+    def on_post_save_project(self, window):
+        settings.invalidate()
+
+    def on_pre_close_window(self, window):
+        # Only called by Sublime Text 4, closing the views prunes otherwise.
+        sublime.set_timeout_async(settings.prune, 100)
 
 
 git_view_syntax = {
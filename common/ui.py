@@ -1,4 +1,5 @@
 from collections import OrderedDict
+from difflib import SequenceMatcher
 from textwrap import dedent
 import re
 
@@ -6,15 +7,43 @@ import sublime
 from sublime_plugin import TextCommand
 
 from . import util
+from . import view_registry
+from ..core import scheduler
 from ..core.settings import GitSavvySettings
 
 
-interfaces = {}
-edit_views = {}
 subclasses = []
+# Windows whose views, e.g. restored from the last session, have been
+# indexed by `find_interface_view`.
+indexed_windows = set()
 
 EDIT_DEFAULT_HELP_TEXT = "## To finalize your edit, press {super_key}+Enter.  To cancel, close the view.\n"
 
+# `{key}` or `{< key}`, where each `<` removes one character before the
+# placeholder, usually the preceding newline.
+PLACEHOLDER_RE = re.compile(r"\{(?:(<+) )?([^{}\s]+)\}")
+
+compiled_templates = {}
+
+
+def find_interface_view(window, interface_type, repo_path):
+    """
+    Return the view of `window` showing the `interface_type` dashboard of
+    `repo_path`, or `None`.
+    """
+    kind = "interface." + interface_type
+    view = view_registry.find(window, kind, repo_path)
+    if view or window.id() in indexed_windows:
+        return view
+
+    indexed_windows.add(window.id())
+    for view in window.views():
+        vset = view.settings()
+        if vset.get("git_savvy.interface"):
+            view_registry.register(
+                view, "interface." + vset.get("git_savvy.interface"), vset.get("git_savvy.repo_path"))
+    return view_registry.find(window, kind, repo_path)
+
 
 def focus_view(view):
     window = view.window()
@@ -42,18 +71,10 @@ class Interface():
         to focus and return it instead of creating a new interface.
         """
         if repo_path is not None:
-            window = sublime.active_window()
-            for view in window.views():
-                vset = view.settings()
-                if (
-                    vset.get("git_savvy.interface") == cls.interface_type
-                    and vset.get("git_savvy.repo_path") == repo_path
-                ):
-                    focus_view(view)
-                    try:
-                        return interfaces[view.id()]
-                    except KeyError:
-                        return cls(view=view)  # surprise! we recurse
+            view = find_interface_view(sublime.active_window(), cls.interface_type, repo_path)
+            if view:
+                focus_view(view)
+                return get_interface(view.id()) or cls(view=view)  # surprise! we recurse
 
         return super().__new__(cls)
 
@@ -86,7 +107,9 @@ class Interface():
         if hasattr(self, "tab_size"):
             self.view.settings().set("tab_size", self.tab_size)
 
-        interfaces[self.view.id()] = self
+        view_registry.set_state(self.view.id(), "interface", self)
+        view_registry.register(
+            self.view, "interface." + self.interface_type, self.view.settings().get("git_savvy.repo_path"))
 
     def create_view(self, repo_path):
         window = sublime.active_window()
@@ -121,9 +144,16 @@ class Interface():
         pass
 
     def render(self, nuke_cursors=False):
-        self.clear_regions()
         if hasattr(self, "pre_render"):
             self.pre_render()
+        self.draw(nuke_cursors)
+
+    def draw(self, nuke_cursors=False):
+        """
+        Render the template again without `pre_render`, e.g. to show state
+        of the interface itself which changed.
+        """
+        self.clear_regions()
         rendered = self._render_template()
         self.view.run_command("gs_new_content_and_regions", {
             "content": rendered,
@@ -140,51 +170,17 @@ class Interface():
         template, add regions to `self.regions` with the key, start, and
         end of each partial.
         """
-        rendered = self.template
-
-        keyed_content = self.get_keyed_content()
-        for key, new_content in keyed_content.items():
-            new_content_len = len(new_content)
-            pattern = re.compile(r"\{(<+ )?" + key + r"\}")
-
-            match = pattern.search(rendered)
-            while match:
-                start, end = match.span()
-                backspace_group = match.groups()[0]
-                backspaces = backspace_group.count("<") if backspace_group else 0
-                start -= backspaces
-
-                rendered = rendered[:start] + new_content + rendered[end:]
-
-                self.adjust(start, end - start, new_content_len)
-                if new_content_len:
-                    self.regions[key] = [start, start + new_content_len]
-
-                match = pattern.search(rendered)
-
+        rendered, regions = render_template(self.template, self.get_keyed_content())
+        self.regions.update(regions)
         return rendered
 
-    def adjust(self, idx, orig_len, new_len):
-        """
-        When interpolating template variables, update region ranges for previously-evaluated
-        variables, that are situated later on in the output/template string.
-        """
-        shift = new_len - orig_len
-        for key, region in self.regions.items():
-            if region[0] > idx:
-                region[0] += shift
-                region[1] += shift
-            elif region[1] > idx or region[0] == idx:
-                region[1] += shift
-
     def get_keyed_content(self):
         keyed_content = OrderedDict(
             (key, render_fn())
             for key, render_fn in self.partials.items()
         )
 
-        for key in keyed_content:
-            output = keyed_content[key]
+        for key, output in list(keyed_content.items()):
             if isinstance(output, tuple):
                 sub_template, complex_partials = output
                 keyed_content[key] = sub_template
@@ -231,6 +227,90 @@ class Interface():
         pass
 
 
+def tokenize_template(text):
+    """
+    Split `text` into literal strings and `(key, backspaces, source)`
+    tuples for its placeholders.
+    """
+    if "{" not in text:
+        return [text] if text else []
+
+    tokens = []
+    position = 0
+    for match in PLACEHOLDER_RE.finditer(text):
+        start, end = match.span()
+        if start > position:
+            tokens.append(text[position:start])
+        backspaces, key = match.groups()
+        tokens.append((key, len(backspaces) if backspaces else 0, match.group()))
+        position = end
+    if position < len(text):
+        tokens.append(text[position:])
+    return tokens
+
+
+def compile_template(template):
+    """
+    Return the tokens of `template`, parsing every template just once.
+    """
+    try:
+        return compiled_templates[template]
+    except KeyError:
+        tokens = compiled_templates[template] = tokenize_template(template)
+        return tokens
+
+
+def render_template(template, keyed_content):
+    """
+    Replace the placeholders in `template` with the content of their keys,
+    and return the result and the `[start, end]` region of each key.
+
+    Content may contain placeholders itself, but only the ones of keys
+    coming after its own key in `keyed_content` are replaced.  If a key
+    is used more than once, its region is the last one.
+    """
+    order = {key: index for index, key in enumerate(keyed_content)}
+    pieces = []
+    regions = {}
+    length = 0
+
+    def backspace(count):
+        nonlocal length
+        while count and pieces:
+            last = pieces.pop()
+            if len(last) > count:
+                pieces.append(last[:-count])
+                length -= count
+                return
+            count -= len(last)
+            length -= len(last)
+
+    def render(tokens, level):
+        nonlocal length
+        for token in tokens:
+            if isinstance(token, str):
+                pieces.append(token)
+                length += len(token)
+                continue
+
+            key, backspaces, source = token
+            index = order.get(key, -1)
+            if index <= level:
+                pieces.append(source)
+                length += len(source)
+                continue
+
+            backspace(backspaces)
+            start = length
+            content = keyed_content[key]
+            render(tokenize_template(content), index)
+            if content:
+                regions[key] = [start, length]
+
+    render(compile_template(template), -1)
+    return "".join(pieces), regions
+
+
 def partial(key):
     def decorator(fn):
         fn.key = key
@@ -238,35 +318,122 @@ def partial(key):
     return decorator
 
 
+def common_prefix_length(a, b):
+    """
+    Return the length of the longest common prefix of `a` and `b`.
+    """
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[low:middle] == b[low:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def split_at_regions(content, regions):
+    """
+    Split `content` at the start and end of every region.
+    """
+    points = sorted({0, len(content)} | {point for region in regions.values() for point in region})
+    return [content[a:b] for a, b in zip(points, points[1:])]
+
+
+def diff_contents(old_content, old_regions, new_content, new_regions):
+    """
+    Return the `(begin, end, text)` replacements, in the coordinates of
+    `old_content` and in descending order, turning it into `new_content`.
+
+    Both contents are compared by the chunks between their regions, so
+    unchanged partials are skipped without looking at them twice.
+    """
+    old_chunks = split_at_regions(old_content, old_regions)
+    new_chunks = split_at_regions(new_content, new_regions)
+
+    offsets = [0]
+    for chunk in old_chunks:
+        offsets.append(offsets[-1] + len(chunk))
+
+    edits = []
+    matcher = SequenceMatcher(None, old_chunks, new_chunks, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            continue
+        begin, end = offsets[i1], offsets[i2]
+        old_text = old_content[begin:end]
+        new_text = "".join(new_chunks[j1:j2])
+
+        prefix = common_prefix_length(old_text, new_text)
+        suffix = common_prefix_length(old_text[prefix:][::-1], new_text[prefix:][::-1])
+        if prefix + suffix < max(len(old_text), len(new_text)):
+            edits.append((begin + prefix, end - suffix, new_text[prefix:len(new_text) - suffix]))
+
+    return edits[::-1]
+
+
 class GsNewContentAndRegionsCommand(TextCommand):
 
+    """
+    Show `content` in the view and set the `git_savvy_interface` regions.
+    If the view didn't change since the last call, only the parts of the
+    content which differ are replaced, and cursors outside of them don't
+    move at all.
+    """
+
     def run(self, edit, content, regions, nuke_cursors=False):
-        selections = self.view.sel()
+        view_id = self.view.id()
+        previous = view_registry.get_state(view_id, "drawn_content")
+        if previous and previous[0] == self.view.change_count():
+            old_content, old_regions = previous[1:]
+            edits = diff_contents(old_content, old_regions, content, regions)
+        else:
+            old_regions = regions
+            edits = [(0, self.view.size(), content)]
 
-        if selections and not nuke_cursors:
-            cursors_row_col = [self.view.rowcol(cursor.a) for cursor in selections]
+        selections = self.view.sel()
+        if nuke_cursors or not selections:
+            cursors = [(0, 0)]
         else:
-            cursors_row_col = [(0, 0)]
+            cursors = [self.map_cursor(cursor.a, edits) for cursor in selections]
 
         selections.clear()
 
         is_read_only = self.view.is_read_only()
         self.view.set_read_only(False)
-        self.view.replace(edit, sublime.Region(0, self.view.size()), content)
+        for begin, end, text in edits:
+            self.view.replace(edit, sublime.Region(begin, end), text)
         self.view.set_read_only(is_read_only)
 
-        for row, col in cursors_row_col:
-            pt = self.view.text_point(row, col)
+        for cursor in cursors:
+            pt = self.view.text_point(*cursor) if isinstance(cursor, tuple) else cursor
             selections.add(sublime.Region(pt, pt))
 
+        for key in old_regions.keys() - regions.keys():
+            self.view.erase_regions("git_savvy_interface." + key)
         for key, region_range in regions.items():
             a, b = region_range
             self.view.add_regions("git_savvy_interface." + key, [sublime.Region(a, b)])
 
+        view_registry.set_state(view_id, "drawn_content", (self.view.change_count(), content, regions))
+
         if self.view.settings().get("git_savvy.interface"):
             self.view.run_command("gs_handle_vintageous")
             self.view.run_command("gs_handle_arrow_keys")
 
+    def map_cursor(self, pt, edits):
+        """
+        Return the new point of a cursor at `pt`, or its row and column if
+        it is within one of the `edits`.
+        """
+        shift = 0
+        for begin, end, text in edits:
+            if begin <= pt <= end:
+                return self.view.rowcol(pt)
+            if end < pt:
+                shift += len(text) - (end - begin)
+        return pt + shift
+
 
 class GsUpdateRegionCommand(TextCommand):
 
@@ -283,7 +450,7 @@ def register_listeners(InterfaceClass):
 
 
 def get_interface(view_id):
-    return interfaces.get(view_id, None)
+    return view_registry.get_state(view_id, "interface")
 
 
 class GsInterfaceCloseCommand(TextCommand):
@@ -296,31 +463,32 @@ class GsInterfaceCloseCommand(TextCommand):
         sublime.set_timeout_async(self.run_async, 0)
 
     def run_async(self):
-        view_id = self.view.id()
-        if view_id in interfaces:
-            del interfaces[view_id]
+        view_registry.forget(self.view.id())
 
 
 class GsInterfaceRefreshCommand(TextCommand):
 
     """
-    Re-render GitSavvy interface view.
+    Re-render GitSavvy interface view.  Refreshes the user asked for run
+    before `background` ones, e.g. those of the file watcher.
     """
 
-    def run(self, edit, nuke_cursors=False):
-        sublime.set_timeout_async(self.run_async, 0)
+    def run(self, edit, nuke_cursors=False, background=False):
         self.nuke_cursors = nuke_cursors
+        scheduler.submit(
+            self.run_async,
+            priority=scheduler.VISIBLE_REFRESH if background else scheduler.INTERACTIVE,
+            key=("interface_refresh", self.view.id()))
 
     def run_async(self):
         interface_type = self.view.settings().get("git_savvy.interface")
         for InterfaceSubclass in subclasses:
             if InterfaceSubclass.interface_type == interface_type:
-                existing_interface = interfaces.get(self.view.id(), None)
+                existing_interface = get_interface(self.view.id())
                 if existing_interface:
                     existing_interface.render(nuke_cursors=self.nuke_cursors)
                 else:
-                    interface = InterfaceSubclass(view=self.view)
-                    interfaces[interface.view.id()] = interface
+                    InterfaceSubclass(view=self.view)
 
 
 class GsInterfaceToggleHelpCommand(TextCommand):
@@ -367,7 +535,7 @@ class EditView():
         self.on_done = on_done
         self.render(content, help_text)
 
-        edit_views[self.view.id()] = self
+        view_registry.set_state(self.view.id(), "edit_view", self)
 
     def render(self, starting_content, help_text):
         regions = {}
@@ -395,7 +563,7 @@ class GsEditViewCompleteCommand(TextCommand):
         sublime.set_timeout_async(self.run_async, 0)
 
     def run_async(self):
-        edit_view = edit_views.get(self.view.id(), None)
+        edit_view = view_registry.get_state(self.view.id(), "edit_view")
         if not edit_view:
             sublime.error_message("Unable to complete edit.  Please try again.")
             return
@@ -421,6 +589,4 @@ class GsEditViewCloseCommand(TextCommand):
         sublime.set_timeout_async(self.run_async, 0)
 
     def run_async(self):
-        view_id = self.view.id()
-        if view_id in edit_views:
-            del edit_views[view_id]
+        view_registry.forget(self.view.id())
@@ -7,6 +7,7 @@ from . import file
 from . import log
 from . import actions
 from . import debug
+from . import perf
 from . import diff_string
 from . import reload
 
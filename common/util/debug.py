@@ -61,13 +61,15 @@ def make_log_message(_type, **kwargs):
 
 def log_git(command, stdin, stdout, stderr, seconds):
     """ Add git command details to debug log """
-    global enabled
-    if enabled:
-        print(' ({thread}) [{runtime:3.0f}ms] $ {cmd}'.format(
-            thread=threading.current_thread().name[0],
-            cmd=' '.join(['git'] + list(filter(None, command))),
-            runtime=seconds * 1000,
-        ))
+    if not enabled:
+        # Always-on timings are collected by `util.perf`.
+        return
+
+    print(' ({thread}) [{runtime:3.0f}ms] $ {cmd}'.format(
+        thread=threading.current_thread().name[0],
+        cmd=' '.join(['git'] + list(filter(None, command))),
+        runtime=seconds * 1000,
+    ))
 
     message = make_log_message(
         'git', command=command, stdin=stdin, stdout=stdout, stderr=stderr,
@@ -0,0 +1,115 @@
+"""
+Always-on timing statistics of git invocations.
+
+Unlike the debug log, which records everything but only while enabled,
+this keeps a small fixed-size summary per git subcommand and calling
+command: call count, bytes read, total and maximum duration, and the
+most recent durations to compute percentiles from.
+"""
+
+from collections import deque, OrderedDict
+import json
+import threading
+
+
+# Most recent durations kept per entry for the percentiles.
+MAX_SAMPLES = 200
+# Entries (subcommand, caller) kept; the least recently used is evicted.
+MAX_ENTRIES = 300
+
+
+class _Stats():
+    __slots__ = ("count", "total", "max", "bytes", "samples")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.bytes = 0
+        self.samples = deque(maxlen=MAX_SAMPLES)
+
+
+if '_stats' not in globals():
+    _stats = OrderedDict()
+    _lock = threading.Lock()
+
+
+def record(subcommand, caller, seconds, bytes_read):
+    """
+    Record a finished git invocation.
+    """
+    key = (subcommand, caller)
+    with _lock:
+        stats = _stats.pop(key, None) or _Stats()
+        _stats[key] = stats
+        if len(_stats) > MAX_ENTRIES:
+            _stats.popitem(last=False)
+
+        stats.count += 1
+        stats.total += seconds
+        stats.max = max(stats.max, seconds)
+        stats.bytes += bytes_read
+        stats.samples.append(seconds)
+
+
+def _percentile(sorted_samples, fraction):
+    if not sorted_samples:
+        return 0.0
+    index = min(len(sorted_samples) - 1, int(round(fraction * (len(sorted_samples) - 1))))
+    return sorted_samples[index]
+
+
+def summary():
+    """
+    Return a list of dicts, one per subcommand and caller, most expensive
+    (by total time) first.  Durations are in milliseconds.
+    """
+    with _lock:
+        items = [
+            (subcommand, caller, stats.count, stats.total, stats.max, stats.bytes,
+             sorted(stats.samples))
+            for (subcommand, caller), stats in _stats.items()
+        ]
+
+    rows = [
+        {
+            "subcommand": subcommand,
+            "caller": caller,
+            "count": count,
+            "total_ms": round(total * 1000, 1),
+            "p50_ms": round(_percentile(samples, 0.5) * 1000, 1),
+            "p95_ms": round(_percentile(samples, 0.95) * 1000, 1),
+            "max_ms": round(max_ * 1000, 1),
+            "bytes": bytes_read,
+        }
+        for subcommand, caller, count, total, max_, bytes_read, samples in items
+    ]
+    rows.sort(key=lambda row: row["total_ms"], reverse=True)
+    return rows
+
+
+def reset():
+    with _lock:
+        _stats.clear()
+
+
+def as_json():
+    return json.dumps(summary(), indent=2)
+
+
+def as_text():
+    """
+    Render the summary as a plain text table.
+    """
+    columns = ("subcommand", "caller", "count", "p50_ms", "p95_ms", "max_ms", "total_ms", "bytes")
+    rows = [columns] + [tuple(str(row[column]) for column in columns) for row in summary()]
+    widths = [max(len(row[i]) for row in rows) for i in range(len(columns))]
+    lines = [
+        "  ".join(
+            cell.ljust(width) if i < 2 else cell.rjust(width)
+            for i, (cell, width) in enumerate(zip(row, widths))
+        ).rstrip()
+        for row in rows
+    ]
+    lines.insert(1, "-" * len(lines[0]))
+    return "\n".join(lines) + "\n"
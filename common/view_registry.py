@@ -0,0 +1,91 @@
+"""
+State GitSavvy keeps per view, and an index to find e.g. the status
+dashboard or the diff view of a repo without looking at every open view.
+
+Views are indexed by a kind, like `"diff"`, and a key within that kind.
+Several windows may show a view for the same key, so the index holds a
+few view ids per key and `find` picks the one in the given window.
+Closed views are forgotten by `forget` on close, and any view found to be
+invalid on the way is dropped as well.
+"""
+
+import threading
+
+import sublime
+
+
+if '_states' not in globals():
+    _states = {}  # view id -> {name: value}
+    _index = {}  # (kind, key) -> [view id]
+    _view_keys = {}  # view id -> set of (kind, key)
+    _lock = threading.Lock()
+
+
+def register(view, kind, key):
+    """
+    Make `view` the view of `kind` and `key`.
+    """
+    view_id = view.id()
+    with _lock:
+        view_ids = _index.setdefault((kind, key), [])
+        if view_id not in view_ids:
+            view_ids.append(view_id)
+        _view_keys.setdefault(view_id, set()).add((kind, key))
+
+
+def find(window, kind, key):
+    """
+    Return the view of `kind` and `key` in `window`, or `None`.
+    """
+    with _lock:
+        view_ids = list(_index.get((kind, key), ()))
+
+    for view_id in view_ids:
+        view = sublime.View(view_id)
+        if not view.is_valid():
+            forget(view_id)
+            continue
+        view_window = view.window()
+        if view_window and view_window.id() == window.id():
+            return view
+    return None
+
+
+def get_state(view_id, name, default=None):
+    with _lock:
+        return _states.get(view_id, {}).get(name, default)
+
+
+def set_state(view_id, name, value):
+    with _lock:
+        _states.setdefault(view_id, {})[name] = value
+
+
+def pop_state(view_id, name, default=None):
+    with _lock:
+        return _states.get(view_id, {}).pop(name, default)
+
+
+def forget(view_id):
+    """
+    Drop the state and the index entries of a view.
+    """
+    with _lock:
+        _states.pop(view_id, None)
+        for index_key in _view_keys.pop(view_id, ()):
+            view_ids = _index.get(index_key)
+            if view_ids and view_id in view_ids:
+                view_ids.remove(view_id)
+                if not view_ids:
+                    del _index[index_key]
+
+
+def prune():
+    """
+    Forget all views which are no longer valid.
+    """
+    with _lock:
+        view_ids = _states.keys() | _view_keys.keys()
+    for view_id in view_ids:
+        if not sublime.View(view_id).is_valid():
+            forget(view_id)
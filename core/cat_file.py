@@ -0,0 +1,231 @@
+"""
+Long-lived `git cat-file --batch` / `--batch-check` processes.
+
+Reading a single object with `git show <rev>` costs a full process spawn.
+Views like blame or the inline-diff read dozens of objects in a row, so
+instead we keep one `cat-file` process per repository (and mode) around,
+feed it object names over its stdin and read the answers from its stdout.
+
+A server shuts itself down after being idle for a while and is restarted
+transparently on the next request.  Requests only note the time they were
+made, a single timer per server checks it once the idle timeout passed.
+It is also restarted whenever the index changes, because `git cat-file`
+reads the index only once, which would otherwise make lookups like
+`:path` return stale content.
+"""
+
+from collections import namedtuple
+import os
+import subprocess
+import threading
+import time
+
+
+# Preserve running servers during hot-reloads
+if '_servers' not in globals():
+    _servers = {}
+    _servers_lock = threading.Lock()
+
+
+DEFAULT_IDLE_TIMEOUT = 30
+
+
+class CatFileError(Exception):
+    pass
+
+
+ObjectInfo = namedtuple("ObjectInfo", ("oid", "type", "size"))
+
+
+def _startupinfo():
+    if os.name == "nt":
+        startupinfo = subprocess.STARTUPINFO()
+        startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+        return startupinfo
+    return None
+
+
+def _stat_signature(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime, st.st_size, st.st_ino
+
+
+class CatFileServer():
+
+    """
+    A single `git cat-file` process bound to one repository.
+
+    `env` holds additional environment variables for the process on top
+    of `os.environ`.  `mode` is either "batch" (header and content) or
+    "batch-check" (header only).  Requests are serialized; the process is
+    started lazily, killed after `idle_timeout` seconds without requests
+    and restarted when it dies or when the repository's index changes.
+    """
+
+    def __init__(self, git_binary, repo_path, env=None, mode="batch",
+                 idle_timeout=DEFAULT_IDLE_TIMEOUT):
+        self.git_binary = git_binary
+        self.repo_path = repo_path
+        self.env = env
+        self.mode = mode
+        self.idle_timeout = idle_timeout
+
+        self._lock = threading.Lock()
+        self._process = None
+        self._index_path = None
+        self._index_signature = None
+        self._idle_timer = None
+        self._last_used = 0
+
+    def request(self, rev):
+        """
+        Return a tuple of `ObjectInfo` and the raw content (`None` in
+        "batch-check" mode) for `rev`, or `None` if the object does not
+        exist or the name is ambiguous.
+        """
+        if not rev or "\n" in rev:
+            raise CatFileError("Cannot request {!r} from git cat-file.".format(rev))
+
+        with self._lock:
+            try:
+                try:
+                    return self._request(rev)
+                except (OSError, ValueError):
+                    # The process died, e.g. it was killed or the repo moved
+                    # under our feet.  Restart exactly once.
+                    self._stop()
+                    return self._request(rev)
+            except (OSError, ValueError) as e:
+                self._stop()
+                raise CatFileError(str(e))
+            finally:
+                self._last_used = time.monotonic()
+                if not self._idle_timer:
+                    self._arm_idle_timer(self.idle_timeout)
+
+    def _request(self, rev):
+        process = self._ensure_process()
+        process.stdin.write(rev.encode("utf-8") + b"\n")
+        process.stdin.flush()
+
+        header = process.stdout.readline()
+        if not header:
+            raise ValueError("git cat-file exited unexpectedly")
+        header = header.decode("utf-8", "replace").rstrip("\n")
+        if header.endswith((" missing", " ambiguous")):
+            return None
+
+        oid, type, size = header.rsplit(" ", 2)
+        info = ObjectInfo(oid, type, int(size))
+        if self.mode != "batch":
+            return info, None
+
+        # Content is followed by a single LF which is not part of the object.
+        content = process.stdout.read(info.size + 1)
+        if len(content) != info.size + 1:
+            raise ValueError("git cat-file returned a truncated object")
+        return info, content[:-1]
+
+    def _ensure_process(self):
+        if self._process and self._process.poll() is None:
+            if self._index_signature == _stat_signature(self._index_path):
+                return self._process
+            self._stop()
+
+        if self._index_path is None:
+            self._index_path = self._git_path("index")
+        self._index_signature = _stat_signature(self._index_path)
+        self._process = subprocess.Popen(
+            [self.git_binary, "cat-file", "--" + self.mode],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            cwd=self.repo_path,
+            env=self._environ(),
+            startupinfo=_startupinfo())
+        return self._process
+
+    def _git_path(self, name):
+        path = subprocess.check_output(
+            [self.git_binary, "rev-parse", "--git-path", name],
+            stderr=subprocess.DEVNULL,
+            cwd=self.repo_path,
+            env=self._environ(),
+            startupinfo=_startupinfo()
+        ).decode("utf-8").strip()
+        return os.path.join(self.repo_path, path)
+
+    def _environ(self):
+        environ = os.environ.copy()
+        environ.update(self.env or {})
+        return environ
+
+    def _arm_idle_timer(self, delay):
+        if self.idle_timeout and self._process:
+            self._idle_timer = threading.Timer(delay, self._on_idle_timer)
+            self._idle_timer.daemon = True
+            self._idle_timer.start()
+
+    def _on_idle_timer(self):
+        with self._lock:
+            self._idle_timer = None
+            remaining = self._last_used + self.idle_timeout - time.monotonic()
+            if remaining > 0:
+                self._arm_idle_timer(remaining)
+            elif self.idle_timeout:
+                self._stop()
+
+    def _cancel_idle_timer(self):
+        if self._idle_timer:
+            self._idle_timer.cancel()
+            self._idle_timer = None
+
+    def stop(self):
+        with self._lock:
+            self._cancel_idle_timer()
+            self._stop()
+
+    def _stop(self):
+        process, self._process = self._process, None
+        if not process:
+            return
+        try:
+            process.stdin.close()
+        except OSError:
+            pass
+        try:
+            process.wait(1)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+        finally:
+            process.stdout.close()
+
+
+def get_server(git_binary, repo_path, env=None, mode="batch", idle_timeout=DEFAULT_IDLE_TIMEOUT):
+    """
+    Return the shared `CatFileServer` for the given repository and mode.
+    """
+    env_key = tuple(sorted(env.items())) if env else None
+    key = (git_binary, repo_path, env_key, mode)
+    with _servers_lock:
+        server = _servers.get(key)
+        if server is None:
+            server = _servers[key] = CatFileServer(
+                git_binary, repo_path, env=env, mode=mode, idle_timeout=idle_timeout)
+        server.idle_timeout = idle_timeout
+        return server
+
+
+def stop_all():
+    """
+    Shut down all running servers, e.g. when the plugin gets unloaded.
+    """
+    with _servers_lock:
+        servers = list(_servers.values())
+        _servers.clear()
+    for server in servers:
+        server.stop()
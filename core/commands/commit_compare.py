@@ -45,7 +45,7 @@ class GsCompareCommitCommand(WindowCommand, GitCommand):
         view.run_command("gs_handle_arrow_keys")
 
     def get_graph_args(self):
-        args = self.savvy_settings.get("git_graph_args")
+        args = list(self.savvy_settings.get("git_graph_args"))
         if self._file_path:
             file_path = self.get_rel_path(self._file_path)
             args = args + ["--", file_path]
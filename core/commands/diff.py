@@ -17,6 +17,7 @@ from .navigate import GsNavigate
 from ..git_command import GitCommand
 from ..exceptions import GitSavvyError
 from ...common import util
+from ...common import view_registry
 
 
 if False:
@@ -38,7 +39,6 @@ DIFF_TITLE = "DIFF: {}"
 DIFF_CACHED_TITLE = "DIFF (cached): {}"
 
 HunkLine = namedtuple('HunkLine', 'mode text b')  # type: HunkLine_
-diff_views = {}
 
 
 class GsDiffCommand(WindowCommand, GitCommand):
@@ -66,8 +66,8 @@ class GsDiffCommand(WindowCommand, GitCommand):
             file_path or repo_path
         )
 
-        if view_key in diff_views and diff_views[view_key] in sublime.active_window().views():
-            diff_view = diff_views[view_key]
+        diff_view = view_registry.find(sublime.active_window(), "diff", view_key)
+        if diff_view:
             self.window.focus_view(diff_view)
 
         else:
@@ -125,7 +125,7 @@ class GsDiffCommand(WindowCommand, GitCommand):
                 )
             diff_view.set_name(title)
             diff_view.set_syntax_file("Packages/GitSavvy/syntax/diff_view.sublime-syntax")
-            diff_views[view_key] = diff_view
+            view_registry.register(diff_view, "diff", view_key)
 
             diff_view.run_command("gs_handle_vintageous")
 
@@ -87,12 +87,7 @@ class GsRestoreAssumedUnchangedCommand(WindowCommand, GitCommand):
         sublime.set_timeout_async(self.run_async, 0)
 
     def run_async(self):
-        all_file_lines = (
-            line.split(" ", 1)
-            for line in self.git("ls-files", "-v").split("\n")
-        )
-
-        self._ignored_files = tuple(f[1] for f in all_file_lines if f[0] == "h")
+        self._ignored_files = self.get_assumed_unchanged_files()
 
         if not self._ignored_files:
             self.window.show_quick_panel(["No files are assumed unchanged."], None)
@@ -103,6 +98,25 @@ class GsRestoreAssumedUnchangedCommand(WindowCommand, GitCommand):
                 flags=sublime.MONOSPACE_FONT
             )
 
+    def get_assumed_unchanged_files(self):
+        index = self.read_index()
+        if index is not None:
+            try:
+                # `git ls-files -v` tags these entries with "h".
+                return tuple(
+                    entry.path.decode("utf-8")
+                    for entry in index.entries()
+                    if entry.assume_unchanged and not entry.skip_worktree and not entry.stage
+                )
+            except UnicodeDecodeError:
+                pass
+
+        all_file_lines = (
+            line.split(" ", 1)
+            for line in self.git("ls-files", "-v").split("\n")
+        )
+        return tuple(f[1] for f in all_file_lines if f[0] == "h")
+
     def on_selection(self, index):
         if index == -1:
             return
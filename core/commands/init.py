@@ -3,6 +3,7 @@ import os
 import sublime
 from sublime_plugin import WindowCommand
 
+from .. import settings
 from ..git_command import GitCommand
 from ...common import util
 from ..ui_mixins.input_panel import show_single_line_input_panel
@@ -20,6 +21,8 @@ NO_CONFIG_MESSAGE = ("It looks like you haven't configured Git yet.  Would you "
 RECLONE_CANT_BE_DONE = ("It looks like Git is already initialized here.  "
                         "You can not re-clone")
 GIT_URL = "Enter git url:"
+FAST_STATUS_MESSAGE = ("Enable git's untracked cache{} for this repository?  This "
+                       "changes the repository's config.")
 
 
 views_with_offer_made = set()
@@ -135,6 +138,7 @@ class GsClone(WindowCommand, GitCommand):
         sublime.run_command("new_window")
         project_data = dict(folders=[dict(follow_symlinks=True, path=self.suggested_git_root)])
         sublime.active_window().set_project_data(project_data)
+        settings.invalidate()
 
 
 class GsSetupUserCommand(WindowCommand, GitCommand):
@@ -162,3 +166,32 @@ class GsSetupUserCommand(WindowCommand, GitCommand):
 
     def on_done_email(self, email):
         self.git("config", "--global", "user.email", "\"{}\"".format(email))
+
+
+class GsSetupFastStatusCommand(WindowCommand, GitCommand):
+
+    """
+    Enable the untracked cache and, if git supports it on this platform,
+    the built-in file system monitor in the repo config.  Then run `git status`
+    once to populate them.
+    """
+
+    def run(self):
+        sublime.set_timeout_async(self.run_async, 0)
+
+    def run_async(self):
+        # Only git builds which ship the daemon know how to report its status.
+        fsmonitor = "fsmonitor-daemon" in self.git(
+            "fsmonitor--daemon", "status", throw_on_stderr=False)
+        message = FAST_STATUS_MESSAGE.format(" and file system monitor" if fsmonitor else "")
+        if not sublime.ok_cancel_dialog(message, "Enable"):
+            return
+
+        self.git("config", "core.untrackedCache", "true")
+        if fsmonitor:
+            self.git("config", "core.fsmonitor", "true")
+
+        strategy = self.get_status_strategy()
+        self.git("status", "--porcelain", *self._status_args(strategy))
+        self.window.status_message(
+            "Enabled untracked cache{}.".format(" and fsmonitor" if fsmonitor else ""))
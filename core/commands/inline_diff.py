@@ -6,6 +6,7 @@ import sublime
 from sublime_plugin import WindowCommand, TextCommand, EventListener
 
 from ...common import util
+from ...common import view_registry
 from .navigate import GsNavigate
 from ...common.theme_generator import XMLThemeGenerator, JSONThemeGenerator
 from ..git_command import GitCommand
@@ -22,9 +23,6 @@ DIFF_HEADER = """diff --git a/{path} b/{path}
 +++ b/{path}
 """
 
-inline_diff_views = {}
-diff_view_hunks = {}
-
 
 def capture_cur_position(view):
     try:
@@ -47,7 +45,7 @@ def place_cursor_and_show(view, row, col):
 
 
 def translate_row_to_inline_diff(diff_view, row):
-    hunks = diff_view_hunks[diff_view.id()]
+    hunks = view_registry.get_state(diff_view.id(), "hunks", [])
     deleted_lines_before_row = 0
 
     for hunk_ref in hunks:
@@ -84,9 +82,8 @@ class GsInlineDiffCommand(WindowCommand, GitCommand):
 
         view_key = "{0}+{1}".format(cached, settings["git_savvy.file_path"])
 
-        if view_key in inline_diff_views and inline_diff_views[view_key] in sublime.active_window().views():
-            diff_view = inline_diff_views[view_key]
-        else:
+        diff_view = view_registry.find(sublime.active_window(), "inline_diff", view_key)
+        if not diff_view:
             diff_view = util.view.get_scratch_view(self, "inline_diff", read_only=True)
             title = INLINE_DIFF_CACHED_TITLE if cached else INLINE_DIFF_TITLE
             diff_view.set_name(title + os.path.basename(settings["git_savvy.file_path"]))
@@ -99,7 +96,7 @@ class GsInlineDiffCommand(WindowCommand, GitCommand):
             for k, v in settings.items():
                 diff_view.settings().set(k, v)
 
-            inline_diff_views[view_key] = diff_view
+            view_registry.register(diff_view, "inline_diff", view_key)
 
         file_binary = util.file.get_file_contents_binary(
             settings["git_savvy.repo_path"], settings["git_savvy.file_path"])
@@ -201,14 +198,14 @@ class GsInlineDiffRefreshCommand(TextCommand, GitCommand):
             # Display the changes introduced between HEAD and index.
             stdout = self.git("diff", "--no-color", "-U0", ignore_eol_arg, "--cached", "--", file_path)
             diff = util.parse_diff(stdout)
-            head_file_contents = self.git("show", "HEAD:{}".format(rel_file_path))
+            head_file_contents = self.show_blob("HEAD:{}".format(rel_file_path))
             inline_diff_contents, replaced_lines = \
                 self.get_inline_diff_contents(head_file_contents, diff)
         else:
             # Display the changes introduced between index and working dir.
             stdout = self.git("diff", "--no-color", "-U0", ignore_eol_arg, "--", file_path)
             diff = util.parse_diff(stdout)
-            indexed_object_contents = self.git("show", ":{}".format(rel_file_path))
+            indexed_object_contents = self.show_blob(":{}".format(rel_file_path))
             inline_diff_contents, replaced_lines = \
                 self.get_inline_diff_contents(indexed_object_contents, diff)
 
@@ -244,11 +241,11 @@ class GsInlineDiffRefreshCommand(TextCommand, GitCommand):
 
         Remove any `-` or `+` characters at the beginning of each line, as
         well as the header summary line.  Additionally, store relevant data
-        in `diff_view_hunks` to be used when the user takes an
+        in the view's `hunks` state to be used when the user takes an
         action in the view.
         """
         hunks = []
-        diff_view_hunks[self.view.id()] = hunks
+        view_registry.set_state(self.view.id(), "hunks", hunks)
 
         lines = original_contents.split("\n")
         replaced_lines = []
@@ -355,16 +352,26 @@ class GsInlineDiffRefreshCommand(TextCommand, GitCommand):
 
     def verify_not_conflict(self):
         fpath = self.get_rel_path()
+        entries = self.index_entries(fpath)
+        if entries is not None:
+            # Conflicted files have entries for the stages 1 to 3 instead of 0.
+            if any(entry.stage for entry in entries):
+                self.close_conflicted_view()
+            return
+
         status_file_list = self.get_status()
         for f in status_file_list:
             if f.path == fpath:
                 if (f.index_status, f.working_status) in MERGE_CONFLICT_PORCELAIN_STATUSES:
-                    sublime.error_message("Inline-diff cannot be displayed for this file - "
-                                          "it has a merge conflict.")
-                    self.view.window().focus_view(self.view)
-                    self.view.window().run_command("close_file")
+                    self.close_conflicted_view()
                 break
 
+    def close_conflicted_view(self):
+        sublime.error_message("Inline-diff cannot be displayed for this file - "
+                              "it has a merge conflict.")
+        self.view.window().focus_view(self.view)
+        self.view.window().run_command("close_file")
+
 
 class GsInlineDiffFocusEventListener(EventListener):
 
@@ -464,7 +471,7 @@ class GsInlineDiffStageOrResetLineCommand(GsInlineDiffStageOrResetBase):
     """
 
     def get_diff_from_line(self, line_no, reset):
-        hunks = diff_view_hunks[self.view.id()]
+        hunks = view_registry.get_state(self.view.id(), "hunks", [])
         add_length_earlier_in_diff = 0
         cur_hunk_begin_on_minus = 0
         cur_hunk_begin_on_plus = 0
@@ -555,7 +562,7 @@ class GsInlineDiffStageOrResetHunkCommand(GsInlineDiffStageOrResetBase):
     """
 
     def get_diff_from_line(self, line_no, reset):
-        hunks = diff_view_hunks[self.view.id()]
+        hunks = view_registry.get_state(self.view.id(), "hunks", [])
         add_length_earlier_in_diff = 0
 
         # Find the correct hunk.
@@ -653,7 +660,7 @@ class GsInlineDiffOpenFile(TextCommand):
             return hunk_end_in_saved + lines_after_hunk_end, col_no
 
     def get_closest_hunk_ref_before(self, line_no):
-        hunks = diff_view_hunks[self.view.id()]
+        hunks = view_registry.get_state(self.view.id(), "hunks", [])
         for hunk_ref in reversed(hunks):
             if hunk_ref.section_start < line_no:
                 return hunk_ref
@@ -672,7 +679,7 @@ class GsInlineDiffNavigateHunkCommand(GsNavigate):
             sublime.Region(
                 self.view.text_point(hunk.section_start, 0),
                 self.view.text_point(hunk.section_end + 1, 0))
-            for hunk in diff_view_hunks[self.view.id()]]
+            for hunk in view_registry.get_state(self.view.id(), "hunks", [])]
 
 
 class GsInlineDiffUndo(TextCommand, GitCommand):
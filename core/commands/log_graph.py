@@ -1,6 +1,5 @@
 from functools import lru_cache, partial
 import re
-import threading
 
 import sublime
 from sublime_plugin import WindowCommand, TextCommand, EventListener
@@ -8,6 +7,7 @@ from sublime_plugin import WindowCommand, TextCommand, EventListener
 from . import log_graph_colorizer as colorizer
 from .log import GsLogActionCommand, GsLogCommand
 from .navigate import GsNavigate
+from .. import scheduler
 from ..git_command import GitCommand
 from ..settings import GitSavvySettings
 from ..ui_mixins.quick_panel import show_branch_panel
@@ -50,7 +50,7 @@ class LogGraphMixin(object):
         view.set_syntax_file("Packages/GitSavvy/syntax/graph.sublime-syntax")
         view.run_command("gs_handle_vintageous")
         view.run_command("gs_handle_arrow_keys")
-        threading.Thread(target=partial(augment_color_scheme, view)).run()
+        scheduler.submit(partial(augment_color_scheme, view), priority=scheduler.PREFETCH)
 
         settings = view.settings()
         settings.set("git_savvy.repo_path", repo_path)
@@ -94,11 +94,16 @@ def augment_color_scheme(view):
 class GsLogGraphRefreshCommand(TextCommand, GitCommand):
 
     """
-    Refresh the current graph view with the latest commits.
+    Refresh the current graph view with the latest commits.  Refreshes the
+    user asked for run before `background` ones.
     """
 
-    def run(self, edit, navigate_after_draw=False):
-        sublime.set_timeout_async(partial(self.run_async, navigate_after_draw))
+    def run(self, edit, navigate_after_draw=False, background=False):
+        # A newer refresh of the same view supersedes (and kills) a running one.
+        scheduler.submit(
+            partial(self.run_async, navigate_after_draw),
+            priority=scheduler.VISIBLE_REFRESH if background else scheduler.INTERACTIVE,
+            key=("log_graph_refresh", self.view.id()))
 
     def run_async(self, navigate_after_draw=False):
         file_path = self.file_path
@@ -121,7 +126,7 @@ class GsLogGraphRefreshCommand(TextCommand, GitCommand):
         draw_info_panel(self.view, self.savvy_settings.get("graph_show_more_commit_info"))
 
     def build_git_command(self):
-        args = self.savvy_settings.get("git_graph_args")
+        args = list(self.savvy_settings.get("git_graph_args"))
         follow = self.savvy_settings.get("log_follow_rename")
         if self.file_path and follow:
             args.insert(1, "--follow")
@@ -108,7 +108,7 @@ class GsQuickStageCommand(WindowCommand, GitCommand):
         (staged_entries,
          unstaged_entries,
          untracked_entries,
-         conflict_entries) = self.sort_status_entries(self.get_status())
+         conflict_entries) = self.sort_status_entries(status_entries)
 
         staged_count = len(staged_entries)
         unstaged_count = len(unstaged_entries)
@@ -14,7 +14,7 @@ class RefLogMixin(object):
 
     def run_async(self):
         show_paginated_panel(
-            self.reflog_generator(limit=self._limit), self.on_done, limit=self._limit)
+            self.reflog_generator(), self.on_done, limit=self._limit)
 
     def on_done(self, commit):
         if commit:
@@ -1,30 +1,70 @@
+"""
+Short Git status in the Sublime status bar.
+
+All views of a repository share one `RepoStatus`.  Activating a view just
+shows the text cached there.  While one of its views is visible, a poller
+per repository compares the repo's fingerprint (see `repo_state`) every
+`POLL_INTERVAL` on a `scheduler` worker, and `git status` only runs when it
+changed, after a file has been saved, or when GitSavvy asks for it after
+running a command.  Activating a view starts the poller again.  Edits to the
+working tree the fingerprint can't see are picked up on the next activation
+after `MAX_AGE`.
+"""
+
+import threading
 import time
+
 import sublime
 from sublime_plugin import TextCommand, EventListener
 
+from .. import repo_state
+from .. import scheduler
 from ..git_command import GitCommand
 from ...common.util import debug
 
 
+POLL_INTERVAL = 2000  # milliseconds
+MAX_AGE = 60  # seconds
+STATUS_KEY = "gitsavvy-repo-status"
+
+
+if '_repos' not in globals():
+    _repos = {}
+    _view_repos = {}
+    _lock = threading.Lock()
+
+
 class GsStatusBarEventListener(EventListener):
 
     # these methods should be run synchronously to check if the
     # view is transient.
     def on_new(self, view):
-        view.run_command("gs_update_status_bar")
+        view.run_command("gs_update_status_bar", {"force": False})
 
     def on_load(self, view):
-        view.run_command("gs_update_status_bar")
+        view.run_command("gs_update_status_bar", {"force": False})
 
     def on_activated(self, view):
-        view.run_command("gs_update_status_bar")
+        view.run_command("gs_update_status_bar", {"force": False})
 
     def on_post_save(self, view):
         view.run_command("gs_update_status_bar")
 
+    def on_close(self, view):
+        with _lock:
+            repo_path = _view_repos.pop(view.id(), None)
+            repo = _repos.get(repo_path)
+        if repo:
+            repo.unsubscribe(view)
 
-last_execution = 0
-update_status_bar_soon = False
+
+def view_is_visible(view):
+    """Return whether `view` is the active view of its group."""
+    window = view.window()
+    if not window:
+        return False
+    group, _ = window.get_view_index(view)
+    return group != -1 and window.active_view_in_group(group) == view
 
 
 def view_is_transient(view):
@@ -47,46 +87,166 @@ def view_is_transient(view):
     return False
 
 
-class GsUpdateStatusBarCommand(TextCommand, GitCommand):
+class RepoStatus():
 
     """
-    Update the short Git status in the Sublime status bar.
+    The short status of one repository and the views showing it.
     """
 
-    def run(self, edit):
-        if view_is_transient(self.view):
+    def __init__(self, repo_path):
+        self.repo_path = repo_path
+        self.text = None
+        self.fingerprint = None
+        self.updated_at = 0
+        self.refreshing = False
+        self.polling = False
+        self._views = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, view):
+        with self._lock:
+            self._views[view.id()] = view
+            text = self.text
+            start_polling = not self.polling
+            self.polling = True
+
+        if text is not None:
+            view.set_status(STATUS_KEY, text)
+        if start_polling:
+            self._schedule_poll()
+
+    def unsubscribe(self, view):
+        with self._lock:
+            self._views.pop(view.id(), None)
+
+    def views(self):
+        with self._lock:
+            for view_id, view in list(self._views.items()):
+                if not view.is_valid():
+                    del self._views[view_id]
+            return list(self._views.values())
+
+    def is_outdated(self):
+        return self.text is None or time.time() - self.updated_at > MAX_AGE
+
+    def refresh(self, force=True):
+        """
+        Schedule a `git status`.  Unless `force` is set, a refresh still
+        running is not superseded.
+        """
+        with self._lock:
+            if self.refreshing and not force:
+                return
+            self.refreshing = True
+        scheduler.submit(self._refresh, priority=scheduler.STATUS_BAR, key=("status_bar", self.repo_path))
+
+    def _refresh(self):
+        views = self.views()
+        if not views:
+            with self._lock:
+                self.refreshing = False
             return
 
-        global last_execution, update_status_bar_soon
-        if self.savvy_settings.get("git_status_in_status_bar"):
-
-            millisec = int(round(time.time() * 1000))
-            # If we updated to less then 100 ms we don't need to update now but
-            # should update in 100 ms in case of current file change.
-            #
-            # So if this get called 4 timer with 20 ms in between each call
-            # it will only update twice. Once at time 0 and one at time 100
-            # even if it got called at 0, 20, 40, 60 and 80.
-
-            if millisec - 100 > last_execution:
-                sublime.set_timeout_async(self.run_async, 0)
-            else:
-                if not update_status_bar_soon:
-                    update_status_bar_soon = True
-                    sublime.set_timeout_async(self.run_async, 100)
-
-            last_execution = int(round(time.time() * 1000))
-
-    def run_async(self):
+        # Take the fingerprint first, so that changes made while git runs
+        # trigger another refresh.
+        fingerprint = repo_state.fingerprint(self.repo_path)
         # disable logging and git raise error
         with debug.disable_logging():
             # ignore all other possible errors
             try:
-                self.get_repo_path(offer_init=False)  # check for ValueError
-                short_status = self.get_branch_status_short()
-                self.view.set_status("gitsavvy-repo-status", short_status)
+                text = GsUpdateStatusBarCommand(views[0]).get_branch_status_short()
+            except scheduler.Cancelled:
+                raise
             except Exception:
-                self.view.erase_status("gitsavvy-repo-status")
+                text = None
+
+        with self._lock:
+            self.text = text
+            self.fingerprint = fingerprint
+            self.updated_at = time.time()
+            self.refreshing = False
+
+        for view in views:
+            if text is None:
+                view.erase_status(STATUS_KEY)
+            else:
+                view.set_status(STATUS_KEY, text)
+
+    def _schedule_poll(self):
+        sublime.set_timeout(
+            lambda: scheduler.submit(
+                self._poll, priority=scheduler.STATUS_BAR, key=("status_bar_poll", self.repo_path)),
+            POLL_INTERVAL
+        )
+
+    def _poll(self):
+        if not self.views():
+            with _lock:
+                if _repos.get(self.repo_path) is self:
+                    del _repos[self.repo_path]
+
+        # Checked under the lock, so that a view subscribing meanwhile
+        # either counts or starts polling again.
+        with self._lock:
+            if not any(view_is_visible(view) for view in self._views.values()):
+                self.polling = False
+                return
+
+        fingerprint = repo_state.fingerprint(self.repo_path)
+        # `None` means the repo is changing right now, wait for it to settle.
+        if fingerprint is not None and fingerprint != self.fingerprint:
+            self.refresh(force=False)
+        self._schedule_poll()
+
+
+def repo_status(repo_path):
+    """
+    Return the shared `RepoStatus` of `repo_path`.
+    """
+    with _lock:
+        repo = _repos.get(repo_path)
+        if repo is None:
+            repo = _repos[repo_path] = RepoStatus(repo_path)
+        return repo
+
+
+class GsUpdateStatusBarCommand(TextCommand, GitCommand):
+
+    """
+    Update the short Git status in the Sublime status bar.  Unless `force`
+    is set to `false`, the status is read from git, otherwise only if it
+    may be outdated.
+    """
+
+    def run(self, edit, force=True):
+        if view_is_transient(self.view):
+            return
+
+        if self.savvy_settings.get("git_status_in_status_bar"):
+            sublime.set_timeout_async(lambda: self.run_async(force), 0)
+
+    def run_async(self, force):
+        view_id = self.view.id()
+        try:
+            repo_path = self.get_repo_path(offer_init=False)
+        except Exception:
+            repo_path = None
+
+        with _lock:
+            previous = _view_repos.get(view_id)
+            if repo_path:
+                _view_repos[view_id] = repo_path
+            else:
+                _view_repos.pop(view_id, None)
+            previous_repo = _repos.get(previous) if previous != repo_path else None
+
+        if previous_repo:
+            previous_repo.unsubscribe(self.view)
+        if not repo_path:
+            self.view.erase_status(STATUS_KEY)
+            return
 
-        global update_status_bar_soon
-        update_status_bar_soon = False
+        repo = repo_status(repo_path)
+        repo.subscribe(self.view)
+        if force or repo.is_outdated():
+            repo.refresh(force)
@@ -6,6 +6,8 @@ Define a base command class that:
      for Git operations.
 """
 
+from collections.abc import Mapping
+import codecs
 import os
 import subprocess
 import shutil
@@ -16,6 +18,11 @@ import traceback
 import sublime
 
 from ..common import util
+from . import cat_file
+from . import repo_paths
+from . import scheduler
+from . import single_flight
+from .git_mixins import index_file
 from .git_mixins.status import StatusMixin
 from .git_mixins.active_branch import ActiveBranchMixin
 from .git_mixins.branches import BranchesMixin
@@ -33,6 +40,7 @@ from .settings import SettingsMixin
 import time
 
 git_path = None
+git_version = None
 error_message_displayed = False
 
 UTF8_PARSE_ERROR_MSG = (
@@ -50,40 +58,92 @@ FALLBACK_PARSE_ERROR_MSG = (
 GIT_TOO_OLD_MSG = "Your Git version is too old. GitSavvy requires {:d}.{:d}.{:d} or above."
 
 # git minimum requirement
-GIT_REQUIRE_MAJOR = 1
-GIT_REQUIRE_MINOR = 9
+GIT_REQUIRE_MAJOR = 2
+GIT_REQUIRE_MINOR = 11
 GIT_REQUIRE_PATCH = 0
 
 
 ANSI_ESCAPE = re.compile(r'\x1B\[[0-?]*[ -/]*[@-~]')
 
+# Bytes read at once by `git_stream`.
+STREAM_CHUNK_SIZE = 2 ** 16
+
 
 class LoggingProcessWrapper(object):
 
     """
     Wraps a Popen object with support for logging stdin/stderr
+
+    Output is collected in chunk lists and written to the panel in batches,
+    at most every `PANEL_FLUSH_INTERVAL` seconds or as soon as
+    `PANEL_FLUSH_SIZE` bytes are pending.  If the panel can't keep up, the
+    oldest pending output beyond `PANEL_MAX_PENDING` is dropped from the
+    panel (not from the returned output).
+
+    The chunk lists themselves are not capped: `communicate` returns the
+    complete stdout and stderr, which `git` hands to its caller (and
+    usually parses), just as `Popen.communicate` would.
     """
+    PANEL_FLUSH_INTERVAL = 0.05
+    PANEL_FLUSH_SIZE = 2 ** 16
+    PANEL_MAX_PENDING = 2 ** 20
+
     def __init__(self, process, timeout):
         self.timeout = timeout
         self.process = process
-        self.stdout = b''
-        self.stderr = b''
+        self.stdout_chunks = []
+        self.stderr_chunks = []
+
+        self._pending = []
+        self._pending_size = 0
+        self._omitted = 0
+        self._lock = threading.Lock()
+        self._flush_requested = threading.Event()
+        self._done = False
 
     def read_stdout(self):
-        try:
-            for line in iter(self.process.stdout.readline, b""):
-                self.stdout = self.stdout + line
-                util.log.panel_append(line.decode(), run_async=False)
-        except IOError as err:
-            util.log.panel_append(err, run_async=False)
+        self._read(self.process.stdout, self.stdout_chunks)
 
     def read_stderr(self):
+        self._read(self.process.stderr, self.stderr_chunks)
+
+    def _read(self, stream, chunks):
+        decoder = codecs.getincrementaldecoder("utf-8")("replace")
         try:
-            for line in iter(self.process.stderr.readline, b""):
-                self.stderr = self.stderr + line
-                util.log.panel_append(line.decode(), run_async=False)
+            for chunk in iter(lambda: stream.read1(STREAM_CHUNK_SIZE), b""):
+                chunks.append(chunk)
+                self._queue_for_panel(decoder.decode(chunk))
+            self._queue_for_panel(decoder.decode(b"", final=True))
         except IOError as err:
-            util.log.panel_append(err, run_async=False)
+            self._queue_for_panel(str(err))
+
+    def _queue_for_panel(self, text):
+        if not text:
+            return
+        with self._lock:
+            self._pending.append(text)
+            self._pending_size += len(text)
+            while self._pending_size > self.PANEL_MAX_PENDING and len(self._pending) > 1:
+                dropped = self._pending.pop(0)
+                self._pending_size -= len(dropped)
+                self._omitted += len(dropped)
+            if self._pending_size >= self.PANEL_FLUSH_SIZE:
+                self._flush_requested.set()
+
+    def _flush(self):
+        with self._lock:
+            pending, self._pending, self._pending_size = self._pending, [], 0
+            omitted, self._omitted = self._omitted, 0
+        if omitted:
+            pending.insert(0, "[... {} characters omitted ...]\n".format(omitted))
+        if pending:
+            util.log.panel_append("".join(pending), run_async=False)
+
+    def _flush_periodically(self):
+        while not self._done:
+            self._flush_requested.wait(self.PANEL_FLUSH_INTERVAL)
+            self._flush_requested.clear()
+            self._flush()
 
     def communicate(self, stdin):
         """
@@ -101,13 +161,20 @@ class LoggingProcessWrapper(object):
         stdout_thread.start()
         stderr_thread = threading.Thread(target=self.read_stderr)
         stderr_thread.start()
+        flush_thread = threading.Thread(target=self._flush_periodically)
+        flush_thread.start()
 
         self.process.wait()
 
         stdout_thread.join(self.timeout / 1000)
         stderr_thread.join(self.timeout / 1000)
 
-        return self.stdout, self.stderr
+        self._done = True
+        self._flush_requested.set()
+        flush_thread.join()
+        self._flush()
+
+        return b"".join(self.stdout_chunks), b"".join(self.stderr_chunks)
 
 
 class GitCommand(StatusMixin,
@@ -151,6 +218,7 @@ class GitCommand(StatusMixin,
         current working directory for the git process; otherwise,
         the `repo_path` value will be used.
         """
+        subcommand = args[0]
         args = self._include_global_flags(args)
         command = (self.git_binary_path, ) + tuple(arg for arg in args if arg)
         command_str = " ".join(command)
@@ -166,6 +234,7 @@ class GitCommand(StatusMixin,
         live_panel_output = self.savvy_settings.get("live_panel_output", False)
 
         stdout, stderr = None, None
+        bytes_read = 0
 
         try:
             if not working_dir:
@@ -188,13 +257,6 @@ class GitCommand(StatusMixin,
                 environ.update(savvy_env)
             environ.update(custom_environ or {})
             start = time.time()
-            p = subprocess.Popen(command,
-                                 stdin=subprocess.PIPE,
-                                 stdout=subprocess.PIPE,
-                                 stderr=subprocess.PIPE,
-                                 cwd=working_dir,
-                                 env=environ,
-                                 startupinfo=startupinfo)
 
             def initialize_panel():
                 # clear panel
@@ -204,17 +266,50 @@ class GitCommand(StatusMixin,
                 if self.savvy_settings.get("show_input_in_output"):
                     util.log.panel_append("> {}\n".format(command_str), run_async=False)
 
-            if show_panel and live_panel_output:
-                wrapper = LoggingProcessWrapper(p, self.savvy_settings.get("live_panel_output_timeout", 10000))
-                initialize_panel()
-
-            if stdin is not None and encode:
-                stdin = stdin.encode(encoding=stdin_encoding)
-
-            if show_panel and live_panel_output:
-                stdout, stderr = wrapper.communicate(stdin)
+            stdin_bytes = stdin.encode(encoding=stdin_encoding) if stdin is not None and encode else stdin
+
+            def run_process(shared=None):
+                p = subprocess.Popen(command,
+                                     stdin=subprocess.PIPE,
+                                     stdout=subprocess.PIPE,
+                                     stderr=subprocess.PIPE,
+                                     cwd=working_dir,
+                                     env=environ,
+                                     startupinfo=startupinfo)
+                if shared is not None:
+                    # Killed once the jobs of all callers sharing it are cancelled.
+                    shared.start(p)
+                else:
+                    scheduler.register_process(p)
+                try:
+                    if show_panel and live_panel_output:
+                        wrapper = LoggingProcessWrapper(p, self.savvy_settings.get("live_panel_output_timeout", 10000))
+                        initialize_panel()
+                        stdout, stderr = wrapper.communicate(stdin_bytes)
+                    else:
+                        stdout, stderr = p.communicate(stdin_bytes)
+                finally:
+                    if shared is None:
+                        scheduler.unregister_process(p)
+                return p.returncode, stdout, stderr
+
+            if (
+                stdin is None
+                and not show_panel
+                and args[0] in single_flight.READ_ONLY_COMMANDS
+            ):
+                # Identical read-only commands issued concurrently, e.g. by
+                # several event listeners reacting to the same view
+                # activation, share one process and its output.
+                key = (working_dir, tuple(command), tuple(sorted((savvy_env or {}).items())),
+                       tuple(sorted((custom_environ or {}).items())))
+                returncode, stdout, stderr = single_flight.run(
+                    key, run_process, share=scheduler.SharedProcess)
             else:
-                stdout, stderr = p.communicate(stdin)
+                returncode, stdout, stderr = run_process()
+            bytes_read = len(stdout or b"")
+
+            scheduler.raise_if_cancelled()
 
             if decode:
                 stdout, stderr = self.decode_stdout(stdout), self.decode_stdout(stderr)
@@ -228,6 +323,9 @@ class GitCommand(StatusMixin,
                         util.log.panel_append("\n")
                     util.log.panel_append(stderr)
 
+        except scheduler.Cancelled:
+            raise
+
         except Exception as e:
             # this should never be reached
             raise GitSavvyError(
@@ -236,6 +334,7 @@ class GitCommand(StatusMixin,
 
         finally:
             end = time.time()
+            util.perf.record(subcommand, self.__class__.__name__, end - start, bytes_read)
             if decode:
                 util.debug.log_git(args, stdin, stdout, stderr, end - start)
             else:
@@ -250,7 +349,7 @@ class GitCommand(StatusMixin,
             if show_panel and self.savvy_settings.get("show_time_elapsed_in_output", True):
                 util.log.panel_append("\n[Done in {:.2f}s]".format(end - start))
 
-        if throw_on_stderr and not p.returncode == 0:
+        if throw_on_stderr and not returncode == 0:
             if show_status_message_on_stderr:
                 sublime.active_window().status_message(
                     "Failed to run `git {}`. See log for details.".format(command[1])
@@ -273,6 +372,164 @@ class GitCommand(StatusMixin,
 
         return stdout
 
+    def git_stream(self, *args,
+                   separator="\n",
+                   working_dir=None,
+                   show_panel_on_stderr=True,
+                   throw_on_stderr=True,
+                   custom_environ=None):
+        """
+        Like `git` but return a generator yielding the output record by
+        record, split at `separator`, as soon as git produces it.
+
+        Each record is decoded and stripped of ANSI escapes on its own.
+        Closing the generator early (or dropping it) kills the git process.
+        Errors are raised after the last record has been yielded.
+        """
+        subcommand = args[0]
+        args = self._include_global_flags(args)
+        command = (self.git_binary_path, ) + tuple(arg for arg in args if arg)
+        command_str = " ".join(command)
+        separator = separator.encode("utf-8")
+
+        try:
+            if not working_dir:
+                working_dir = self.repo_path
+        except RuntimeError as e:
+            raise GitSavvyError(e, show_panel=False)
+        except Exception as e:
+            raise GitSavvyError(e, show_panel=show_panel_on_stderr)
+
+        startupinfo = None
+        if os.name == "nt":
+            startupinfo = subprocess.STARTUPINFO()
+            startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+
+        environ = os.environ.copy()
+        environ.update(self.savvy_settings.get("env") or {})
+        environ.update(custom_environ or {})
+
+        start = time.time()
+        p = subprocess.Popen(command,
+                             stdin=subprocess.DEVNULL,
+                             stdout=subprocess.PIPE,
+                             stderr=subprocess.PIPE,
+                             cwd=working_dir,
+                             env=environ,
+                             startupinfo=startupinfo)
+        scheduler.register_process(p)
+
+        # Drain stderr concurrently, otherwise git may block writing to it.
+        stderr_chunks = []
+        stderr_thread = threading.Thread(target=lambda: stderr_chunks.append(p.stderr.read()))
+        stderr_thread.start()
+
+        records = 0
+        bytes_read = 0
+        finished = False
+        try:
+            pending = b""
+            while True:
+                chunk = p.stdout.read1(STREAM_CHUNK_SIZE)
+                if not chunk:
+                    break
+                bytes_read += len(chunk)
+                pending += chunk
+                *complete, pending = pending.split(separator)
+                for record in complete:
+                    records += 1
+                    yield ANSI_ESCAPE.sub('', self.decode_stdout(record))
+            if pending:
+                records += 1
+                yield ANSI_ESCAPE.sub('', self.decode_stdout(pending))
+            finished = True
+        finally:
+            if p.poll() is None:
+                p.kill()
+            p.wait()
+            stderr_thread.join()
+            p.stdout.close()
+            p.stderr.close()
+            scheduler.unregister_process(p)
+            stderr = self.decode_stdout(b"".join(stderr_chunks))
+            end = time.time()
+            util.perf.record(subcommand, self.__class__.__name__, end - start, bytes_read)
+            util.debug.log_git(
+                args, None, "<{} records streamed>".format(records), stderr, end - start)
+
+        scheduler.raise_if_cancelled()
+        if finished and throw_on_stderr and p.returncode != 0:
+            raise GitSavvyError("`{}` failed with following output:\n{}".format(
+                command_str, stderr
+            ), show_panel=show_panel_on_stderr)
+
+    def read_object(self, rev, decode=True):
+        """
+        Return the contents of the blob named by `rev` (e.g. an object hash,
+        `HEAD:path` or `:path`) or `None` if `rev` does not name a blob.
+
+        Objects are read through a long-lived `git cat-file --batch` process
+        shared by all commands of the repository, so that reading many
+        objects in a row does not spawn a `git` process for each of them.
+        """
+        response = self._cat_file_request(rev, mode="batch")
+        if not response or response[0].type != "blob":
+            return None
+
+        content = response[1]
+        if decode:
+            content = ANSI_ESCAPE.sub('', self.decode_stdout(content))
+        return content
+
+    def get_object_info(self, rev):
+        """
+        Return an `ObjectInfo` (oid, type and size) for `rev`, or `None`
+        if no such object exists.
+        """
+        response = self._cat_file_request(rev, mode="batch-check")
+        return response[0] if response else None
+
+    def _cat_file_request(self, rev, mode):
+        idle_timeout = self.savvy_settings.get("cat_file_idle_timeout", cat_file.DEFAULT_IDLE_TIMEOUT)
+        if not idle_timeout or "\n" in rev:
+            return None
+
+        server = cat_file.get_server(
+            self.git_binary_path,
+            self.repo_path,
+            env=self.savvy_settings.get("env"),
+            mode=mode,
+            idle_timeout=idle_timeout
+        )
+        start = time.time()
+        try:
+            response = server.request(rev)
+        except cat_file.CatFileError as e:
+            util.debug.log_error(e)
+            return None
+
+        end = time.time()
+        util.perf.record(
+            "cat-file", self.__class__.__name__, end - start,
+            len(response[1] or b"") if response else 0)
+        util.debug.log_git(
+            ["cat-file", "--" + mode, rev], None,
+            "" if response is None else " ".join(str(field) for field in response[0]),
+            "", end - start)
+        return response
+
+    def show_blob(self, rev, decode=True):
+        """
+        Return the contents of the blob named by `rev`.  Read it from the
+        repo's `git cat-file` process if possible, and use `git show` as a
+        fallback, e.g. for objects that are not blobs or to get git's usual
+        error message if `rev` does not exist.
+        """
+        content = self.read_object(rev, decode=decode)
+        if content is None:
+            content = self.git("show", "--no-color", rev, decode=decode)
+        return content
+
     def decode_stdout(self, stdout):
         fallback_encoding = self.savvy_settings.get("fallback_encoding")
         silent_fallback = self.savvy_settings.get("silent_fallback")
@@ -300,10 +557,10 @@ class GitCommand(StatusMixin,
         Return the path to the available `git` binary.
         """
 
-        global git_path, error_message_displayed
+        global git_path, git_version, error_message_displayed
         if not git_path:
             git_path_setting = self.savvy_settings.get("git_path")
-            if isinstance(git_path_setting, dict):
+            if isinstance(git_path_setting, Mapping):
                 git_path = git_path_setting.get(sublime.platform())
                 if not git_path:
                     git_path = git_path_setting.get('default')
@@ -333,6 +590,7 @@ class GitCommand(StatusMixin,
                 major = int(match.group(1))
                 minor = int(match.group(2))
                 patch = int(match.group(3))
+                git_version = (major, minor, patch)
                 if major < GIT_REQUIRE_MAJOR \
                         or (major == GIT_REQUIRE_MAJOR and minor < GIT_REQUIRE_MINOR) \
                         or (major == GIT_REQUIRE_MAJOR and minor == GIT_REQUIRE_MINOR and patch < GIT_REQUIRE_PATCH):
@@ -357,6 +615,15 @@ class GitCommand(StatusMixin,
 
         return git_path
 
+    @property
+    def git_version(self):
+        """
+        Return the version of the `git` binary as a tuple of ints, or
+        `None` if it is unknown.
+        """
+        self.git_binary_path
+        return git_version
+
     def find_working_dir(self):
         view = self.window.active_view() if hasattr(self, "window") else self.view
         window = view.window() if view else None
@@ -399,6 +666,10 @@ class GitCommand(StatusMixin,
         return os.path.realpath(repo_path) if repo_path else None
 
     def find_git_toplevel(self, folder, throw_on_stderr):
+        toplevel = repo_paths.find_toplevel(folder, env=self.savvy_settings.get("env"))
+        if toplevel is not repo_paths.UNKNOWN:
+            return toplevel
+
         stdout = self.git(
             "rev-parse",
             "--show-toplevel",
@@ -447,6 +718,37 @@ class GitCommand(StatusMixin,
         """
         return self.get_repo_path()
 
+    @property
+    def git_dir(self):
+        """
+        Return the git dir holding the state of this working tree, usually
+        `<repo_path>/.git`, but not for linked worktrees and submodules.
+        """
+        dirs = repo_paths.git_dirs(self.repo_path)
+        return dirs[0] if dirs else os.path.join(self.repo_path, ".git")
+
+    def read_index(self):
+        """
+        Return the parsed index of the repo, or `None` if it can only be
+        read by git.
+        """
+        index = index_file.read_index(self.repo_path, env=self.savvy_settings.get("env"))
+        return None if index is index_file.UNKNOWN else index
+
+    def index_entries(self, file_path):
+        """
+        Return the index entries (one per stage) of the file at `file_path`,
+        absolute or relative to the repo root, or `None` if the index can
+        only be read by git.
+        """
+        index = self.read_index()
+        if index is None:
+            return None
+        rel_path = os.path.relpath(os.path.join(self.repo_path, file_path), start=self.repo_path)
+        if rel_path.startswith(os.pardir):
+            return None
+        return index.lookup(rel_path.replace(os.sep, "/").encode("utf-8"))
+
     @property
     def short_repo_path(self):
         if "HOME" in os.environ:
@@ -492,12 +794,12 @@ class GitCommand(StatusMixin,
         global_pre_flags = self.savvy_settings.get("global_pre_flags")
 
         if global_flags and git_cmd in global_flags:
-            args = [git_cmd] + global_flags[git_cmd] + addl_args
+            args = [git_cmd] + list(global_flags[git_cmd]) + addl_args
         else:
             args = [git_cmd] + list(addl_args)
 
         if global_pre_flags and git_cmd in global_pre_flags:
-            args = global_pre_flags[git_cmd] + args
+            args = list(global_pre_flags[git_cmd]) + args
 
         return args
 
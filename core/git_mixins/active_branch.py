@@ -1,13 +1,28 @@
 import re
 import string
 
+from .. import repo_state
+from . import git_dir
+
 
 class ActiveBranchMixin():
 
+    @repo_state.cached(depends_on=("head", "refs"))
     def get_current_branch_name(self):
         """
         Return the name of the last checkout-out branch.
         """
+        dirs = git_dir.git_dirs(self.repo_path)
+        if dirs is not git_dir.UNKNOWN:
+            head = git_dir.read_head(dirs[0])
+            if head and head.startswith("refs/heads/"):
+                commit_hash = git_dir.resolve_ref(dirs[0], dirs[1], head)
+                if commit_hash is None:
+                    # `git branch` doesn't list unborn branches.
+                    return None
+                if commit_hash is not git_dir.UNKNOWN:
+                    return head[len("refs/heads/"):]
+
         stdout = self.git("branch", "--no-color")
         try:
             correct_line = next(line for line in stdout.split("\n") if line.startswith("*"))
@@ -55,6 +70,21 @@ class ActiveBranchMixin():
 
         return False, branch, remote, clean, ahead, behind, bool(gone)
 
+    def _get_branch_status_components_from_snapshot(self, snapshot):
+        """
+        Return the same tuple as `_get_branch_status_components` for a
+        porcelain v2 `StatusSnapshot`.
+        """
+        clean = not snapshot.entries
+        if snapshot.branch_head is None:
+            return True, None, None, clean, None, None, False
+
+        # Porcelain v2 omits `branch.ab` if the upstream is gone.
+        gone = snapshot.upstream is not None and snapshot.ahead is None
+        ahead = str(snapshot.ahead) if snapshot.ahead else None
+        behind = str(snapshot.behind) if snapshot.behind else None
+        return False, snapshot.branch_head, snapshot.upstream, clean, ahead, behind, gone
+
     def get_branch_status(self, delim=None):
         """
         Return a tuple of:
@@ -108,10 +138,37 @@ class ActiveBranchMixin():
         if self.in_rebase():
             return "(no branch, rebasing {})".format(self.rebase_branch_name())
 
-        lines = self._get_status()
+        strategy = self.get_status_strategy()
+        if strategy["status_bar"] == "branch_only":
+            lines = [self._get_branch_status_line()]
+        else:
+            lines = self._get_status(strategy)
         branch_status = self._get_branch_status_components(lines)
         return self._format_branch_status_short(branch_status)
 
+    def _get_branch_status_line(self):
+        """
+        Return the branch line of `git status --porcelain -b` without looking
+        at the working tree, which can take a long time in large repos.
+        """
+        dirs = git_dir.git_dirs(self.repo_path)
+        head = git_dir.read_head(dirs[0]) if dirs is not git_dir.UNKNOWN else git_dir.UNKNOWN
+        if head is git_dir.UNKNOWN:
+            head = self.git("symbolic-ref", "-q", "HEAD", throw_on_stderr=False).strip() or None
+
+        if not head or not head.startswith("refs/heads/"):
+            return "## HEAD (no branch)"
+
+        line = "## " + head[len("refs/heads/"):]
+        upstream, _, track = self.git(
+            "for-each-ref", "--format=%(upstream:short)%00%(upstream:track)", head
+        ).strip().partition("\x00")
+        if upstream:
+            line += "..." + upstream
+            if track:
+                line += " " + track
+        return line
+
     def _format_branch_status_short(self, branch_status):
         detached, branch, remote, clean, ahead, behind, gone = branch_status
 
@@ -134,8 +191,15 @@ class ActiveBranchMixin():
         """
         Get the SHA1 commit hash for the commit at HEAD.
         """
+        dirs = git_dir.git_dirs(self.repo_path)
+        if dirs is not git_dir.UNKNOWN:
+            commit_hash = git_dir.resolve_ref(dirs[0], dirs[1], "HEAD")
+            if commit_hash and commit_hash is not git_dir.UNKNOWN:
+                return commit_hash
+
         return self.git("rev-parse", "HEAD").strip()
 
+    @repo_state.cached(depends_on=("head", "refs"))
     def get_latest_commit_msg_for_head(self):
         """
         Get last commit msg for the commit at HEAD.
@@ -150,10 +214,17 @@ class ActiveBranchMixin():
 
         return stdout or "No commits yet."
 
+    @repo_state.cached(depends_on=("head", "refs", "config"))
     def get_upstream_for_active_branch(self):
         """
         Return ref for remote tracking branch.
         """
+        dirs = git_dir.git_dirs(self.repo_path)
+        if dirs is not git_dir.UNKNOWN:
+            upstream = git_dir.read_upstream(*dirs)
+            if upstream is not git_dir.UNKNOWN:
+                return upstream
+
         return self.git("rev-parse", "--abbrev-ref", "--symbolic-full-name",
                         "@{u}", throw_on_stderr=False).strip()
 
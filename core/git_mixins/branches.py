@@ -1,5 +1,8 @@
 from collections import namedtuple
 
+from .. import repo_state
+from . import git_dir
+
 
 Branch = namedtuple("Branch", (
     "name",
@@ -16,22 +19,55 @@ Branch = namedtuple("Branch", (
 
 class BranchesMixin():
 
-    def get_branches(self, sort_by_recent=False):
+    @repo_state.cached(
+        depends_on=("head", "refs", "config"),
+        key=lambda self, *args, **kwargs: self.savvy_settings.get("enable_branch_descriptions")
+    )
+    def get_branches(self, sort_by_recent=False, refs=("refs/heads", "refs/remotes")):
         """
-        Return a list of all local and remote branches.
+        Return a list of all local and remote branches, or only of those
+        below `refs`, e.g. `("refs/remotes/origin", )`.
         """
         stdout = self.git(
             "for-each-ref",
             "--format=%(HEAD)%00%(refname)%00%(upstream)%00%(upstream:track)%00%(objectname)%00%(contents:subject)",
             "--sort=-committerdate" if sort_by_recent else None,
-            "refs/heads",
-            "refs/remotes")
-        return (branch
-                for branch in (self._parse_branch_line(self, line) for line in stdout.split("\n"))
-                if branch and branch.name != "HEAD")
+            *refs)
+        descriptions = (
+            self.get_branch_descriptions()
+            if self.savvy_settings.get("enable_branch_descriptions")
+            else {}
+        )
+        return [branch
+                for branch in (self._parse_branch_line(self, line, descriptions) for line in stdout.split("\n"))
+                if branch and branch.name != "HEAD"]
+
+    def get_branch_descriptions(self):
+        """
+        Return a dict of local branch names to their descriptions.
+        """
+        dirs = git_dir.git_dirs(self.repo_path)
+        if dirs is not git_dir.UNKNOWN:
+            values = git_dir.config_subsections(dirs[0], dirs[1], "branch", "description")
+            if values is not git_dir.UNKNOWN:
+                return {branch: descriptions[-1] for branch, descriptions in values.items()}
+
+        stdout = self.git(
+            "config",
+            "-z",
+            "--get-regexp",
+            r"^branch\..*\.description$",
+            throw_on_stderr=False
+        )
+        descriptions = {}
+        for entry in stdout.split("\x00"):
+            key, _, description = entry.partition("\n")
+            if key:
+                descriptions[key[len("branch."):-len(".description")]] = description
+        return descriptions
 
     @staticmethod
-    def _parse_branch_line(self, line):
+    def _parse_branch_line(self, line, descriptions):
         line = line.strip()
         if not line:
             return None
@@ -47,14 +83,7 @@ class BranchesMixin():
             # remove brackets
             tracking_status = tracking_status[1:len(tracking_status) - 1]
 
-        enable_branch_descriptions = self.savvy_settings.get("enable_branch_descriptions")
-
-        hide_description = is_remote or not enable_branch_descriptions
-        description = "" if hide_description else self.git(
-            "config",
-            "branch.{}.description".format(branch_name),
-            throw_on_stderr=False
-        ).strip("\n")
+        description = "" if is_remote else descriptions.get(branch_name, "").strip("\n")
 
         return Branch(
             "/".join(branch_name.split("/")[1:]) if is_remote else branch_name,
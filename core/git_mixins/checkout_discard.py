@@ -1,3 +1,6 @@
+from .stage_unstage import chunk_paths
+
+
 class CheckoutDiscardMixin():
 
     def discard_all_unstaged(self):
@@ -13,7 +16,8 @@ class CheckoutDiscardMixin():
         Given a list of absolute paths or paths relative to the repo's root,
         remove the file or directory from the working tree.
         """
-        self.git("clean", "-df", "--", *fpaths)
+        for chunk in chunk_paths(fpaths):
+            self.git("clean", "-df", "--", *chunk)
 
     def checkout_file(self, *fpaths):
         """
@@ -21,7 +25,8 @@ class CheckoutDiscardMixin():
         discard any changes made to the file and revert it in the working
         directory to the state it is in HEAD.
         """
-        self.git("checkout", "--", *fpaths)
+        for chunk in chunk_paths(fpaths):
+            self.git("checkout", "--", *chunk)
 
     def checkout_ref(self, ref, fpath=None):
         """
@@ -0,0 +1,376 @@
+"""
+Read HEAD, refs, upstream config and rebase state directly from the git dir.
+
+These are all small files, so reading them is much cheaper than spawning
+git.  The readers only understand the plain, common layouts: whenever they
+meet something else (reftable, config includes, unusual refspecs, garbage)
+they return `UNKNOWN` and the caller has to ask git instead.
+
+Per-worktree state (`HEAD`, pseudo refs, rebase and merge state) is read
+from the git dir, everything shared between worktrees from the common dir,
+see `repo_paths.git_dirs`.
+"""
+
+import os
+import re
+import threading
+
+from .. import repo_paths
+from ..repo_paths import UNKNOWN
+
+
+MAX_SYMREF_DEPTH = 5
+HASH_RE = re.compile(r"^(?:[0-9a-f]{40}|[0-9a-f]{64})$")
+PER_WORKTREE_PREFIXES = ("refs/bisect/", "refs/worktree/", "refs/rewritten/")
+
+
+if '_packed_refs_cache' not in globals():
+    _packed_refs_cache = {}
+    _config_cache = {}
+    _cache_lock = threading.Lock()
+
+
+def git_dirs(repo_path):
+    """
+    Return the git dir and the common dir of `repo_path`, or `UNKNOWN`.
+    """
+    dirs = repo_paths.git_dirs(repo_path)
+    if not dirs or os.path.exists(os.path.join(dirs[1], "reftable")):
+        return UNKNOWN
+    return dirs
+
+
+def _read_first_line(path):
+    """
+    Return the stripped first line of `path`, `None` if it does not exist,
+    or `UNKNOWN` if it cannot be read.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.readline().strip()
+    except FileNotFoundError:
+        return None
+    except (OSError, UnicodeDecodeError):
+        return UNKNOWN
+
+
+def _stat_key(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+
+def _cached_by_stat(cache, path, parse):
+    """
+    Return `parse(path)`, memoized until the file at `path` changes.
+    """
+    try:
+        key = _stat_key(path)
+    except OSError:
+        return UNKNOWN
+
+    cached = cache.get(path)
+    if cached and cached[0] == key:
+        return cached[1]
+
+    result = parse(path) if key else parse(None)
+    with _cache_lock:
+        cache[path] = (key, result)
+    return result
+
+
+def _parse_packed_refs(path):
+    if path is None:
+        return {}
+
+    refs = {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.rstrip("\n")
+                if not line or line.startswith(("#", "^")):
+                    continue
+                sha, _, refname = line.partition(" ")
+                if not HASH_RE.match(sha) or not refname:
+                    return UNKNOWN
+                refs[refname] = sha
+    except (OSError, UnicodeDecodeError):
+        return UNKNOWN
+    return refs
+
+
+def _ref_path(git_dir, common_dir, refname):
+    parts = refname.split("/")
+    if any(part in ("", ".", "..") for part in parts):
+        return UNKNOWN
+
+    if not refname.startswith("refs/") or refname.startswith(PER_WORKTREE_PREFIXES):
+        return os.path.join(git_dir, *parts)
+    return os.path.join(common_dir, *parts)
+
+
+def resolve_ref(git_dir, common_dir, refname):
+    """
+    Return the object name `refname` (e.g. `HEAD` or `refs/heads/master`)
+    points to after following symbolic refs, `None` if it does not exist,
+    or `UNKNOWN`.
+    """
+    for _ in range(MAX_SYMREF_DEPTH):
+        path = _ref_path(git_dir, common_dir, refname)
+        if path is UNKNOWN:
+            return UNKNOWN
+
+        if os.path.isdir(path):
+            content = None
+        else:
+            content = _read_first_line(path)
+        if content is UNKNOWN:
+            return UNKNOWN
+
+        if content is None:
+            if not refname.startswith("refs/"):
+                return None
+            packed = _cached_by_stat(
+                _packed_refs_cache, os.path.join(common_dir, "packed-refs"), _parse_packed_refs)
+            if packed is UNKNOWN:
+                return UNKNOWN
+            return packed.get(refname)
+
+        if content.startswith("ref:"):
+            refname = content[len("ref:"):].strip()
+            continue
+        if HASH_RE.match(content):
+            return content
+        return UNKNOWN
+
+    return UNKNOWN
+
+
+def read_head(git_dir):
+    """
+    Return the ref name `HEAD` points to, e.g. `refs/heads/master`, or
+    `None` if it is detached.  Return `UNKNOWN` if `HEAD` can't be read.
+    """
+    content = _read_first_line(os.path.join(git_dir, "HEAD"))
+    if content is None or content is UNKNOWN:
+        return UNKNOWN
+    if content.startswith("ref:"):
+        return content[len("ref:"):].strip()
+    if HASH_RE.match(content):
+        return None
+    return UNKNOWN
+
+
+# Config
+
+_SECTION_RE = re.compile(r'^\[\s*([A-Za-z0-9.-]+)(?:\s+"((?:[^"\\]|\\.)*)")?\s*\]\s*(?:[#;].*)?$')
+_VARIABLE_RE = re.compile(r'^([A-Za-z][A-Za-z0-9-]*)\s*(?:=\s*(.*))?$')
+_ESCAPES = {"n": "\n", "t": "\t", "b": "\b", "\\": "\\", '"': '"'}
+
+
+def _parse_config_value(raw):
+    """
+    Unquote a config value and strip its comment, or return `UNKNOWN` for
+    continuation lines we don't bother to support.
+    """
+    value = []
+    # Trailing whitespace is dropped unless it is quoted or escaped.
+    kept = 0
+    quoted = False
+    chars = iter(raw)
+    for char in chars:
+        if char == '"':
+            quoted = not quoted
+        elif char == "\\":
+            escaped = _ESCAPES.get(next(chars, None))
+            if escaped is None:
+                return UNKNOWN
+            value.append(escaped)
+            kept = len(value)
+        elif char in "#;" and not quoted:
+            break
+        else:
+            value.append(char)
+            if quoted or not char.isspace():
+                kept = len(value)
+    if quoted:
+        return UNKNOWN
+    return "".join(value[:kept])
+
+
+def _parse_config(path):
+    """
+    Return a dict of `(section, subsection, key)` to a list of values for
+    the config file at `path`, `{}` if it does not exist or `UNKNOWN`.
+    """
+    if path is None:
+        return {}
+
+    config = {}
+    section = None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    except (OSError, UnicodeDecodeError):
+        return UNKNOWN
+
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith(("#", ";")):
+            continue
+
+        if line.startswith("["):
+            match = _SECTION_RE.match(line)
+            if not match:
+                return UNKNOWN
+            name, subsection = match.groups()
+            name = name.lower()
+            if name in ("include", "includeif") or name.startswith("includeif."):
+                return UNKNOWN
+            if subsection is None and "." in name:
+                # Deprecated `[section.subsection]` syntax.
+                name, subsection = name.split(".", 1)
+            elif subsection is not None:
+                subsection = re.sub(r"\\(.)", r"\1", subsection)
+            section = (name, subsection)
+            continue
+
+        match = _VARIABLE_RE.match(line)
+        if not match or section is None:
+            return UNKNOWN
+        key, raw = match.groups()
+        value = "true" if raw is None else _parse_config_value(raw)
+        if value is UNKNOWN:
+            return UNKNOWN
+        config.setdefault(section + (key.lower(), ), []).append(value)
+
+    return config
+
+
+def config_values(git_dir, common_dir, section, subsection, key):
+    """
+    Return all values of the repo config variable `section.subsection.key`
+    (with lower-case `section` and `key`, `subsection` may be `None`), or
+    `UNKNOWN`.  Values from the user and system config are not included.
+    """
+    values = []
+    for path in (os.path.join(common_dir, "config"), os.path.join(git_dir, "config.worktree")):
+        config = _cached_by_stat(_config_cache, path, _parse_config)
+        if config is UNKNOWN:
+            return UNKNOWN
+        values.extend(config.get((section, subsection, key), []))
+    return values
+
+
+def config_subsections(git_dir, common_dir, section, key):
+    """
+    Return a dict of subsections to all values of `section.<subsection>.key`
+    in the repo config, or `UNKNOWN`.
+    """
+    values = {}
+    for path in (os.path.join(common_dir, "config"), os.path.join(git_dir, "config.worktree")):
+        config = _cached_by_stat(_config_cache, path, _parse_config)
+        if config is UNKNOWN:
+            return UNKNOWN
+        for (section_, subsection, key_), values_ in config.items():
+            if section_ == section and key_ == key and subsection is not None:
+                values.setdefault(subsection, []).extend(values_)
+    return values
+
+
+def _map_through_refspecs(refspecs, refname):
+    """
+    Map `refname` on the remote side to the local remote-tracking ref using
+    the fetch `refspecs`, `None` if no refspec matches, or `UNKNOWN`.
+    """
+    for refspec in refspecs:
+        src, sep, dst = refspec.lstrip("+").partition(":")
+        if not sep or src.startswith("^"):
+            return UNKNOWN
+        if src == refname:
+            return dst
+        if src.count("*") == 1 and dst.count("*") == 1 and src.endswith("/*"):
+            prefix = src[:-1]
+            if refname.startswith(prefix) and dst.endswith("/*"):
+                return dst[:-1] + refname[len(prefix):]
+        elif "*" in src:
+            return UNKNOWN
+    return None
+
+
+def read_upstream(git_dir, common_dir):
+    """
+    Return the abbreviated name of the upstream of the active branch, like
+    `git rev-parse --abbrev-ref @{u}` does, `""` if there is none, or
+    `UNKNOWN`.
+    """
+    head = read_head(git_dir)
+    if head is UNKNOWN:
+        return UNKNOWN
+    if head is None or not head.startswith("refs/heads/"):
+        return ""
+    branch = head[len("refs/heads/"):]
+
+    remotes = config_values(git_dir, common_dir, "branch", branch, "remote")
+    merges = config_values(git_dir, common_dir, "branch", branch, "merge")
+    if remotes is UNKNOWN or merges is UNKNOWN:
+        return UNKNOWN
+    if not remotes or not merges:
+        return ""
+    remote, merge = remotes[-1], merges[-1]
+
+    if remote == ".":
+        tracking = merge
+    else:
+        refspecs = config_values(git_dir, common_dir, "remote", remote, "fetch")
+        if refspecs is UNKNOWN or not refspecs:
+            return UNKNOWN
+        tracking = _map_through_refspecs(refspecs, merge)
+        if not tracking:
+            return UNKNOWN
+
+    # Git refuses upstreams which don't exist locally, and abbreviates
+    # ambiguous names differently; let it handle these cases.
+    if resolve_ref(git_dir, common_dir, tracking) in (None, UNKNOWN):
+        return UNKNOWN
+    for prefix in ("refs/heads/", "refs/remotes/"):
+        if tracking.startswith(prefix):
+            short = tracking[len(prefix):]
+            break
+    else:
+        return UNKNOWN
+    for prefix in ("refs/heads/", "refs/tags/", "refs/remotes/", "refs/"):
+        candidate = prefix + short
+        if candidate != tracking and resolve_ref(git_dir, common_dir, candidate) is not None:
+            return UNKNOWN
+    return short
+
+
+# In-progress operations
+
+def rebase_dir(git_dir):
+    """
+    Return the directory holding the state of the rebase in progress, or
+    `None` if there is none.
+    """
+    for name in ("rebase-merge", "rebase-apply"):
+        path = os.path.join(git_dir, name)
+        if os.path.isdir(path):
+            return path
+    return None
+
+
+def read_state_file(git_dir, *path):
+    """
+    Return the stripped content of a state file below the git dir, e.g.
+    `read_state_file(git_dir, "rebase-merge", "onto")` or, with the
+    directory of `rebase_dir`, `read_state_file(rebase_dir, "onto")`.
+    Return `None` if it does not exist.
+    """
+    try:
+        with open(os.path.join(git_dir, *path), "r", encoding="utf-8") as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return None
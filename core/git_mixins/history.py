@@ -30,9 +30,12 @@ class HistoryMixin():
     def log(self, author=None, branch=None, file_path=None, start_end=None, cherry=None,
             limit=6000, skip=None, reverse=False, all_branches=False, msg_regexp=None,
             diff_regexp=None, first_parent=False, merges=False, no_merges=False, topo_order=False,
-            follow=False):
-
-        log_output = self.git(
+            follow=False, stream=False):
+        """
+        Return a list of LogEntry objects, or a generator yielding them as
+        git emits them if `stream` is set.
+        """
+        args = (
             "log",
             "--max-count={}".format(limit) if limit else None,
             "--skip={}".format(skip) if skip else None,
@@ -53,66 +56,62 @@ class HistoryMixin():
             branch if branch else None,
             "--" if file_path else None,
             file_path if file_path else None
-        ).strip("\x00")
+        )
 
-        entries = []
-        for entry in log_output.split("\x00\x00\n"):
+        if stream:
+            return self._parse_log_entries(self.git_stream(*args, separator="\x00\x00\n"))
+        return list(self._parse_log_entries(self.git(*args).strip("\x00").split("\x00\x00\n")))
+
+    @staticmethod
+    def _parse_log_entries(records):
+        for entry in records:
             entry = entry.strip()
             if not entry:
                 continue
             entry, raw_body = entry.split("\x00")
 
             short_hash, long_hash, ref, summary, author, email, datetime = entry.split("\n")
-            entries.append(LogEntry(short_hash, long_hash, ref, summary, raw_body, author, email, datetime))
-
-        return entries
-
-    def log_generator(self, limit=6000, **kwargs):
-        # Generator for show_log_panel
-        skip = 0
-        while True:
-            logs = self.log(limit=limit, skip=skip, **kwargs)
-            if not logs:
-                break
-            for l in logs:
-                yield l
-            if len(logs) < limit:
-                break
-            skip = skip + limit
-
-    def reflog(self, limit=6000, skip=None, all_branches=False):
-        log_output = self.git(
+            yield LogEntry(short_hash, long_hash, ref, summary, raw_body, author, email, datetime)
+
+    def log_generator(self, **kwargs):
+        # Generator for show_log_panel.  A single `git log` is streamed so the
+        # first page shows up long before git walked the full history.
+        return self.log(limit=None, stream=True, **kwargs)
+
+    def reflog(self, limit=6000, skip=None, all_branches=False, stream=False):
+        """
+        Return a list of RefLogEntry objects, or a generator yielding them
+        as git emits them if `stream` is set.
+        """
+        args = (
             "reflog",
-            "-{}".format(self._limit),
+            "-{}".format(limit) if limit else None,
             "--skip={}".format(skip) if skip else None,
             '--format=%h%n%H%n%s%n%gs%n%gd%n%an%n%at%x00%x00%n',
             "--all" if all_branches else None,
-        ).strip("\x00")
+        )
 
-        entries = []
-        for entry in log_output.split("\x00\x00\n"):
-            entry = entry.strip()
+        if stream:
+            return self._parse_reflog_entries(self.git_stream(*args, separator="\x00\x00\n"))
+        return list(self._parse_reflog_entries(self.git(*args).strip("\x00").split("\x00\x00\n")))
+
+    @staticmethod
+    def _parse_reflog_entries(records):
+        for entry in records:
+            entry = entry.strip("\x00").strip()
             if not entry:
                 continue
             short_hash, long_hash, summary, reflog_name, reflog_selector, author, datetime = \
                 entry.split("\n")
-            entries.append(RefLogEntry(
-                short_hash, long_hash, summary, reflog_name, reflog_selector, author, datetime))
-
-        return entries
-
-    def reflog_generator(self, limit=6000, skip=None):
-        skip = 0
-        while True:
-            logs = self.reflog(limit=limit, skip=skip)
-            if not logs:
-                break
-            for l in logs:
-                yield (["{} {}".format(l.reflog_selector, l.reflog_name),
-                        "{} {}".format(l.short_hash, l.summary),
-                        "{}, {}".format(l.author, util.dates.fuzzy(l.datetime))],
-                       l.long_hash)
-            skip = skip + limit
+            yield RefLogEntry(
+                short_hash, long_hash, summary, reflog_name, reflog_selector, author, datetime)
+
+    def reflog_generator(self, limit=None, skip=None):
+        for l in self.reflog(limit=limit, skip=skip, stream=True):
+            yield (["{} {}".format(l.reflog_selector, l.reflog_name),
+                    "{} {}".format(l.short_hash, l.summary),
+                    "{}, {}".format(l.author, util.dates.fuzzy(l.datetime))],
+                   l.long_hash)
 
     def log1(self, commit_hash):
         """
@@ -173,7 +172,7 @@ class HistoryMixin():
         filename = self.get_rel_path(filename)
         filename = filename.replace('\\', '/')
         filename = self.filename_at_commit(filename, commit_hash)
-        return self.git("show", commit_hash + ':' + filename)
+        return self.show_blob(commit_hash + ':' + filename)
 
     def find_matching_lineno(self, base_commit, target_commit, line, file_path=None):
         """
@@ -249,6 +248,10 @@ class HistoryMixin():
         in the index (if the file is staged) or in the HEAD (if it is not
         staged).
         """
+        entries = self.index_entries(file_path)
+        if entries:
+            return entries[0].oid
+
         stdout = self.git("ls-files", "-s", file_path)
 
         # 100644 c9d70aa928a3670bc2b879b4a596f10d3e81ba7c 0   SomeFile.py
@@ -287,7 +290,7 @@ class HistoryMixin():
         Given the object hash to a versioned object in the current git repo,
         display the contents of that object.
         """
-        return self.git("show", "--no-color", object_hash)
+        return self.show_blob(object_hash)
 
     def get_object_from_string(self, string):
         """
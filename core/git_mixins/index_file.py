@@ -0,0 +1,273 @@
+"""
+Read the index (`.git/index`) without spawning git.
+
+Versions 2 to 4 of the index format are supported.  On load we only walk
+the entries once to note where each of them starts (and, for the
+path-compressed version 4, to reconstruct the paths); entries are decoded
+when asked for.  Entries are sorted by path, so looking one up is a
+binary search.  Parsed indexes are cached until the index file changes.
+
+Split indexes, sparse indexes and other extensions git requires readers to
+understand make `read_index` return `UNKNOWN`, as does anything else we
+can't make sense of; the caller should ask git instead.
+
+See `Documentation/gitformat-index.txt` in git's sources for the format.
+"""
+
+from array import array
+from binascii import hexlify
+from collections import namedtuple
+import mmap
+import os
+import struct
+import threading
+
+from . import git_dir
+from .git_dir import UNKNOWN
+
+
+IndexEntry = namedtuple("IndexEntry", (
+    "path",
+    "mode",
+    "oid",
+    "stage",
+    "assume_unchanged",
+    "skip_worktree",
+    "intent_to_add",
+))
+
+
+HEADER = struct.Struct(">4sLL")
+# ctime, mtime (seconds and nanoseconds), dev, ino, mode, uid, gid, size
+STAT_DATA_SIZE = 40
+MODE_OFFSET = 24
+
+FLAG_ASSUME_VALID = 0x8000
+FLAG_EXTENDED = 0x4000
+FLAG_STAGE_MASK = 0x3000
+FLAG_STAGE_SHIFT = 12
+FLAG_NAME_MASK = 0x0FFF
+EXTENDED_FLAG_SKIP_WORKTREE = 0x4000
+EXTENDED_FLAG_INTENT_TO_ADD = 0x2000
+
+
+if '_indexes' not in globals():
+    _indexes = {}
+    _indexes_lock = threading.Lock()
+
+
+class IndexFormatError(Exception):
+    pass
+
+
+def _read_varint(data, offset):
+    """
+    Decode the offset encoding git uses for the prefix lengths in version 4.
+    Return the value and the offset just after it.
+    """
+    byte = data[offset]
+    offset += 1
+    value = byte & 0x7F
+    while byte & 0x80:
+        byte = data[offset]
+        offset += 1
+        value = ((value + 1) << 7) | (byte & 0x7F)
+    return value, offset
+
+
+class Index:
+    """
+    A parsed index file.  Paths are `bytes` relative to the repo root with
+    `/` as separator, exactly as stored by git.
+    """
+
+    def __init__(self, data, hash_size):
+        self._data = data
+        self._hash_size = hash_size
+
+        signature, self.version, count = HEADER.unpack_from(data, 0)
+        if signature != b"DIRC" or self.version not in (2, 3, 4):
+            raise IndexFormatError("unsupported index signature or version")
+
+        self._offsets = array("Q")
+        self._names = [] if self.version == 4 else None
+        end = self._scan_entries(count)
+        self.tree_oid = self._read_extensions(end)
+
+    def _scan_entries(self, count):
+        data, hash_size, version = self._data, self._hash_size, self.version
+        flags_offset = STAT_DATA_SIZE + hash_size
+        offset = HEADER.size
+        name = b""
+
+        for _ in range(count):
+            self._offsets.append(offset)
+            flags = int.from_bytes(data[offset + flags_offset:offset + flags_offset + 2], "big")
+            name_start = offset + flags_offset + 2
+            if flags & FLAG_EXTENDED:
+                if version < 3:
+                    raise IndexFormatError("extended flags in a version 2 index")
+                name_start += 2
+
+            if version == 4:
+                strip, suffix_start = _read_varint(data, name_start)
+                suffix_end = data.find(b"\0", suffix_start)
+                if suffix_end < 0 or strip > len(name):
+                    raise IndexFormatError("malformed path")
+                name = name[:len(name) - strip] + data[suffix_start:suffix_end]
+                self._names.append(name)
+                offset = suffix_end + 1
+                continue
+
+            name_length = flags & FLAG_NAME_MASK
+            if name_length == FLAG_NAME_MASK:
+                name_length = data.find(b"\0", name_start + name_length) - name_start
+                if name_length < 0:
+                    raise IndexFormatError("malformed path")
+            # Entries are NUL padded to a multiple of eight bytes.
+            offset += (name_start - offset + name_length + 8) & ~7
+
+        return offset
+
+    def _read_extensions(self, offset):
+        """
+        Check the extensions following the entries and return the object
+        name of the root tree of the cached tree extension, or `None` if
+        it's missing or invalid.
+        """
+        data = self._data
+        tree_oid = None
+        end = len(data) - self._hash_size
+        while offset + 8 <= end:
+            signature = bytes(data[offset:offset + 4])
+            size = int.from_bytes(data[offset + 4:offset + 8], "big")
+            offset += 8
+            if signature[:1].islower():
+                # Extensions starting with a lower case letter must be
+                # understood, e.g. `link` (split index) or `sdir` (sparse).
+                raise IndexFormatError("unsupported extension {!r}".format(signature))
+            if signature == b"TREE":
+                tree_oid = self._read_root_tree(offset)
+            offset += size
+        return tree_oid
+
+    def _read_root_tree(self, offset):
+        data = self._data
+        # The root entry has an empty path, so it starts with its NUL.
+        if data[offset] != 0:
+            return None
+        line_end = data.find(b"\n", offset)
+        if line_end < 0:
+            return None
+        entry_count, _ = bytes(data[offset + 1:line_end]).split(b" ")
+        if int(entry_count) < 0:
+            return None
+        return hexlify(data[line_end + 1:line_end + 1 + self._hash_size]).decode("ascii")
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def _name(self, i):
+        if self._names is not None:
+            return self._names[i]
+
+        offset = self._offsets[i]
+        flags_offset = offset + STAT_DATA_SIZE + self._hash_size
+        flags = int.from_bytes(self._data[flags_offset:flags_offset + 2], "big")
+        name_start = flags_offset + (4 if flags & FLAG_EXTENDED else 2)
+        return bytes(self._data[name_start:self._data.find(b"\0", name_start)])
+
+    def entry(self, i):
+        """
+        Decode and return the `i`th entry.
+        """
+        data, offset = self._data, self._offsets[i]
+        oid_offset = offset + STAT_DATA_SIZE
+        flags_offset = oid_offset + self._hash_size
+        mode = int.from_bytes(data[offset + MODE_OFFSET:offset + MODE_OFFSET + 4], "big")
+        flags = int.from_bytes(data[flags_offset:flags_offset + 2], "big")
+        extended_flags = 0
+        if flags & FLAG_EXTENDED:
+            extended_flags = int.from_bytes(data[flags_offset + 2:flags_offset + 4], "big")
+
+        return IndexEntry(
+            self._name(i),
+            mode,
+            hexlify(data[oid_offset:flags_offset]).decode("ascii"),
+            (flags & FLAG_STAGE_MASK) >> FLAG_STAGE_SHIFT,
+            bool(flags & FLAG_ASSUME_VALID),
+            bool(extended_flags & EXTENDED_FLAG_SKIP_WORKTREE),
+            bool(extended_flags & EXTENDED_FLAG_INTENT_TO_ADD),
+        )
+
+    def entries(self):
+        for i in range(len(self)):
+            yield self.entry(i)
+
+    def lookup(self, path):
+        """
+        Return the entries for `path` (all stages, in order), or an empty
+        list if it isn't in the index.
+        """
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._name(mid) < path:
+                lo = mid + 1
+            else:
+                hi = mid
+
+        found = []
+        while lo < len(self) and self._name(lo) == path:
+            found.append(self.entry(lo))
+            lo += 1
+        return found
+
+
+def _map(path):
+    with open(path, "rb") as f:
+        if os.name == "nt":
+            # A mapped file can't be replaced on Windows, which is how git
+            # writes the index.
+            return f.read()
+        try:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            return b""
+
+
+def read_index(repo_path, env=None):
+    """
+    Return the parsed `Index` of the repo at `repo_path`, or `UNKNOWN`.
+    """
+    if "GIT_INDEX_FILE" in os.environ or (env and "GIT_INDEX_FILE" in env):
+        return UNKNOWN
+
+    dirs = git_dir.git_dirs(repo_path)
+    if dirs is UNKNOWN:
+        return UNKNOWN
+    path = os.path.join(dirs[0], "index")
+
+    try:
+        st = os.stat(path)
+    except OSError:
+        return UNKNOWN
+    signature = (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    cached = _indexes.get(path)
+    if cached and cached[0] == signature:
+        return cached[1]
+
+    object_format = git_dir.config_values(dirs[0], dirs[1], "extensions", None, "objectformat")
+    if object_format is UNKNOWN:
+        return UNKNOWN
+    hash_size = 32 if object_format and object_format[-1].lower() == "sha256" else 20
+
+    try:
+        index = Index(_map(path), hash_size)
+    except (OSError, ValueError, IndexError, struct.error, IndexFormatError):
+        index = UNKNOWN
+
+    with _indexes_lock:
+        _indexes[path] = (signature, index)
+    return index
@@ -1,9 +1,12 @@
 import re
 from collections import OrderedDict
 
+from .. import repo_state
+
 
 class RemotesMixin():
 
+    @repo_state.cached(depends_on=("config",))
     def get_remotes(self):
         """
         Get a list of remotes, provided as tuples of remote name and remote
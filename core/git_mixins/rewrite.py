@@ -2,6 +2,8 @@ import os
 import shutil
 from types import SimpleNamespace
 
+from . import git_dir
+
 
 class RewriteTemplate(SimpleNamespace):
     # orig_hash
@@ -182,19 +184,19 @@ class RewriteMixin():
         """
         A directory to store meta data for `rewrite_active_branch`
         """
-        return os.path.join(self.repo_path, ".git", "rebase-replay")
+        return os.path.join(self.git_dir, "rebase-replay")
 
     @property
     def _rebase_apply_dir(self):
-        return os.path.join(self.repo_path, ".git", "rebase-apply")
+        return os.path.join(self.git_dir, "rebase-apply")
 
     @property
     def _rebase_merge_dir(self):
-        return os.path.join(self.repo_path, ".git", "rebase-merge")
+        return os.path.join(self.git_dir, "rebase-merge")
 
     @property
     def _rebase_dir(self):
-        return self._rebase_merge_dir if self.in_rebase_merge() else self._rebase_apply_dir
+        return git_dir.rebase_dir(self.git_dir) or self._rebase_apply_dir
 
     def in_rebase_merge(self):
         return os.path.isdir(self._rebase_merge_dir)
@@ -206,27 +208,19 @@ class RewriteMixin():
         return self.in_rebase_apply() or self.in_rebase_merge()
 
     def rebase_orig_head(self):
-        path = os.path.join(self._rebase_dir, "orig-head")
-        with open(path, "r") as f:
-            return f.read().strip()
+        return git_dir.read_state_file(self._rebase_dir, "orig-head")
 
     def rebase_conflict_at(self):
         if self.in_rebase_merge():
-            path = os.path.join(self._rebase_merge_dir, "current-commit")
-        else:
-            path = os.path.join(self._rebase_apply_dir, "original-commit")
-        with open(path, "r") as f:
-            return f.read().strip()
+            return git_dir.read_state_file(self._rebase_merge_dir, "current-commit")
+        return git_dir.read_state_file(self._rebase_apply_dir, "original-commit")
 
     def rebase_branch_name(self):
-        path = os.path.join(self._rebase_dir, "head-name")
-        with open(path, "r") as f:
-            return f.read().strip().replace("refs/heads/", "")
+        head_name = git_dir.read_state_file(self._rebase_dir, "head-name") or ""
+        return head_name.replace("refs/heads/", "")
 
     def rebase_onto_commit(self):
-        path = os.path.join(self._rebase_dir, "onto")
-        with open(path, "r") as f:
-            return f.read().strip()
+        return git_dir.read_state_file(self._rebase_dir, "onto")
 
     def rebase_rewritten(self):
         if self.in_rebase_merge():
@@ -1,3 +1,32 @@
+import os
+
+
+# Upper bound for the summed length of the paths passed to a single git
+# invocation.  Windows limits the whole command line to 32767 characters,
+# elsewhere we stay well below the usual `ARG_MAX` including the environment.
+MAX_PATHS_LENGTH = 30000 if os.name == "nt" else 120000
+
+
+def chunk_paths(fpaths, max_length=None):
+    """
+    Split `fpaths` into lists short enough to be passed to git at once,
+    i.e. whose paths (plus a separator each) sum up to at most
+    `max_length` (default `MAX_PATHS_LENGTH`) characters.  A longer path
+    gets a list of its own.
+    """
+    if max_length is None:
+        max_length = MAX_PATHS_LENGTH
+    chunk, length = [], 0
+    for fpath in fpaths:
+        if chunk and length + len(fpath) + 1 > max_length:
+            yield chunk
+            chunk, length = [], 0
+        chunk.append(fpath)
+        length += len(fpath) + 1
+    if chunk:
+        yield chunk
+
+
 class StageUnstageMixin():
 
     def stage_file(self, fpath, force=True):
@@ -5,20 +34,36 @@ class StageUnstageMixin():
         Given an absolute path or path relative to the repo's root, stage
         the file.
         """
-        self.git(
-            "add",
-            "-f" if force else None,
-            "--all",
-            "--",
-            fpath
-        )
+        self.stage_files([fpath], force=force)
+
+    def stage_files(self, fpaths, force=True):
+        """
+        Given a list of absolute paths or paths relative to the repo's root,
+        stage the files with as few `git add` invocations as possible.
+        """
+        for chunk in chunk_paths(fpaths):
+            self.git(
+                "add",
+                "-f" if force else None,
+                "--all",
+                "--",
+                *chunk
+            )
 
     def unstage_file(self, fpath):
         """
         Given an absolute path or path relative to the repo's root, unstage
         the file.
         """
-        self.git("reset", "HEAD", fpath)
+        self.unstage_files([fpath])
+
+    def unstage_files(self, fpaths):
+        """
+        Given a list of absolute paths or paths relative to the repo's root,
+        unstage the files with as few `git reset` invocations as possible.
+        """
+        for chunk in chunk_paths(fpaths):
+            self.git("reset", "HEAD", "--", *chunk)
 
     def add_all_tracked_files(self):
         """
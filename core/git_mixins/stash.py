@@ -1,11 +1,14 @@
 import re
 from collections import namedtuple
 
+from .. import repo_state
+
 Stash = namedtuple("Stash", ("id", "description"))
 
 
 class StashMixin():
 
+    @repo_state.cached(depends_on=("refs",))
     def get_stashes(self):
         """
         Return a list of stashes in the repo.
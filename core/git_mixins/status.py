@@ -1,8 +1,7 @@
 import os
 from collections import namedtuple
 from ..constants import MERGE_CONFLICT_PORCELAIN_STATUSES
-
-FileStatus = namedtuple("FileStatus", ("path", "path_alt", "index_status", "working_status"))
+from . import git_dir
 
 IndexedEntry = namedtuple("IndexEntry", (
     "src_path",
@@ -17,26 +16,294 @@ IndexedEntry = namedtuple("IndexEntry", (
 IndexedEntry.__new__.__defaults__ = (None, ) * 8
 
 
-class StatusMixin():
+STATUS_SECTIONS = ("staged", "unstaged", "untracked", "conflicts")
+
+DEFAULT_STATUS_STRATEGY = {
+    "untracked_files": "normal",
+    "ignore_submodules": "",
+    "refresh_index": "auto",
+    "status_bar": "full",
+}
+
+SectionDelta = namedtuple("SectionDelta", ("added", "removed", "changed"))
+
+
+class FileStatus():
+
+    """
+    A file record of `git status --porcelain=v2`.
+
+    `index_status` and `working_status` keep the porcelain v1 letters: an
+    unmodified index side is " ", an unmodified worktree side is `None`,
+    untracked files are "?" on both sides.  `modes` and `oids` are the
+    (HEAD, index, worktree) modes and (HEAD, index) object ids, or for
+    unmerged entries the modes and ids of stages 1 to 3 (plus the worktree
+    mode).  `score` is the similarity of a rename or copy as an `int`.
+    """
+
+    __slots__ = (
+        "path", "path_alt", "index_status", "working_status",
+        "submodule", "modes", "oids", "score"
+    )
+
+    def __init__(self, path, path_alt, index_status, working_status,
+                 submodule=None, modes=(), oids=(), score=None):
+        self.path = path
+        self.path_alt = path_alt
+        self.index_status = index_status
+        self.working_status = working_status
+        self.submodule = submodule
+        self.modes = modes
+        self.oids = oids
+        self.score = score
+
+    def _astuple(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if not isinstance(other, FileStatus):
+            return NotImplemented
+        return self._astuple() == other._astuple()
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    def __hash__(self):
+        return hash(self._astuple())
+
+    def __repr__(self):
+        return "FileStatus({})".format(", ".join(
+            "{}={!r}".format(name, getattr(self, name)) for name in self.__slots__
+        ))
+
+
+class StatusSnapshot():
 
-    def _get_status(self):
-        return self.git("status", "--porcelain", "-z", "-b",
-                        custom_environ={"GIT_OPTIONAL_LOCKS": "0"}).rstrip("\x00").split("\x00")
+    """
+    The parsed output of one `git status --porcelain=v2 -z --branch` call.
 
-    def _parse_status_for_file_statuses(self, lines):
-        porcelain_entries = lines[1:].__iter__()
-        entries = []
+    `entries` holds the `FileStatus` records in git's order, `sections`
+    maps each of `STATUS_SECTIONS` to its records.  `branch_oid` is `None`
+    before the initial commit, `branch_head` is `None` for a detached HEAD,
+    `ahead` and `behind` are `None` without upstream or if it is gone.
+    """
 
-        for entry in porcelain_entries:
-            if not entry:
+    __slots__ = (
+        "branch_oid", "branch_head", "upstream", "ahead", "behind",
+        "entries", "sections", "_records"
+    )
+
+    def __init__(self):
+        self.branch_oid = None
+        self.branch_head = None
+        self.upstream = None
+        self.ahead = None
+        self.behind = None
+        self.entries = []
+        self.sections = {}
+        self._records = {}
+
+
+def _side(letter, unmodified):
+    return unmodified if letter == "." else letter
+
+
+def _parse_record(record, orig_path):
+    kind = record[0]
+    if kind == "1":
+        _, xy, sub, m_head, m_index, m_work, h_head, h_index, path = record.split(" ", 8)
+        return FileStatus(
+            path, None, _side(xy[0], " "), _side(xy[1], None),
+            sub if sub != "N..." else None,
+            (m_head, m_index, m_work), (h_head, h_index)
+        )
+    if kind == "2":
+        (_, xy, sub, m_head, m_index, m_work, h_head, h_index,
+         score, path) = record.split(" ", 9)
+        return FileStatus(
+            path, orig_path, _side(xy[0], " "), _side(xy[1], None),
+            sub if sub != "N..." else None,
+            (m_head, m_index, m_work), (h_head, h_index), int(score[1:])
+        )
+    if kind == "u":
+        (_, xy, sub, m_1, m_2, m_3, m_work, h_1, h_2, h_3,
+         path) = record.split(" ", 10)
+        return FileStatus(
+            path, None, xy[0], xy[1],
+            sub if sub != "N..." else None,
+            (m_1, m_2, m_3, m_work), (h_1, h_2, h_3)
+        )
+    if kind == "?":
+        return FileStatus(record[2:], None, "?", "?")
+    # "!" (ignored), which we never ask for, and anything git adds later.
+    return None
+
+
+def parse_status_v2(stdout, previous=None):
+    """
+    Parse the output of `git status --porcelain=v2 -z --branch` into a
+    `StatusSnapshot`.
+
+    If a `previous` snapshot is given, records whose raw text did not
+    change are taken over from it instead of being parsed again, and so
+    are whole section lists if they compare equal.  Unchanged sections
+    are then identical (`is`) to the ones of `previous`.
+    """
+    snapshot = StatusSnapshot()
+    known = previous._records if previous else {}
+    records = snapshot._records
+    entries = snapshot.entries
+
+    fields = iter(stdout.split("\x00"))
+    for field in fields:
+        if not field:
+            continue
+
+        if field[0] == "#":
+            key, _, value = field[2:].partition(" ")
+            if key == "branch.oid":
+                snapshot.branch_oid = None if value == "(initial)" else value
+            elif key == "branch.head":
+                snapshot.branch_head = None if value == "(detached)" else value
+            elif key == "branch.upstream":
+                snapshot.upstream = value
+            elif key == "branch.ab":
+                ahead, behind = value.split(" ")
+                snapshot.ahead, snapshot.behind = int(ahead), -int(behind)
+            continue
+
+        orig_path = None
+        raw = field
+        if field[0] == "2":
+            orig_path = next(fields, "")
+            raw = field + "\x00" + orig_path
+
+        entry = known.get(raw)
+        if entry is None:
+            entry = _parse_record(field, orig_path)
+            if entry is None:
                 continue
-            index_status = entry[0]
-            working_status = entry[1].strip() or None
-            path = entry[3:]
-            path_alt = porcelain_entries.__next__() if index_status in ["R", "C"] else None
-            entries.append(FileStatus(path, path_alt, index_status, working_status))
+        records[raw] = entry
+        entries.append(entry)
+
+    sections = snapshot.sections
+    for name, section in zip(STATUS_SECTIONS, sort_status_entries(entries)):
+        if previous and previous.sections.get(name) == section:
+            section = previous.sections[name]
+        sections[name] = section
 
-        return entries
+    return snapshot
+
+
+def diff_status_snapshots(previous, current):
+    """
+    Return a dict mapping the name of each section that differs between the
+    two snapshots to a `SectionDelta` of the added, removed and changed
+    records, keyed by path.  `previous` may be `None`.
+    """
+    deltas = {}
+    for name in STATUS_SECTIONS:
+        new = current.sections[name]
+        old = previous.sections[name] if previous else []
+        if old is new:
+            continue
+
+        old_by_path = {entry.path: entry for entry in old}
+        new_by_path = {entry.path: entry for entry in new}
+        added = [entry for path, entry in new_by_path.items() if path not in old_by_path]
+        removed = [entry for path, entry in old_by_path.items() if path not in new_by_path]
+        changed = [
+            entry for path, entry in new_by_path.items()
+            if path in old_by_path and old_by_path[path] != entry
+        ]
+        if added or removed or changed:
+            deltas[name] = SectionDelta(added, removed, changed)
+
+    return deltas
+
+
+def sort_status_entries(file_status_list):
+    """
+    Take entries from `git status` and sort them into groups.
+    """
+    staged, unstaged, untracked, conflicts = [], [], [], []
+
+    for f in file_status_list:
+        if (f.index_status, f.working_status) in MERGE_CONFLICT_PORCELAIN_STATUSES:
+            conflicts.append(f)
+            continue
+        if f.index_status == "?":
+            untracked.append(f)
+            continue
+        elif f.working_status in ("M", "D", "T"):
+            unstaged.append(f)
+        if f.index_status != " ":
+            staged.append(f)
+
+    return staged, unstaged, untracked, conflicts
+
+
+class StatusMixin():
+
+    def get_status_strategy(self):
+        """
+        Return the `status_strategy` setting, completed with the defaults and
+        overridden by the entry for this repository in `repo_status_strategies`.
+        """
+        strategy = dict(DEFAULT_STATUS_STRATEGY)
+        strategy.update(self.savvy_settings.get("status_strategy") or {})
+
+        per_repo = self.savvy_settings.get("repo_status_strategies")
+        if per_repo:
+            repo_path = os.path.normcase(os.path.realpath(self.repo_path))
+            for path, overrides in per_repo.items():
+                if os.path.normcase(os.path.realpath(os.path.expanduser(path))) == repo_path:
+                    strategy.update(overrides)
+
+        return strategy
+
+    def index_locked(self):
+        """
+        Return whether another git process holds the lock of the index.
+        """
+        dirs = git_dir.git_dirs(self.repo_path)
+        if dirs is git_dir.UNKNOWN:
+            return False
+        return os.path.exists(os.path.join(dirs[0], "index.lock"))
+
+    def _status_args(self, strategy):
+        args = ["--untracked-files={}".format(strategy["untracked_files"])]
+        if strategy["ignore_submodules"]:
+            args.append("--ignore-submodules={}".format(strategy["ignore_submodules"]))
+        return args
+
+    def _status_environ(self, strategy):
+        # Like plain `git status`, we let it refresh the index, which keeps
+        # its stat data, the untracked cache and the fsmonitor token up to
+        # date, unless told not to or another git process is at work.
+        refresh_index = strategy["refresh_index"]
+        if refresh_index == "auto":
+            refresh_index = not self.index_locked()
+        return None if refresh_index else {"GIT_OPTIONAL_LOCKS": "0"}
+
+    def _get_status(self, strategy=None):
+        strategy = strategy or self.get_status_strategy()
+        return self.git("status", "--porcelain", "-z", "-b", *self._status_args(strategy),
+                        custom_environ=self._status_environ(strategy)).rstrip("\x00").split("\x00")
+
+    def get_status_snapshot(self, previous=None):
+        """
+        Return a `StatusSnapshot` of the working tree.  Pass the last snapshot
+        as `previous` to reuse its unchanged records and sections, see
+        `parse_status_v2`.
+        """
+        strategy = self.get_status_strategy()
+        stdout = self.git("status", "--porcelain=v2", "-z", "--branch", *self._status_args(strategy),
+                          custom_environ=self._status_environ(strategy))
+        return parse_status_v2(stdout, previous)
 
     def get_status(self):
         """
@@ -45,9 +312,7 @@ class StatusMixin():
         5) renamed, or 6) copied as well as additional status information that can
         occur mid-merge.
         """
-
-        lines = self._get_status()
-        return self._parse_status_for_file_statuses(lines)
+        return self.get_status_snapshot().entries
 
     def _get_indexed_entry(self, raw_entry):
         """
@@ -89,6 +354,13 @@ class StatusMixin():
         Return a list of `IndexEntry`s.  Each entry in the list corresponds
         to a file that 1) is in HEAD, and 2) is staged with changes.
         """
+        # If the index still records the tree of HEAD, nothing is staged.
+        index = self.read_index()
+        if index and index.tree_oid:
+            head_tree = self.get_object_info("HEAD^{tree}")
+            if head_tree and head_tree.oid == index.tree_oid:
+                return []
+
         # Return an entry for each file with a difference between HEAD and its
         # counterpart in the current index.  Entries will be separated by `:` and
         # each field will be separated by NUL charachters.
@@ -104,27 +376,13 @@ class StatusMixin():
         """
         Take entries from `git status` and sort them into groups.
         """
-        staged, unstaged, untracked, conflicts = [], [], [], []
-
-        for f in file_status_list:
-            if (f.index_status, f.working_status) in MERGE_CONFLICT_PORCELAIN_STATUSES:
-                conflicts.append(f)
-                continue
-            if f.index_status == "?":
-                untracked.append(f)
-                continue
-            elif f.working_status in ("M", "D", "T"):
-                unstaged.append(f)
-            if f.index_status != " ":
-                staged.append(f)
-
-        return staged, unstaged, untracked, conflicts
+        return sort_status_entries(file_status_list)
 
     def in_merge(self):
-        return os.path.exists(os.path.join(self.repo_path, ".git", "MERGE_HEAD"))
+        return os.path.exists(os.path.join(self.git_dir, "MERGE_HEAD"))
 
     def merge_head(self):
-        path = os.path.join(self.repo_path, ".git", "MERGE_HEAD")
+        path = os.path.join(self.git_dir, "MERGE_HEAD")
         with open(path, "r") as f:
             commit_hash = f.read().strip()
         return self.get_short_hash(commit_hash)
@@ -1,10 +1,37 @@
 import re
 from collections import namedtuple
-from distutils.version import LooseVersion
+
+from .. import repo_state
 
 
 TagDetails = namedtuple("TagDetails", ("sha", "tag"))
 
+VERSION_SORT = "-v:refname"
+
+# `git ls-remote --sort` is available since git 2.18.
+LS_REMOTE_SORT_VERSION = (2, 18, 0)
+
+DIGITS = re.compile(r"(\d+)")
+
+
+def _version_parts(text):
+    # Strings and numbers alternate, starting with a (maybe empty) string,
+    # so two such tuples never compare a string to a number.
+    return tuple(int(part) if idx % 2 else part for idx, part in enumerate(DIGITS.split(text)))
+
+
+def version_sort_key(tag, suffixes=()):
+    """
+    Return a key which sorts `tag` like git's `version:refname` does.
+    Runs of digits compare as numbers, and a tag containing one of the
+    `versionsort.suffix` `suffixes`, e.g. `1.0-rc1`, sorts before `1.0`.
+    """
+    for idx, suffix in enumerate(suffixes):
+        start = tag.find(suffix)
+        if start > 0:
+            return (_version_parts(tag[:start]), 0, idx, _version_parts(tag[start + len(suffix):]), tag)
+    return (_version_parts(tag), 1, tag)
+
 
 class TagsMixin():
 
@@ -12,22 +39,76 @@ class TagsMixin():
         """
         Return a list of TagDetails object. These objects correspond
         to all tags found in the repository, containing abbreviated
-        hashes and reference names.
+        hashes and reference names.  Annotated tags are peeled, i.e.
+        the hash is the one of the tagged commit.
+
+        Tags are sorted by version, the highest first, or the lowest
+        first if `reverse` is set.
         """
+        if remote:
+            entries = self._get_remote_tags(remote)
+        else:
+            entries = self._get_local_tags()
+        return entries[::-1] if reverse else entries
+
+    @repo_state.cached(depends_on=("refs", "config"))
+    def _get_local_tags(self):
         stdout = self.git(
-            "ls-remote" if remote else "show-ref",
+            "for-each-ref",
+            "--format=%(objectname:short)%00%(*objectname:short)%00%(refname:strip=2)",
+            "--sort=" + VERSION_SORT,
+            "refs/tags",
+            throw_on_stderr=False
+        )
+        entries = []
+        for line in stdout.splitlines():
+            sha, peeled_sha, tag = line.split("\x00", 2)
+            entries.append(TagDetails(peeled_sha or sha, tag))
+        return entries
+
+    def _get_remote_tags(self, remote):
+        git_sorts = (self.git_version or (0, )) >= LS_REMOTE_SORT_VERSION
+        stdout = self.git(
+            "ls-remote",
+            "--sort=" + VERSION_SORT if git_sorts else None,
             "--tags",
-            remote if remote else None,
+            remote,
             throw_on_stderr=False
         )
-        porcelain_entries = stdout.split("\n")
-        if reverse:
-            porcelain_entries.reverse()
+        tags, peeled_shas = [], {}
+        for line in stdout.splitlines():
+            sha, _, ref = line.partition("\t")
+            if not ref.startswith("refs/tags/"):
+                continue
+            tag = ref[len("refs/tags/"):]
+            if tag.endswith("^{}"):
+                peeled_shas[tag[:-3]] = sha
+            else:
+                tags.append((tag, sha))
 
-        entries = [TagDetails(entry[:40], entry[51:]) for entry in iter(porcelain_entries) if entry]
-        entries = self.handle_semver_tags(entries)
+        if not git_sorts:
+            suffixes = self.get_version_sort_suffixes()
+            tags.sort(key=lambda entry: version_sort_key(entry[0], suffixes), reverse=True)
 
-        return entries
+        # Abbreviate all hashes to the length git picks for this repo,
+        # which we ask for just once instead of once per tag.
+        abbrev_length = len(self.get_short_hash(tags[0][1])) if tags else 0
+        return [
+            TagDetails(peeled_shas.get(tag, sha)[:abbrev_length], tag)
+            for tag, sha in tags
+        ]
+
+    def get_version_sort_suffixes(self):
+        """
+        Return the configured `versionsort.suffix` values, which are used
+        to sort tags the way git does when it can't sort them itself.
+        """
+        return tuple(
+            suffix
+            for key in ("versionsort.suffix", "versionsort.prereleaseSuffix")
+            for suffix in self.git("config", "--get-all", key, throw_on_stderr=False).splitlines()
+            if suffix
+        )
 
     def get_last_local_tag(self):
         """
@@ -36,30 +117,3 @@ class TagsMixin():
 
         tag = self.git("describe", "--tags", "--abbrev=0", throw_on_stderr=False).strip()
         return tag
-
-    def handle_semver_tags(self, entries):
-        """
-        Sorts tags using LooseVersion if there's a tag matching the semver format.
-        """
-
-        semver_test = re.compile(r'\d+\.\d+\.?\d*')
-
-        semver_entries, regular_entries = [], []
-        for entry in entries:
-            if semver_test.search(entry.tag):
-                semver_entries.append(entry)
-            else:
-                regular_entries.append(entry)
-        if len(semver_entries):
-            try:
-                semver_entries = sorted(semver_entries, key=lambda entry: LooseVersion(entry.tag), reverse=True)
-            except Exception:
-                # the error might me caused of having tags like 1.2.3.1, 1.2.3.beta
-                # exception is cant convert str to int, it is comparing 'beta' to 1
-                # if that fails then only take the numbers and sort them
-                semver_entries = sorted(
-                    semver_entries,
-                    key=lambda entry: LooseVersion(semver_test.search(entry.tag).group()),
-                    reverse=True)
-
-        return semver_entries + regular_entries
@@ -41,7 +41,7 @@ class GsTabCycleCommand(TextCommand, GitCommand):
                 sublime.set_timeout_async(self.view.close)
 
     def get_next(self, source, reverse=False):
-        tab_order = self.savvy_settings.get("tab_order")
+        tab_order = list(self.savvy_settings.get("tab_order"))
 
         if reverse is True:
             tab_order.reverse()
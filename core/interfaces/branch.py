@@ -1,5 +1,5 @@
 import os
-from itertools import groupby
+import re
 
 import sublime
 from sublime_plugin import WindowCommand, TextCommand
@@ -36,12 +36,15 @@ class BranchInterface(ui.Interface, GitCommand):
     tab_size = 2
 
     show_remotes = None
+    expanded_remotes = None
+    filter_text = ""
 
     template = """\
 
       BRANCH:  {branch_status}
       ROOT:    {git_root}
       HEAD:    {head}
+    {< filter}
 
       LOCAL:
     {branch_list}{remotes}
@@ -64,7 +67,8 @@ class BranchInterface(ui.Interface, GitCommand):
       [H] diff history against active               [g] show branch log graph
       [E] edit branch description
 
-      [e]         toggle display of remote branches
+      [e]         toggle remotes, or the remote under the cursor
+      [/]         filter branches
       [tab]       transition to next dashboard
       [SHIFT-tab] transition to previous dashboard
       [r]         refresh
@@ -77,12 +81,45 @@ class BranchInterface(ui.Interface, GitCommand):
       REMOTE ({remote_name}):
     {remote_branch_list}"""
 
+    template_remote_collapsed = """
+      ▸ REMOTE ({remote_name})"""
+
     def title(self):
         return "BRANCHES: {}".format(os.path.basename(self.repo_path))
 
     def pre_render(self):
+        """
+        Load everything shown, so that changing the filter or expanding a
+        loaded remote doesn't need git.  Branches of a remote are only
+        loaded once it is expanded, and all branch lists are cached until
+        the refs change.
+        """
+        if self.show_remotes is None:
+            self.show_remotes = self.savvy_settings.get("show_remotes_in_branch_dashboard")
+        if self.expanded_remotes is None:
+            self.expanded_remotes = set()
+
         sort_by_recent = self.savvy_settings.get("sort_by_recent_in_branch_dashboard")
-        self._branches = tuple(self.get_branches(sort_by_recent))
+        self._branch_status = self.get_branch_status(delim="\n           ")
+        self._head = self.get_latest_commit_msg_for_head()
+        self._branches = tuple(self.get_branches(sort_by_recent, refs=("refs/heads", )))
+        self._remotes = tuple(self.get_remotes()) if self.show_remotes else ()
+        self._remote_branches = {
+            remote: tuple(self.get_branches(sort_by_recent, refs=("refs/remotes/" + remote, )))
+            for remote in self._remotes
+            if remote in self.expanded_remotes
+        }
+        self._search_index = {
+            branch.name_with_remote: branch.name.lower()
+            for branches in (self._branches, ) + tuple(self._remote_branches.values())
+            for branch in branches
+        }
+
+    def filter_branches(self, branches):
+        if not self.filter_text:
+            return branches
+        needle = self.filter_text.lower()
+        return [branch for branch in branches if needle in self._search_index[branch.name_with_remote]]
 
     def on_new_dashboard(self):
         self.view.run_command("gs_branches_set_cursor")
@@ -92,7 +129,7 @@ class BranchInterface(ui.Interface, GitCommand):
 
     @ui.partial("branch_status")
     def render_branch_status(self):
-        return self.get_branch_status(delim="\n           ")
+        return self._branch_status
 
     @ui.partial("git_root")
     def render_git_root(self):
@@ -100,12 +137,16 @@ class BranchInterface(ui.Interface, GitCommand):
 
     @ui.partial("head")
     def render_head(self):
-        return self.get_latest_commit_msg_for_head()
+        return self._head
+
+    @ui.partial("filter")
+    def render_filter(self):
+        return "\n  FILTER:  " + self.filter_text if self.filter_text else ""
 
     @ui.partial("branch_list")
     def render_branch_list(self, branches=None):
-        if not branches:
-            branches = [branch for branch in self._branches if not branch.remote]
+        if branches is None:
+            branches = self.filter_branches(self._branches)
 
         return "\n".join(
             "  {indicator} {hash:.7} {name}{tracking}{description}".format(
@@ -122,9 +163,6 @@ class BranchInterface(ui.Interface, GitCommand):
 
     @ui.partial("remotes")
     def render_remotes(self):
-        if self.show_remotes is None:
-            self.show_remotes = self.savvy_settings.get("show_remotes_in_branch_dashboard")
-
         return (self.render_remotes_on()
                 if self.show_remotes else
                 self.render_remotes_off())
@@ -144,13 +182,12 @@ class BranchInterface(ui.Interface, GitCommand):
         output_tmpl = "\n"
         render_fns = []
 
-        sorted_branches = sorted(
-            [b for b in self._branches if b.remote], key=lambda branch: branch.remote)
-        for remote_name, branches in groupby(sorted_branches, lambda branch: branch.remote):
-            if not remote_name:
+        for remote_name in self._remotes:
+            if remote_name not in self._remote_branches:
+                output_tmpl += self.template_remote_collapsed.format(remote_name=remote_name) + "\n"
                 continue
 
-            branches = tuple(branches)
+            branches = self.filter_branches(self._remote_branches[remote_name])
             key = "branch_list_" + remote_name
             output_tmpl += "{" + key + "}\n"
 
@@ -165,6 +202,22 @@ class BranchInterface(ui.Interface, GitCommand):
 
         return output_tmpl, render_fns
 
+    def get_remote_at(self, selection):
+        """
+        Return the name of the remote whose header or branches are under
+        `selection`, or `None`.
+        """
+        line = self.view.substr(self.view.line(selection))
+        match = re.match(r"^  \u25b8 REMOTE \((.+)\)$", line)
+        if match:
+            return match.group(1)
+
+        for remote_name in self._remote_branches:
+            remote_region = self.view.get_regions("git_savvy_interface.branch_list_" + remote_name)
+            if remote_region and remote_region[0].contains(selection):
+                return remote_name
+        return None
+
     def get_selected_branch(self):
         """
         Get a single selected branch. If more then one branch are selected, return (None, None).
@@ -176,7 +229,7 @@ class BranchInterface(ui.Interface, GitCommand):
             return (None, None)
 
     def get_selected_branches(self, ignore_current_branch=False):
-        current_branch_name = self.get_current_branch_name()
+        current_branch_name = next((branch.name for branch in self._branches if branch.active), None)
         branches = set()
         for sel in self.view.sel():
             for line in util.view.get_lines_from_regions(self.view, [sel]):
@@ -190,6 +243,8 @@ class BranchInterface(ui.Interface, GitCommand):
         return list(branches)
 
     def _get_selected_branch_name(self, selection, line):
+        if line.startswith(("  REMOTE (", "  ▸ REMOTE (")):
+            return None
         segments = line.strip("▸ ").split(" ")
         if len(segments) <= 1:
             return None
@@ -198,11 +253,9 @@ class BranchInterface(ui.Interface, GitCommand):
         if local_region.contains(selection):
             return (None, branch_name)
 
-        remotes = self.get_remotes()
-        for remote_name in remotes:
-            remote_region = self.view.get_regions("git_savvy_interface.branch_list_" + remote_name)
-            if remote_region and remote_region[0].contains(selection):
-                return (remote_name, branch_name)
+        remote_name = self.get_remote_at(selection)
+        if remote_name:
+            return (remote_name, branch_name)
 
     def create_branches_strs(self, branches):
         branches_strings = set()
@@ -523,16 +576,40 @@ class GsBranchesRefreshCommand(TextCommand, GitCommand):
 class GsBranchesToggleRemotesCommand(TextCommand, GitCommand):
 
     """
-    Toggle display of the remote branches.
+    Expand or collapse the remotes under the cursors.  If there are none,
+    toggle display of the remotes.
     """
 
     def run(self, edit, show=None):
         interface = ui.get_interface(self.view.id())
-        if show is None:
+        remotes = set(filter(None, (interface.get_remote_at(sel) for sel in self.view.sel())))
+        if show is None and interface.show_remotes and remotes:
+            interface.expanded_remotes ^= remotes
+        elif show is None:
             interface.show_remotes = not interface.show_remotes
         else:
             interface.show_remotes = show
-        interface.render()
+        sublime.set_timeout_async(interface.render, 0)
+
+
+class GsBranchesFilterCommand(TextCommand, GitCommand):
+
+    """
+    Filter the branches shown while typing.
+    """
+
+    def run(self, edit):
+        interface = ui.get_interface(self.view.id())
+        previous = interface.filter_text
+
+        def on_change(text):
+            interface.filter_text = text
+            interface.draw()
+
+        def on_cancel():
+            on_change(previous)
+
+        show_single_line_input_panel("Filter branches:", previous, on_change, on_change, on_cancel)
 
 
 class GsBranchesFetchCommand(TextCommand, GitCommand):
@@ -596,7 +673,7 @@ class GsBranchesNavigateBranchCommand(GsNavigate):
         return [
             branch_region
             for region in self.view.find_by_selector(
-                "meta.git-savvy.branches.branch"
+                "meta.git-savvy.branches.branch, meta.git-savvy.branches.remote.collapsed"
             )
             for branch_region in self.view.lines(region)]
 
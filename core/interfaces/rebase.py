@@ -9,6 +9,7 @@ from ..commands import GsNavigate
 from ..constants import MERGE_CONFLICT_PORCELAIN_STATUSES
 from ..exceptions import GitSavvyError
 from ..git_command import GitCommand
+from ..git_mixins import git_dir
 from ..git_mixins.rebase import NearestBranchMixin
 from ..ui_mixins.quick_panel import PanelActionMixin, show_log_panel, show_branch_panel
 from ..ui_mixins.input_panel import show_single_line_input_panel
@@ -141,7 +142,7 @@ class RebaseInterface(ui.Interface, NearestBranchMixin, GitCommand):
         self.view.settings().set("git_savvy.in_rebase", self._in_rebase)
         cached_pre_rebase_state = self.view.settings().get("git_savvy.rebase_in_progress")
         if cached_pre_rebase_state:
-            (branch_name, ref, changed_files), target_branch = cached_pre_rebase_state
+            (branch_name, ref), target_branch = cached_pre_rebase_state
             self.complete_action(
                 branch_name,
                 ref,
@@ -369,6 +370,12 @@ class RebaseInterface(ui.Interface, NearestBranchMixin, GitCommand):
         return int(count) > len(self.entries)
 
     def get_branch_ref(self, branch_name):
+        dirs = git_dir.git_dirs(self.repo_path)
+        if dirs is not git_dir.UNKNOWN:
+            commit_hash = git_dir.resolve_ref(dirs[0], dirs[1], "refs/heads/" + branch_name)
+            if commit_hash and commit_hash is not git_dir.UNKNOWN:
+                return commit_hash
+
         stdout = self.git("show-ref", "refs/heads/" + branch_name)
         return stdout.strip().split(" ")[0]
 
@@ -996,8 +1003,10 @@ class GsRebaseOnTopOfCommand(GsRebaseDefineBaseRefCommand):
         if not selection:
             return
         interface = ui.get_interface(self.view.id())
-        branch_state = interface.get_branch_state()
-        self.view.settings().set("git_savvy.rebase_in_progress", (branch_state, selection))
+        branch_name, ref, _ = interface.get_branch_state()
+        # Only JSON values can be stored in the settings, so leave out the
+        # `FileStatus`es of the changed files.
+        self.view.settings().set("git_savvy.rebase_in_progress", ((branch_name, ref), selection))
 
         self.view.settings().set("git_savvy.rebase.base_ref", selection)
         self.git(
@@ -7,11 +7,23 @@ import sublime
 from sublime_plugin import WindowCommand, TextCommand
 
 from ..commands import GsNavigate
+from .. import scheduler
 from ...common import ui
 from ..git_command import GitCommand
+from ..git_mixins.stage_unstage import chunk_paths
+from ..git_mixins.status import diff_status_snapshots
 from ...common import util
 
 
+# State keys of the file sections, by `StatusSnapshot` section name.
+STATE_KEY_FOR_SECTION = {
+    'staged': 'staged_files',
+    'unstaged': 'unstaged_files',
+    'untracked': 'untracked_files',
+    'conflicts': 'merge_conflicts',
+}
+
+
 # Expected
 #  - common/commands/view_manipulation.py
 #    common/ui.py
@@ -37,6 +49,78 @@ EXTRACT_FILENAME_RE = (
 )
 
 
+# Markers of the lines standing for more than one file.
+COLLAPSED_MARKER = "\u25b8"
+EXPANDED_MARKER = "\u25be"
+MORE_MARKER = "\u2026"
+GROUP_MARKERS = (COLLAPSED_MARKER, EXPANDED_MARKER, MORE_MARKER)
+
+
+def render_file_tree(files, format_file, expanded, limit):
+    """
+    Render `files` grouped by directory.  Directories not in `expanded`
+    are collapsed into one line showing how many files they contain, and
+    after `limit` lines the remaining files are summarized in one line.
+
+    Return the lines and a dict mapping the label of every line standing
+    for more than one file to the paths of these files.
+    """
+    lines, labels, rest = [], {}, []
+
+    def emit(line, paths):
+        if len(lines) < limit:
+            lines.append(line)
+            return True
+        rest.extend(paths)
+        return False
+
+    def add_group(marker, directory, paths):
+        label = "{} ({:,} files)".format(directory, len(paths))
+        if not emit("  {} {}".format(marker, label), paths):
+            return False
+        labels[label] = paths
+        return True
+
+    def visit(files, prefix):
+        items, groups = [], {}
+        for f in files:
+            head, _, tail = f.path[len(prefix):].partition("/")
+            if not tail:
+                items.append(f)
+                continue
+            directory = prefix + head + "/"
+            if directory not in groups:
+                groups[directory] = []
+                items.append(directory)
+            groups[directory].append(f)
+
+        for item in items:
+            if not isinstance(item, str):
+                emit(format_file(item), [item.path])
+                continue
+
+            group = groups[item]
+            if len(group) == 1:
+                emit(format_file(group[0]), [group[0].path])
+                continue
+
+            # Skip directories containing just one other directory.
+            common = os.path.commonprefix([f.path for f in group])
+            directory = common[:common.rfind("/") + 1]
+            paths = [f.path for f in group]
+            if directory not in expanded:
+                add_group(COLLAPSED_MARKER, directory, paths)
+            elif add_group(EXPANDED_MARKER, directory, paths):
+                visit(group, directory)
+
+    visit(files, "")
+    if rest:
+        label = "{:,} more files".format(len(rest))
+        labels[label] = rest
+        lines.append("  {} {}".format(MORE_MARKER, label))
+    return lines, labels
+
+
 def distinct_until_state_changed(just_render_fn):
     """Custom `lru_cache`-look-alike to minimize redraws."""
     previous_state = {}
@@ -101,6 +185,7 @@ class StatusInterface(ui.Interface, GitCommand):
       [d] discard changes to file           [D] discard all unstaged changes
       [h] open file on remote
       [M] launch external merge tool
+      [z] expand/collapse directory, show more files
 
       [l] diff file inline                  [f] diff all files
       [e] diff file                         [F] diff all cached files
@@ -174,7 +259,14 @@ class StatusInterface(ui.Interface, GitCommand):
         self.conflicts_keybindings = \
             "\n".join(line[2:] for line in self.conflicts_keybindings.split("\n"))
         self._lock = threading.Lock()
+        self._status_snapshot = None
+        self._status_fetches = 0
+        self._status_applied = 0
+        self._rendered_sections = {}
+        self._labels = {}
         self.state = {
+            'expanded_dirs': frozenset(),
+            'file_limits': {},
             'staged_files': [],
             'unstaged_files': [],
             'untracked_files': [],
@@ -198,13 +290,19 @@ class StatusInterface(ui.Interface, GitCommand):
         data which implies that the view is only _eventual_ consistent
         with the real world.
         """
-        for thunk in (
-            self.fetch_repo_status,
-            lambda: {'head': self.get_latest_commit_msg_for_head()},
-            lambda: {'stashes': self.get_stashes()},
+        scheduler.submit(
+            self.refresh_repo_status_and_render,
+            priority=scheduler.VISIBLE_REFRESH,
+            key=('status_dashboard', self.view.id(), 'status')
+        )
+        for name, thunk in (
+            ('head', lambda: {'head': self.get_latest_commit_msg_for_head()}),
+            ('stashes', lambda: {'stashes': self.get_stashes()}),
         ):
-            sublime.set_timeout_async(
-                partial(self.update_state, thunk, then=self.just_render)
+            scheduler.submit(
+                partial(self.update_state, thunk, then=self.just_render),
+                priority=scheduler.VISIBLE_REFRESH,
+                key=('status_dashboard', self.view.id(), name)
             )
 
         # These are cheap to compute, so we just do it!
@@ -253,24 +351,30 @@ class StatusInterface(ui.Interface, GitCommand):
             "nuke_cursors": nuke_cursors
         })
 
-    def fetch_repo_status(self, delim=None):
-        lines = self._get_status()
-        files_statuses = self._parse_status_for_file_statuses(lines)
-        branch_status = self._get_branch_status_components(lines)
-
-        (staged_files,
-         unstaged_files,
-         untracked_files,
-         merge_conflicts) = self.sort_status_entries(files_statuses)
-        branch_status = self._format_branch_status(branch_status, delim="\n           ")
-
-        return {
-            'staged_files': staged_files,
-            'unstaged_files': unstaged_files,
-            'untracked_files': untracked_files,
-            'merge_conflicts': merge_conflicts,
-            'branch_status': branch_status
-        }
+    def fetch_repo_status(self):
+        """Fetch the `git status` part of the state and apply it.
+
+        Only sections which changed since the applied snapshot are
+        replaced, so the others keep their (already rendered) lists.
+        Refreshes may run concurrently, and the result of one which
+        started before the one already applied is dropped.
+        """
+        with self._lock:
+            self._status_fetches += 1
+            fetch = self._status_fetches
+        snapshot = self.get_status_snapshot(self._status_snapshot)
+        branch_status = self._format_branch_status(
+            self._get_branch_status_components_from_snapshot(snapshot), delim="\n           ")
+
+        with self._lock:
+            if fetch < self._status_applied:
+                return
+            previous = self._status_snapshot
+            self._status_snapshot = snapshot
+            self._status_applied = fetch
+            self.state['branch_status'] = branch_status
+            for section in diff_status_snapshots(previous, snapshot):
+                self.state[STATE_KEY_FOR_SECTION[section]] = snapshot.sections[section]
 
     def refresh_repo_status_and_render(self):
         """Refresh `git status` state and render.
@@ -279,7 +383,8 @@ class StatusInterface(ui.Interface, GitCommand):
         So instead of calling `render` it is a good optimization to just
         ask this method if appropriate.
         """
-        self.update_state(self.fetch_repo_status, self.just_render)
+        self.fetch_repo_status()
+        self.just_render()
 
     def after_view_creation(self, view):
         view.settings().set("result_file_regex", EXTRACT_FILENAME_RE)
@@ -300,50 +405,106 @@ class StatusInterface(ui.Interface, GitCommand):
     def render_head(self):
         return self.state['head']
 
+    def _render_section(self, key, template, format_file):
+        """Render the file list `self.state[key]` into `template`.
+
+        Sections with more than `status_dashboard_max_files` files are
+        grouped by directory, and render at most that many lines until
+        the user asks for more.
+
+        The output is kept as long as the list object and the expanded
+        directories stay the same, and `fetch_repo_status` only replaces
+        the lists of changed sections.
+        """
+        files = self.state[key]
+        max_files = self.savvy_settings.get("status_dashboard_max_files")
+        expanded = frozenset(
+            directory for section, directory in self.state['expanded_dirs'] if section == key)
+        limit = self.state['file_limits'].get(key, max_files)
+        options = (max_files, expanded, limit)
+
+        cached = self._rendered_sections.get(key)
+        if cached and cached[0] is files and cached[1] == options:
+            return cached[2]
+
+        if not files:
+            lines, labels = [], {}
+        elif not max_files or len(files) <= max_files:
+            lines, labels = [format_file(f) for f in files], {}
+        else:
+            lines, labels = render_file_tree(files, format_file, expanded, limit)
+
+        rendered = template.format("\n".join(lines)) if lines else ""
+        self._rendered_sections[key] = (files, options, rendered)
+        self._labels[key] = labels
+        return rendered
+
+    def selected_file_paths(self, *keys):
+        """
+        Return the paths of the files selected in the sections `keys`.
+        Selected directories and "more files" lines stand for all the
+        files they summarize.
+        """
+        paths = []
+        for key in keys:
+            labels = self._labels.get(key, {})
+            for line in self.get_selection_lines_in_region(key):
+                if line:
+                    # Remove the leading spaces and the marker of the line.
+                    label = line[4:].strip()
+                    paths.extend(labels.get(label, [label]))
+        return paths
+
+    def toggle_groups(self, *keys):
+        """
+        Expand or collapse the selected directories, and show more files
+        for the selected "more files" lines.
+        """
+        max_files = self.savvy_settings.get("status_dashboard_max_files")
+        expanded = set(self.state['expanded_dirs'])
+        limits = dict(self.state['file_limits'])
+        for key in keys:
+            for line in self.get_selection_lines_in_region(key):
+                marker, label = line[2:3], line[4:].strip()
+                if marker == MORE_MARKER:
+                    limits[key] = limits.get(key, max_files) + max_files
+                elif marker in (COLLAPSED_MARKER, EXPANDED_MARKER):
+                    directory = (key, label.rpartition(" (")[0])
+                    if marker == COLLAPSED_MARKER:
+                        expanded.add(directory)
+                    else:
+                        expanded.discard(directory)
+
+        self.update_state({
+            'expanded_dirs': frozenset(expanded),
+            'file_limits': limits
+        }, then=self.just_render)
+
     @ui.partial("staged_files")
     def render_staged_files(self):
-        staged_files = self.state['staged_files']
-        if not staged_files:
-            return ""
-
         def get_path(file_status):
             """ Display full file_status path, including path_alt if exists """
             if file_status.path_alt:
                 return '{} -> {}'.format(file_status.path_alt, file_status.path)
             return file_status.path
 
-        return self.template_staged.format("\n".join(
-            "  {} {}".format("-" if f.index_status == "D" else " ", get_path(f))
-            for f in staged_files
-        ))
+        return self._render_section('staged_files', self.template_staged, lambda f: "  {} {}".format(
+            "-" if f.index_status == "D" else " ", get_path(f)))
 
     @ui.partial("unstaged_files")
     def render_unstaged_files(self):
-        unstaged_files = self.state['unstaged_files']
-        if not unstaged_files:
-            return ""
-
-        return self.template_unstaged.format("\n".join(
-            "  {} {}".format("-" if f.working_status == "D" else " ", f.path)
-            for f in unstaged_files
-        ))
+        return self._render_section('unstaged_files', self.template_unstaged, lambda f: "  {} {}".format(
+            "-" if f.working_status == "D" else " ", f.path))
 
     @ui.partial("untracked_files")
     def render_untracked_files(self):
-        untracked_files = self.state['untracked_files']
-        if not untracked_files:
-            return ""
-
-        return self.template_untracked.format(
-            "\n".join("    " + f.path for f in untracked_files))
+        return self._render_section(
+            'untracked_files', self.template_untracked, lambda f: "    " + f.path)
 
     @ui.partial("merge_conflicts")
     def render_merge_conflicts(self):
-        merge_conflicts = self.state['merge_conflicts']
-        if not merge_conflicts:
-            return ""
-        return self.template_merge_conflicts.format(
-            "\n".join("    " + f.path for f in merge_conflicts))
+        return self._render_section(
+            'merge_conflicts', self.template_merge_conflicts, lambda f: "    " + f.path)
 
     @ui.partial("conflicts_bindings")
     def render_conflicts_bindings(self):
@@ -405,28 +566,14 @@ class GsStatusDiffInlineCommand(TextCommand, GitCommand):
     def run(self, edit):
         interface = ui.get_interface(self.view.id())
 
-        non_cached_sections = (interface.get_view_regions("unstaged_files") +
-                               interface.get_view_regions("merge_conflicts"))
-        non_cached_lines = util.view.get_lines_from_regions(
-            self.view,
-            self.view.sel(),
-            valid_ranges=non_cached_sections
-        )
-        non_cached_files = (
-            os.path.join(self.repo_path, line.strip())
-            for line in non_cached_lines
-            if line[:4] == "    ")
-
-        cached_sections = interface.get_view_regions("staged_files")
-        cached_lines = util.view.get_lines_from_regions(
-            self.view,
-            self.view.sel(),
-            valid_ranges=cached_sections
-        )
-        cached_files = (
-            os.path.join(self.repo_path, line.strip())
-            for line in cached_lines
-            if line[:4] == "    ")
+        non_cached_files = [
+            os.path.join(self.repo_path, file_path)
+            for file_path in interface.selected_file_paths("unstaged_files", "merge_conflicts")
+        ]
+        cached_files = [
+            os.path.join(self.repo_path, file_path)
+            for file_path in interface.selected_file_paths("staged_files")
+        ]
 
         sublime.set_timeout_async(
             lambda: self.load_inline_diff_windows(non_cached_files, cached_files), 0)
@@ -464,31 +611,15 @@ class GsStatusDiffCommand(TextCommand, GitCommand):
     def run(self, edit):
         interface = ui.get_interface(self.view.id())
 
-        non_cached_sections = (interface.get_view_regions("unstaged_files") +
-                               interface.get_view_regions("untracked_files") +
-                               interface.get_view_regions("merge_conflicts"))
-        non_cached_lines = util.view.get_lines_from_regions(
-            self.view,
-            self.view.sel(),
-            valid_ranges=non_cached_sections
-        )
-        non_cached_files = (
-            os.path.join(self.repo_path, line.strip())
-            for line in non_cached_lines
-            if line[:4] == "    "
-        )
-
-        cached_sections = interface.get_view_regions("staged_files")
-        cached_lines = util.view.get_lines_from_regions(
-            self.view,
-            self.view.sel(),
-            valid_ranges=cached_sections
-        )
-        cached_files = (
-            os.path.join(self.repo_path, line.strip())
-            for line in cached_lines
-            if line[:4] == "    "
-        )
+        non_cached_files = [
+            os.path.join(self.repo_path, file_path)
+            for file_path in interface.selected_file_paths(
+                "unstaged_files", "untracked_files", "merge_conflicts")
+        ]
+        cached_files = [
+            os.path.join(self.repo_path, file_path)
+            for file_path in interface.selected_file_paths("staged_files")
+        ]
 
         sublime.set_timeout_async(
             lambda: self.load_diff_windows(non_cached_files, cached_files), 0)
@@ -515,22 +646,10 @@ class GsStatusStageFileCommand(TextCommand, GitCommand):
 
     def run(self, edit):
         interface = ui.get_interface(self.view.id())
-        valid_ranges = (interface.get_view_regions("unstaged_files") +
-                        interface.get_view_regions("untracked_files") +
-                        interface.get_view_regions("merge_conflicts"))
-
-        lines = util.view.get_lines_from_regions(
-            self.view,
-            self.view.sel(),
-            valid_ranges=valid_ranges
-        )
-        # Remove the leading spaces and hyphen-character for deleted files.
-        file_paths = tuple(line[4:].strip() for line in lines if line)
+        file_paths = interface.selected_file_paths("unstaged_files", "untracked_files", "merge_conflicts")
 
         if file_paths:
-            for fpath in file_paths:
-                self.stage_file(fpath, force=False)
-
+            self.stage_files(file_paths, force=False)
             self.view.window().status_message("Staged files successfully.")
             interface.refresh_repo_status_and_render()
 
@@ -544,18 +663,10 @@ class GsStatusUnstageFileCommand(TextCommand, GitCommand):
 
     def run(self, edit):
         interface = ui.get_interface(self.view.id())
-        valid_ranges = interface.get_view_regions("staged_files")
-        lines = util.view.get_lines_from_regions(
-            self.view,
-            self.view.sel(),
-            valid_ranges=valid_ranges
-        )
-        # Remove the leading spaces and hyphen-character for deleted files.
-        file_paths = tuple(line[4:].strip() for line in lines if line)
+        file_paths = interface.selected_file_paths("staged_files")
 
         if file_paths:
-            for fpath in file_paths:
-                self.unstage_file(fpath)
+            self.unstage_files(file_paths)
             self.view.window().status_message("Unstaged files successfully.")
             interface.refresh_repo_status_and_render()
 
@@ -576,13 +687,7 @@ class GsStatusDiscardChangesToFileCommand(TextCommand, GitCommand):
             interface.refresh_repo_status_and_render()
 
     def discard_untracked(self, interface):
-        valid_ranges = interface.get_view_regions("untracked_files")
-        lines = util.view.get_lines_from_regions(
-            self.view,
-            self.view.sel(),
-            valid_ranges=valid_ranges
-        )
-        file_paths = tuple(line[4:].strip() for line in lines if line)
+        file_paths = interface.selected_file_paths("untracked_files")
 
         @util.actions.destructive(description="discard one or more untracked files")
         def do_discard():
@@ -593,14 +698,7 @@ class GsStatusDiscardChangesToFileCommand(TextCommand, GitCommand):
             return do_discard()
 
     def discard_unstaged(self, interface):
-        valid_ranges = (interface.get_view_regions("unstaged_files") +
-                        interface.get_view_regions("merge_conflicts"))
-        lines = util.view.get_lines_from_regions(
-            self.view,
-            self.view.sel(),
-            valid_ranges=valid_ranges
-        )
-        file_paths = tuple(line[4:].strip() for line in lines if line)
+        file_paths = interface.selected_file_paths("unstaged_files", "merge_conflicts")
 
         @util.actions.destructive(description="discard one or more unstaged files")
         def do_discard():
@@ -620,16 +718,7 @@ class GsStatusOpenFileOnRemoteCommand(TextCommand, GitCommand):
 
     def run(self, edit):
         interface = ui.get_interface(self.view.id())
-        valid_ranges = (interface.get_view_regions("unstaged_files") +
-                        interface.get_view_regions("merge_conflicts") +
-                        interface.get_view_regions("staged_files"))
-
-        lines = util.view.get_lines_from_regions(
-            self.view,
-            self.view.sel(),
-            valid_ranges=valid_ranges
-        )
-        file_paths = tuple(line[4:].strip() for line in lines if line)
+        file_paths = interface.selected_file_paths("unstaged_files", "merge_conflicts", "staged_files")
         self.view.run_command("gs_open_file_on_remote", {"fpath": list(file_paths)})
 
 
@@ -729,16 +818,8 @@ class GsStatusIgnoreFileCommand(TextCommand, GitCommand):
 
     def run(self, edit):
         interface = ui.get_interface(self.view.id())
-        valid_ranges = (interface.get_view_regions("unstaged_files") +
-                        interface.get_view_regions("untracked_files") +
-                        interface.get_view_regions("merge_conflicts") +
-                        interface.get_view_regions("staged_files"))
-        lines = util.view.get_lines_from_regions(
-            self.view,
-            self.view.sel(),
-            valid_ranges=valid_ranges
-        )
-        file_paths = tuple(line[4:].strip() for line in lines if line)
+        file_paths = interface.selected_file_paths(
+            "unstaged_files", "untracked_files", "merge_conflicts", "staged_files")
 
         if file_paths:
             for fpath in file_paths:
@@ -757,16 +838,8 @@ class GsStatusIgnorePatternCommand(TextCommand, GitCommand):
 
     def run(self, edit):
         interface = ui.get_interface(self.view.id())
-        valid_ranges = (interface.get_view_regions("unstaged_files") +
-                        interface.get_view_regions("untracked_files") +
-                        interface.get_view_regions("merge_conflicts") +
-                        interface.get_view_regions("staged_files"))
-        lines = util.view.get_lines_from_regions(
-            self.view,
-            self.view.sel(),
-            valid_ranges=valid_ranges
-        )
-        file_paths = tuple(line[4:].strip() for line in lines if line)
+        file_paths = interface.selected_file_paths(
+            "unstaged_files", "untracked_files", "merge_conflicts", "staged_files")
 
         if file_paths:
             self.view.window().run_command("gs_ignore_pattern", {"pre_filled": file_paths[0]})
@@ -823,16 +896,8 @@ class GsStatusLaunchMergeToolCommand(TextCommand, GitCommand):
 
     def run(self, edit):
         interface = ui.get_interface(self.view.id())
-        valid_ranges = (interface.get_view_regions("unstaged_files") +
-                        interface.get_view_regions("untracked_files") +
-                        interface.get_view_regions("merge_conflicts") +
-                        interface.get_view_regions("staged_files"))
-        lines = util.view.get_lines_from_regions(
-            self.view,
-            self.view.sel(),
-            valid_ranges=valid_ranges
-        )
-        file_paths = tuple(line[4:].strip() for line in lines if line)
+        file_paths = interface.selected_file_paths(
+            "unstaged_files", "untracked_files", "merge_conflicts", "staged_files")
 
         if len(file_paths) > 1:
             sublime.error_message("You can only launch merge tool for a single file at a time.")
@@ -851,17 +916,15 @@ class GsStatusUseCommitVersionCommand(TextCommand, GitCommand):
         interface = ui.get_interface(self.view.id())
         conflicts = interface.state['merge_conflicts']
 
-        sels = self.view.sel()
-        line_regions = [self.view.line(sel) for sel in sels]
-        paths = (line[4:]
-                 for reg in line_regions
-                 for line in self.view.substr(reg).split("\n") if line)
+        paths = interface.selected_file_paths("merge_conflicts")
+        deleted, kept = [], []
         for path in paths:
-            if self.is_commit_version_deleted(path, conflicts):
-                self.git("rm", "--", path)
-            else:
-                self.git("checkout", "--theirs", "--", path)
-                self.stage_file(path)
+            (deleted if self.is_commit_version_deleted(path, conflicts) else kept).append(path)
+        for chunk in chunk_paths(deleted):
+            self.git("rm", "--", *chunk)
+        for chunk in chunk_paths(kept):
+            self.git("checkout", "--theirs", "--", *chunk)
+        self.stage_files(kept)
         util.view.refresh_gitsavvy(self.view)
 
     def is_commit_version_deleted(self, path, conflicts):
@@ -880,17 +943,15 @@ class GsStatusUseBaseVersionCommand(TextCommand, GitCommand):
         interface = ui.get_interface(self.view.id())
         conflicts = interface.state['merge_conflicts']
 
-        sels = self.view.sel()
-        line_regions = [self.view.line(sel) for sel in sels]
-        paths = (line[4:]
-                 for reg in line_regions
-                 for line in self.view.substr(reg).split("\n") if line)
+        paths = interface.selected_file_paths("merge_conflicts")
+        deleted, kept = [], []
         for path in paths:
-            if self.is_base_version_deleted(path, conflicts):
-                self.git("rm", "--", path)
-            else:
-                self.git("checkout", "--ours", "--", path)
-                self.stage_file(path)
+            (deleted if self.is_base_version_deleted(path, conflicts) else kept).append(path)
+        for chunk in chunk_paths(deleted):
+            self.git("rm", "--", *chunk)
+        for chunk in chunk_paths(kept):
+            self.git("checkout", "--ours", "--", *chunk)
+        self.stage_files(kept)
         util.view.refresh_gitsavvy(self.view)
 
     def is_base_version_deleted(self, path, conflicts):
@@ -900,6 +961,18 @@ class GsStatusUseBaseVersionCommand(TextCommand, GitCommand):
         return False
 
 
+class GsStatusToggleGroupCommand(TextCommand, GitCommand):
+
+    """
+    Expand or collapse the directories under the cursors, or show more
+    files of a section cut short.
+    """
+
+    def run(self, edit):
+        interface = ui.get_interface(self.view.id())
+        interface.toggle_groups(*STATE_KEY_FOR_SECTION.values())
+
+
 class GsStatusNavigateFileCommand(GsNavigate):
 
     """
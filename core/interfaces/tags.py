@@ -1,3 +1,4 @@
+from functools import partial
 import os
 
 import sublime
@@ -5,7 +6,9 @@ from sublime_plugin import WindowCommand, TextCommand
 
 from ..commands import GsNavigate
 from ...common import ui
+from .. import remote_tags_cache
 from ..git_command import GitCommand
+from ..git_mixins.tags import TagDetails
 from ...common import util
 
 TAG_DELETE_MESSAGE = "Tag(s) deleted."
@@ -53,6 +56,7 @@ class TagsInterface(ui.Interface, GitCommand):
 
     show_remotes = None
     remotes = None
+    revalidate_remotes = False
 
     template = """\
 
@@ -91,12 +95,21 @@ class TagsInterface(ui.Interface, GitCommand):
             self.show_remotes = self.savvy_settings.get("show_remotes_in_tags_dashboard")
             self.max_items = self.savvy_settings.get("max_items_in_tags_dashboard", None)
 
-        self.local_tags = self.get_tags(reverse=True)
+        self.local_tags = self.get_tags()
         if self.remotes is None:
             self.remotes = {
-                name: {"uri": uri}
+                name: {"uri": uri, "revalidate": self.revalidate_remotes}
                 for name, uri in self.get_remotes().items()
             }
+            self.revalidate_remotes = False
+
+    def reset_remotes(self):
+        """
+        Show the remotes again, and list their tags anew even if the
+        cached ones are still fresh.
+        """
+        self.remotes = None
+        self.revalidate_remotes = True
 
     def on_new_dashboard(self):
         self.view.run_command("gs_tags_navigate_tag")
@@ -119,7 +132,7 @@ class TagsInterface(ui.Interface, GitCommand):
             return NO_LOCAL_TAGS_MESSAGE
 
         return "\n".join(
-            "    {} {}".format(self.get_short_hash(tag.sha), tag.tag)
+            "    {} {}".format(tag.sha, tag.tag)
             for tag in self.local_tags[0:self.max_items]
         )
 
@@ -155,26 +168,19 @@ class TagsInterface(ui.Interface, GitCommand):
             return self.template_help
 
     def get_remote_tags_list(self, remote, remote_name):
+        if "tags" not in remote and "loading" not in remote:
+            self.load_remote_tags(remote, remote_name)
+
         if "tags" in remote:
             if remote["tags"]:
-                tags_list = [tag for tag in remote["tags"] if tag.tag[-3:] != "^{}"]
-                tags_list = tags_list[0:self.max_items]
-
-                msg = "\n".join("    {} {}".format(
-                    self.get_short_hash(tag.sha), tag.tag) for tag in tags_list)
+                msg = "\n".join(
+                    "    {} {}".format(tag.sha, tag.tag)
+                    for tag in remote["tags"][0:self.max_items]
+                )
             else:
                 msg = NO_REMOTE_TAGS_MESSAGE
 
-        elif "loading" in remote:
-            msg = LOADING_TAGS_MESSAGE
-
         else:
-            def do_tags_fetch(remote=remote, remote_name=remote_name):
-                remote["tags"] = self.get_tags(remote_name, reverse=True)
-                self.render()
-
-            sublime.set_timeout_async(do_tags_fetch, 0)
-            remote["loading"] = True
             msg = LOADING_TAGS_MESSAGE
 
         return self.template_remote.format(
@@ -182,6 +188,47 @@ class TagsInterface(ui.Interface, GitCommand):
             remote_tags_list=msg
         )
 
+    def load_remote_tags(self, remote, remote_name):
+        """
+        Show the cached tags of `remote` right away, and list them in the
+        background if there are none or they are older than the TTL.
+        """
+        entry = remote_tags_cache.load(self.repo_path, remote["uri"])
+        if entry:
+            remote["tags"] = [TagDetails(*tag) for tag in entry.tags]
+
+        ttl = self.savvy_settings.get("remote_tags_cache_ttl", 300)
+        if entry and not remote["revalidate"] and remote_tags_cache.age(entry) < ttl:
+            return
+
+        remote["loading"] = True
+        remote_tags_cache.submit_fetch(
+            (self.repo_path, remote_name),
+            partial(self.fetch_remote_tags, remote_name, remote["uri"])
+        )
+
+    def fetch_remote_tags(self, remote_name, url):
+        """
+        List the tags of a remote, cache them and show them if they changed.
+        """
+        tags = self.get_tags(remote_name)
+        if tags:
+            remote_tags_cache.store(self.repo_path, url, tags)
+
+        # The remotes may have been reset in the meantime.
+        remote = (self.remotes or {}).get(remote_name)
+        if not remote or remote["uri"] != url:
+            return
+        if not tags and "tags" in remote:
+            # The remote may just not be reachable, keep the cached tags.
+            return
+        if tags == remote.get("tags"):
+            return
+
+        remote["tags"] = tags
+        if self.view.is_valid():
+            self.render()
+
     def render_remote_tags_off(self):
         return "\n\n  ** Press [e] to toggle display of remote branches. **\n"
 
@@ -214,7 +261,7 @@ class GsTagsRefreshCommand(TextCommand, GitCommand):
     def run(self, edit, reset_remotes=False):
         interface = ui.get_interface(self.view.id())
         if reset_remotes:
-            interface.remotes = None
+            interface.reset_remotes()
 
         util.view.refresh_gitsavvy(self.view)
 
@@ -262,9 +309,10 @@ class GsTagsDeleteCommand(TextCommand, GitCommand):
                     "--delete",
                     *("refs/tags/" + tag for tag in tags_to_delete)
                 )
+                remote_tags_cache.discard(self.repo_path, remote["uri"])
 
         self.view.window().status_message(TAG_DELETE_MESSAGE)
-        interface.remotes = None
+        interface.reset_remotes()
         util.view.refresh_gitsavvy(self.view)
 
 
@@ -309,8 +357,9 @@ class GsTagsPushCommand(TextCommand, GitCommand):
         self.view.window().status_message(START_PUSH_MESSAGE)
         self.git("push", remote, *("refs/tags/" + tag for tag in tags_to_push))
         self.view.window().status_message(END_PUSH_MESSAGE)
+        remote_tags_cache.discard(self.repo_path, self.get_remotes()[remote])
 
-        interface.remotes = None
+        interface.reset_remotes()
         util.view.refresh_gitsavvy(self.view)
 
     def push_all(self, remote_idx):
@@ -321,10 +370,11 @@ class GsTagsPushCommand(TextCommand, GitCommand):
         self.view.window().status_message(START_PUSH_MESSAGE)
         self.git("push", remote, "--tags")
         self.view.window().status_message(END_PUSH_MESSAGE)
+        remote_tags_cache.discard(self.repo_path, self.get_remotes()[remote])
 
         interface = ui.get_interface(self.view.id())
         if interface:
-            interface.remotes = None
+            interface.reset_remotes()
             util.view.refresh_gitsavvy(self.view)
 
 
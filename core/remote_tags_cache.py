@@ -0,0 +1,132 @@
+"""
+Tags of remotes as last listed by `git ls-remote`, kept on disk so that
+the tags dashboard can show them right away instead of waiting for the
+network each time it is opened.
+
+Entries are keyed by the repository and the URL of the remote, and each
+one lives in a file of its own below `sublime.cache_path()`, written by
+renaming a temporary file into place.  Whether an entry is still fresh
+enough is up to the caller, see `age`.
+
+Listing the tags waits for the network, maybe for a long time if a remote
+can't be reached.  So listings run on a small pool of their own, see
+`submit_fetch`, and never hold up the workers of `scheduler`.
+"""
+
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import json
+import os
+import threading
+import time
+import traceback
+
+import sublime
+
+
+CacheEntry = namedtuple("CacheEntry", ("tags", "fetched_at"))
+
+FORMAT_VERSION = 1
+
+MAX_CONCURRENT_FETCHES = 2
+
+
+if '_executor' not in globals():
+    _executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_FETCHES)
+    _queued = set()
+    _lock = threading.Lock()
+
+
+def cache_dir():
+    return os.path.join(sublime.cache_path(), "GitSavvy", "remote_tags")
+
+
+def _path(repo_path, url):
+    key = "{}\x00{}".format(os.path.normcase(repo_path), url).encode("utf-8")
+    return os.path.join(cache_dir(), hashlib.sha1(key).hexdigest() + ".json")
+
+
+def load(repo_path, url):
+    """
+    Return the `CacheEntry` for the remote `url` of `repo_path`, with
+    `tags` as a list of `(sha, tag)` pairs, or `None`.
+    """
+    try:
+        with open(_path(repo_path, url), encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if (
+        not isinstance(data, dict)
+        or data.get("version") != FORMAT_VERSION
+        or data.get("repo_path") != repo_path
+        or data.get("url") != url
+    ):
+        return None
+    return CacheEntry([tuple(tag) for tag in data["tags"]], data["fetched_at"])
+
+
+def store(repo_path, url, tags):
+    """
+    Remember `tags`, a list of `(sha, tag)` pairs, as the tags of the remote
+    `url` of `repo_path`, fetched just now.
+    """
+    path = _path(repo_path, url)
+    data = {
+        "version": FORMAT_VERSION,
+        "repo_path": repo_path,
+        "url": url,
+        "fetched_at": time.time(),
+        "tags": [list(tag) for tag in tags],
+    }
+    tmp_path = "{}.{}.tmp".format(path, threading.get_ident())
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+
+def discard(repo_path, url):
+    """
+    Forget the tags of the remote `url` of `repo_path`.
+    """
+    try:
+        os.remove(_path(repo_path, url))
+    except OSError:
+        pass
+
+
+def submit_fetch(key, fn):
+    """
+    Call `fn`, which lists the tags of a remote, on the pool of fetches,
+    unless a fetch with the same `key` is still waiting for its turn.
+    """
+    with _lock:
+        if key in _queued:
+            return
+        _queued.add(key)
+
+    def run():
+        with _lock:
+            _queued.discard(key)
+        try:
+            fn()
+        except Exception:
+            traceback.print_exc()
+
+    _executor.submit(run)
+
+
+def age(entry):
+    """
+    Return the number of seconds since the tags of `entry` were fetched.
+    """
+    return time.time() - entry.fetched_at
@@ -0,0 +1,161 @@
+"""
+Resolve the top-level directory of the repository a folder belongs to.
+
+`git rev-parse --show-toplevel` costs a process spawn, but for the common
+layouts we can find the answer by walking up the directory tree looking for
+a `.git` directory (or a `.git` file pointing to the real git dir as used by
+worktrees and submodules).  Results are cached per folder and validated by
+the mtimes of all directories we looked at, so a `.git` entry appearing or
+disappearing anywhere on the way invalidates the cached answer.
+"""
+
+import os
+import threading
+
+
+# Environment variables which change how git discovers the repository.  If
+# any of them is set we let git do the work.
+GIT_DISCOVERY_VARIABLES = (
+    "GIT_DIR",
+    "GIT_WORK_TREE",
+    "GIT_CEILING_DIRECTORIES",
+    "GIT_DISCOVERY_ACROSS_FILESYSTEM",
+)
+
+# Returned by `find_toplevel` for layouts we do not understand.
+UNKNOWN = object()
+
+
+if '_toplevel_cache' not in globals():
+    _toplevel_cache = {}
+    _git_dirs_cache = {}
+    _cache_lock = threading.Lock()
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _looks_like_git_dir(path):
+    return os.path.isfile(os.path.join(path, "HEAD"))
+
+
+def read_gitdir_file(path):
+    """
+    Return the git dir a `.git` file (`gitdir: <path>`) points to, or
+    `None` if `path` is not such a file.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            line = f.readline().strip()
+    except (OSError, UnicodeDecodeError):
+        return None
+
+    if not line.startswith("gitdir:"):
+        return None
+    gitdir = line[len("gitdir:"):].strip()
+    return os.path.normpath(os.path.join(os.path.dirname(path), gitdir))
+
+
+def _walk_up(folder):
+    """
+    Walk from `folder` up to the filesystem root.  Return a tuple of the
+    top-level directory (`None` if there is none, `UNKNOWN` if we should
+    ask git) and the directories visited along with their mtimes.
+    """
+    visited = []
+    path = folder
+    while True:
+        if os.path.basename(path) == ".git":
+            # Inside a git dir, git's answer depends on the command.
+            return UNKNOWN, visited
+
+        visited.append((path, _mtime(path)))
+        dot_git = os.path.join(path, ".git")
+        if os.path.isdir(dot_git):
+            return (path if _looks_like_git_dir(dot_git) else UNKNOWN), visited
+        if os.path.isfile(dot_git):
+            gitdir = read_gitdir_file(dot_git)
+            return (path if gitdir and _looks_like_git_dir(gitdir) else UNKNOWN), visited
+
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None, visited
+        path = parent
+
+
+def _is_valid(visited):
+    return all(_mtime(path) == mtime for path, mtime in visited)
+
+
+def find_toplevel(folder, env=None):
+    """
+    Return the real path of the working tree root containing `folder`,
+    `None` if `folder` is not inside a working tree, or `UNKNOWN` if git
+    itself has to be asked, e.g. for bare repos or when `GIT_DIR` is set.
+    """
+    if any(
+        name in os.environ or (env and name in env)
+        for name in GIT_DISCOVERY_VARIABLES
+    ):
+        return UNKNOWN
+
+    cached = _toplevel_cache.get(folder)
+    if cached and _is_valid(cached[1]):
+        return cached[0]
+
+    toplevel, visited = _walk_up(os.path.realpath(folder))
+    if toplevel is not UNKNOWN:
+        with _cache_lock:
+            _toplevel_cache[folder] = (toplevel, visited)
+    return toplevel
+
+
+def git_dirs(toplevel):
+    """
+    Return a tuple of the git dir and the common git dir of the working
+    tree at `toplevel`, or `None` if they cannot be determined.
+
+    For a normal repository both are `<toplevel>/.git`.  For a linked
+    worktree the git dir holds per-worktree state (`HEAD`, `index`,
+    `MERGE_HEAD`, rebase state) while refs, `packed-refs` and `config`
+    live in the common dir.
+    """
+    dot_git = os.path.join(toplevel, ".git")
+    try:
+        st = os.stat(dot_git)
+    except OSError:
+        return None
+    signature = (st.st_mtime_ns, st.st_ino)
+
+    cached = _git_dirs_cache.get(toplevel)
+    if cached and cached[0] == signature:
+        return cached[1]
+
+    if os.path.isdir(dot_git):
+        git_dir = dot_git
+    else:
+        git_dir = read_gitdir_file(dot_git)
+        if not git_dir or not os.path.isdir(git_dir):
+            return None
+
+    common_dir = git_dir
+    try:
+        with open(os.path.join(git_dir, "commondir"), "r", encoding="utf-8") as f:
+            common_dir = os.path.normpath(os.path.join(git_dir, f.read().strip()))
+    except (OSError, UnicodeDecodeError):
+        pass
+
+    result = (git_dir, common_dir)
+    with _cache_lock:
+        _git_dirs_cache[toplevel] = (signature, result)
+    return result
+
+
+def clear_cache():
+    with _cache_lock:
+        _toplevel_cache.clear()
+        _git_dirs_cache.clear()
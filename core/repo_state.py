@@ -0,0 +1,154 @@
+"""
+Cheap fingerprints of a repository's state and a cache built on top of them.
+
+A fingerprint is made of `stat()` results of the files git touches when the
+corresponding state changes.  It is split into parts so that callers can
+depend on just what they need:
+
+    head    `HEAD` and in-progress merge/rebase/cherry-pick state
+    refs    the directories below `refs/`, `packed-refs` and the stash log
+    index   the index file
+    config  the repo (and worktree) config
+
+Git updates refs by renaming a lock file into place, which bumps the mtime
+of the containing directory, so we don't have to stat every single ref.
+"""
+
+from collections import OrderedDict
+import copy
+from functools import wraps
+import os
+import threading
+import time
+
+from . import repo_paths
+
+
+ALL_PARTS = ("head", "refs", "index", "config")
+
+# Timestamps closer to "now" than this are not trusted, as the file system
+# may not be able to tell two writes within the same tick apart.
+RACY_THRESHOLD = 2.0
+
+# Least recently used entries are evicted beyond this.
+MAX_CACHE_ENTRIES = 512
+
+
+if '_cache' not in globals():
+    _cache = OrderedDict()
+    _cache_lock = threading.Lock()
+
+
+def _stat(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+
+def _part_signature(part, git_dir, common_dir):
+    """
+    Return a tuple of `_stat` results for the files making up `part`.
+    """
+    if part == "head":
+        paths = [
+            os.path.join(git_dir, name)
+            for name in ("HEAD", "MERGE_HEAD", "CHERRY_PICK_HEAD", "rebase-merge", "rebase-apply")
+        ]
+    elif part == "refs":
+        paths = [dirpath for dirpath, _, _ in os.walk(os.path.join(common_dir, "refs"))]
+        paths.append(os.path.join(common_dir, "packed-refs"))
+        paths.append(os.path.join(common_dir, "logs", "refs", "stash"))
+    elif part == "index":
+        paths = [os.path.join(git_dir, "index")]
+    elif part == "config":
+        paths = [os.path.join(common_dir, "config"), os.path.join(git_dir, "config.worktree")]
+    else:
+        raise ValueError("Unknown fingerprint part {!r}".format(part))
+
+    return tuple(_stat(path) for path in paths)
+
+
+def fingerprint(repo_path, parts=ALL_PARTS):
+    """
+    Return a hashable fingerprint of the given `parts` of the repository
+    state, or `None` if it cannot be computed (no git dir found or the
+    state changed too recently to be trusted).
+    """
+    dirs = repo_paths.git_dirs(repo_path)
+    if not dirs:
+        return None
+
+    git_dir, common_dir = dirs
+    signature = tuple(_part_signature(part, git_dir, common_dir) for part in parts)
+    newest = max([stat[0] for part in signature for stat in part if stat] or [0])
+    if newest > (time.time() - RACY_THRESHOLD) * 1e9:
+        return None
+    return signature
+
+
+def _fresh(result):
+    # Hand out copies of mutable results so callers can't alter the cache.
+    return copy.copy(result) if isinstance(result, (list, dict)) else result
+
+
+def cached(depends_on=ALL_PARTS, key=None):
+    """
+    Decorate a read-only `GitCommand` method to memoize its result until
+    the given parts of the repository's fingerprint change.
+
+    `key` may be a function taking the same arguments as the method and
+    returning extra (hashable) state the result depends on, e.g. settings.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(self, *args, **kwargs):
+            try:
+                repo_path = self.get_repo_path(offer_init=False)
+            except Exception:
+                # Let the method itself report what's wrong.
+                return fn(self, *args, **kwargs)
+
+            state = fingerprint(repo_path, depends_on)
+            if state is None:
+                return fn(self, *args, **kwargs)
+
+            cache_key = (
+                repo_path,
+                fn.__name__,
+                args,
+                tuple(sorted(kwargs.items())),
+                key(self, *args, **kwargs) if key else None
+            )
+            try:
+                with _cache_lock:
+                    entry = _cache.get(cache_key)
+                    if entry and entry[0] == state:
+                        _cache.move_to_end(cache_key)
+                        return _fresh(entry[1])
+            except TypeError:  # unhashable arguments
+                return fn(self, *args, **kwargs)
+
+            result = fn(self, *args, **kwargs)
+            with _cache_lock:
+                _cache[cache_key] = (state, result)
+                _cache.move_to_end(cache_key)
+                while len(_cache) > MAX_CACHE_ENTRIES:
+                    _cache.popitem(last=False)
+            return _fresh(result)
+
+        return wrapper
+    return decorator
+
+
+def invalidate(repo_path=None):
+    """
+    Drop all cached results, or only those for `repo_path`.
+    """
+    with _cache_lock:
+        if repo_path is None:
+            _cache.clear()
+            return
+        for cache_key in [k for k in _cache if k[0] == repo_path]:
+            del _cache[cache_key]
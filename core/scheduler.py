@@ -0,0 +1,238 @@
+"""
+A small, prioritized worker pool for git work.
+
+Sublime runs everything scheduled with `set_timeout_async` on one single
+thread, so a slow `git log --graph` holds back every status bar update and
+dashboard refresh queued behind it.  Jobs submitted here instead run on a
+few worker threads, highest priority first.
+
+A job may carry a `key`.  Submitting a job with the key of a job that is
+still queued or running supersedes the older one: a queued job is dropped,
+a running one is marked cancelled and the git processes it started (see
+`register_process`) are killed.  A process several callers wait for, see
+`SharedProcess`, is only killed once all of their jobs are cancelled.
+"""
+
+from collections import namedtuple
+import heapq
+import itertools
+import threading
+import traceback
+
+
+# Priority classes, lower runs first.  `INTERACTIVE` is for work the user
+# asked for, e.g. by refreshing a dashboard.
+INTERACTIVE = 0
+VISIBLE_REFRESH = 1
+STATUS_BAR = 2
+PREFETCH = 3
+
+MAX_WORKERS = 4
+
+
+class Cancelled(Exception):
+    pass
+
+
+_QueueEntry = namedtuple("_QueueEntry", ("priority", "seq", "job"))
+
+
+class Job():
+
+    """
+    A unit of work handed out by `submit`.
+    """
+
+    def __init__(self, fn, priority, key):
+        self.fn = fn
+        self.priority = priority
+        self.key = key
+        self.cancelled = False
+        self._processes = set()
+        self._lock = threading.Lock()
+
+    def cancel(self):
+        with self._lock:
+            self.cancelled = True
+            processes = list(self._processes)
+        for process in processes:
+            _kill(process)
+
+    def add_process(self, process):
+        with self._lock:
+            if not self.cancelled:
+                self._processes.add(process)
+                return
+        _kill(process)
+
+    def discard_process(self, process):
+        with self._lock:
+            self._processes.discard(process)
+
+
+class SharedProcess():
+
+    """
+    A process several callers wait for, e.g. through `single_flight`.
+
+    Each caller attaches to it (`with shared:`) for as long as it waits.
+    Cancelling the job of a caller kills the process only if no other
+    caller still waits for it, i.e. if the jobs of all attached callers
+    are cancelled.  Callers outside of jobs can't be cancelled and keep
+    the process alive.
+    """
+
+    def __init__(self):
+        self.process = None
+        self.killed = False
+        self._waiters = []
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        job = current_job()
+        with self._lock:
+            self._waiters.append(job)
+        if job:
+            job.add_process(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        job = current_job()
+        with self._lock:
+            self._waiters.remove(job)
+        if job:
+            job.discard_process(self)
+
+    def start(self, process):
+        """
+        Set the running `Popen`, killing it right away if nobody waits
+        for it anymore.
+        """
+        with self._lock:
+            self.process = process
+        self.kill()
+
+    def kill(self):
+        # Called by `Job.cancel`.
+        with self._lock:
+            if self.process is None or self.killed or not all(
+                job is not None and job.cancelled for job in self._waiters
+            ):
+                return
+            self.killed = True
+        _kill(self.process)
+
+
+def _kill(process):
+    try:
+        process.kill()
+    except OSError:
+        pass
+
+
+if '_queue' not in globals():
+    _queue = []
+    _by_key = {}
+    _condition = threading.Condition()
+    _workers = []
+    _busy = [0, 0]  # running jobs: [total, non-interactive]
+    _counter = itertools.count()
+    _local = threading.local()
+
+
+def submit(fn, priority=VISIBLE_REFRESH, key=None):
+    """
+    Schedule `fn` to be called without arguments on a worker thread and
+    return its `Job`.  A job with the same `key` is superseded.
+    """
+    job = Job(fn, priority, key)
+    with _condition:
+        if key is not None:
+            previous = _by_key.get(key)
+            if previous:
+                previous.cancel()
+            _by_key[key] = job
+        heapq.heappush(_queue, _QueueEntry(priority, next(_counter), job))
+        _ensure_workers()
+        _condition.notify_all()
+    return job
+
+
+def current_job():
+    """
+    Return the `Job` the calling thread is running, or `None`.
+    """
+    return getattr(_local, "job", None)
+
+
+def raise_if_cancelled():
+    job = current_job()
+    if job and job.cancelled:
+        raise Cancelled()
+
+
+def register_process(process):
+    """
+    Associate a running `Popen` with the current job so that it gets killed
+    when the job is superseded.  No-op outside of jobs.
+    """
+    job = current_job()
+    if job:
+        job.add_process(process)
+
+
+def unregister_process(process):
+    job = current_job()
+    if job:
+        job.discard_process(process)
+
+
+def _ensure_workers():
+    # Must be called with `_condition` held.
+    idle = len(_workers) - _busy[0]
+    if len(_workers) < MAX_WORKERS and len(_queue) > idle:
+        worker = threading.Thread(target=_work, name="GitSavvy worker {}".format(len(_workers)))
+        worker.daemon = True
+        _workers.append(worker)
+        worker.start()
+
+
+def _next_job():
+    # Must be called with `_condition` held.  One worker is always kept free
+    # for interactive jobs.
+    while True:
+        while _queue and _queue[0].job.cancelled:
+            heapq.heappop(_queue)
+        if _queue and (
+            _queue[0].priority == INTERACTIVE or _busy[1] < MAX_WORKERS - 1
+        ):
+            return heapq.heappop(_queue).job
+        _condition.wait()
+
+
+def _work():
+    while True:
+        with _condition:
+            job = _next_job()
+            interactive = job.priority == INTERACTIVE
+            _busy[0] += 1
+            if not interactive:
+                _busy[1] += 1
+
+        _local.job = job
+        try:
+            job.fn()
+        except Cancelled:
+            pass
+        except Exception:
+            if not job.cancelled:
+                traceback.print_exc()
+        finally:
+            _local.job = None
+            with _condition:
+                _busy[0] -= 1
+                if not interactive:
+                    _busy[1] -= 1
+                if job.key is not None and _by_key.get(job.key) is job:
+                    del _by_key[job.key]
+                _condition.notify_all()
@@ -1,30 +1,231 @@
+"""
+GitSavvy settings, merged from the view, the project and the global settings.
+
+Looking settings up through the Sublime API is comparatively slow and
+`GitCommand.git` alone does it a handful of times per invocation.  So a
+lookup only reads dicts we keep around:
+
+- the `GitSavvy` settings of each view, which come from the project
+  `settings`, a syntax specific settings file or were set on the view.
+  They are read again whenever the settings of the view change
+  (`add_on_change`).
+- a snapshot per window and project: the `GitSavvy` section of the project
+  data, and the global settings as they are looked up.  Snapshots are
+  dropped whenever the global settings change, a project is loaded or
+  saved, GitSavvy changes the project data itself, or the window is closed.
+
+Which view is active is only asked for once after another view has been
+activated.  Values are frozen, i.e. dicts are read-only mappings and lists
+are tuples, as they are shared by all lookups.
+"""
+
+from types import MappingProxyType
+import threading
+
 import sublime
 
 
-class GitSavvySettings:
-    def __init__(self, parent=None):
-        self.parent = parent
-        self.global_settings = sublime.load_settings("GitSavvy.sublime-settings")
+SETTINGS_FILE = "GitSavvy.sublime-settings"
+ON_CHANGE_TAG = "GitSavvy.settings_snapshot"
+_NOT_SET = object()
+_EMPTY = MappingProxyType({})
+
+
+if '_snapshots' not in globals():
+    _snapshots = {}
+    _view_settings = {}
+    _lock = threading.Lock()
+    _listening = False
+    # The `(view id, snapshot)` of the active view, and a counter which
+    # is bumped whenever that may have changed.
+    _active = None
+    _generation = 0
+
+
+def freeze(value):
+    """
+    Return `value` with all dicts turned into read-only mappings and all
+    lists into tuples.
+    """
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+class _Snapshot:
+    __slots__ = ("project_settings", "global_settings", "global_values")
+
+    def __init__(self, project_settings, global_settings):
+        self.project_settings = project_settings
+        self.global_settings = global_settings
+        self.global_values = {}
 
     def get(self, key, default=None):
-        window = sublime.active_window()
-        view = window.active_view()
-        project_savvy_settings = view.settings().get("GitSavvy", {}) or {}
+        try:
+            return self.project_settings[key]
+        except KeyError:
+            pass
+
+        value = self.global_values.get(key, _NOT_SET)
+        if value is _NOT_SET:
+            value = self.global_values[key] = freeze(self.global_settings.get(key))
+        return default if value is None else value
+
+
+def reset_active(*args):
+    """
+    Forget which view is active, e.g. because another one got activated.
+    Extra arguments are ignored so that this can be used as a callback
+    directly.
+    """
+    global _active, _generation
+    with _lock:
+        _active = None
+        _generation += 1
+
+
+def invalidate(*args):
+    """
+    Drop all snapshots.  Extra arguments are ignored so that this can be
+    used as a callback directly.
+    """
+    with _lock:
+        _snapshots.clear()
+    reset_active()
+
+
+def _ensure_listening(global_settings):
+    global _listening
+    if not _listening:
+        # Settings objects outlive a plugin reload, drop the stale callback.
+        global_settings.clear_on_change(ON_CHANGE_TAG)
+        global_settings.add_on_change(ON_CHANGE_TAG, invalidate)
+        _listening = True
+
+
+def prune(*args):
+    """
+    Drop the snapshots of closed windows.  Extra arguments are ignored so
+    that this can be used as a callback directly.
+    """
+    window_ids = {window.id() for window in sublime.windows()}
+    with _lock:
+        for key in [key for key in _snapshots if key[0] not in window_ids]:
+            del _snapshots[key]
+    reset_active()
+
 
-        if key in project_savvy_settings:
-            return project_savvy_settings[key]
+def forget_view(view_id):
+    """
+    Drop the `GitSavvy` settings kept for the view `view_id`.
+    """
+    with _lock:
+        _view_settings.pop(view_id, None)
 
-        # fall back to old style project setting
-        project_data = window.project_data()
-        if project_data and "GitSavvy" in project_data:
-            project_savvy_settings = project_data["GitSavvy"]
-            if key in project_savvy_settings:
-                return project_savvy_settings.get(key)
 
-        return self.global_settings.get(key, default)
+def _project_settings(window):
+    # Old style project setting, the view settings take precedence.
+    project_data = window.project_data()
+    if project_data and "GitSavvy" in project_data:
+        return freeze(dict(project_data["GitSavvy"] or {}))
+    return _EMPTY
+
+
+def snapshot(window, global_settings=None):
+    """
+    Return the settings snapshot of `window`.
+    """
+    if global_settings is None:
+        global_settings = sublime.load_settings(SETTINGS_FILE)
+    _ensure_listening(global_settings)
+
+    if not window:
+        return _Snapshot(_EMPTY, global_settings)
+
+    key = (window.id(), window.project_file_name())
+    with _lock:
+        cached = _snapshots.get(key)
+    if cached:
+        return cached
+
+    fresh = _Snapshot(_project_settings(window), global_settings)
+    with _lock:
+        return _snapshots.setdefault(key, fresh)
+
+
+def _read_view_settings(view):
+    return freeze(view.settings().get("GitSavvy") or {})
+
+
+def _on_view_settings_change(view):
+    fresh = _read_view_settings(view)
+    with _lock:
+        if view.id() in _view_settings:
+            _view_settings[view.id()] = fresh
+
+
+def view_settings(view):
+    """
+    Return the `GitSavvy` settings of `view`.
+    """
+    with _lock:
+        cached = _view_settings.get(view.id())
+    if cached is not None:
+        return cached
+
+    fresh = _read_view_settings(view)
+    with _lock:
+        if view.id() in _view_settings:
+            return _view_settings[view.id()]
+        _view_settings[view.id()] = fresh
+    settings = view.settings()
+    settings.clear_on_change(ON_CHANGE_TAG)
+    settings.add_on_change(ON_CHANGE_TAG, lambda: _on_view_settings_change(view))
+    return fresh
+
+
+def _active_settings(global_settings):
+    global _active
+    with _lock:
+        active, generation = _active, _generation
+    if active:
+        return active
+
+    window = sublime.active_window()
+    view = window.active_view() if window else None
+    if view:
+        view_settings(view)
+    active = (view.id() if view else None, snapshot(window, global_settings))
+    with _lock:
+        if generation == _generation:
+            _active = active
+    return active
+
+
+def get(key, default=None, global_settings=None):
+    """
+    Return the GitSavvy setting `key` of the active view.
+    """
+    view_id, window_snapshot = _active_settings(global_settings)
+    try:
+        return _view_settings.get(view_id, _EMPTY)[key]
+    except KeyError:
+        return window_snapshot.get(key, default)
+
+
+class GitSavvySettings:
+    def __init__(self, parent=None):
+        self.parent = parent
+        self.global_settings = sublime.load_settings(SETTINGS_FILE)
+
+    def get(self, key, default=None):
+        return get(key, default, self.global_settings)
 
     def set(self, key, value):
         self.global_settings.set(key, value)
+        invalidate()
 
 
 class SettingsMixin:
@@ -0,0 +1,90 @@
+"""
+De-duplicate identical concurrent calls.
+
+When a view gets activated, several event listeners (status bar, dashboard
+refresh, diff views) often ask git the very same question at the same time
+from different threads.  `run` lets the first caller (the "leader") execute
+the work while all callers arriving with the same key before it finishes
+wait for and share its result.
+"""
+
+import threading
+
+
+# Git subcommands which never modify the repository (modulo opportunistic
+# index refreshes), and whose concurrent invocations can thus be shared.
+READ_ONLY_COMMANDS = frozenset((
+    "blame",
+    "cat-file",
+    "describe",
+    "diff",
+    "diff-files",
+    "diff-index",
+    "for-each-ref",
+    "log",
+    "ls-files",
+    "ls-remote",
+    "ls-tree",
+    "merge-base",
+    "rev-list",
+    "rev-parse",
+    "show",
+    "show-ref",
+    "status",
+))
+
+
+class _Flight():
+    def __init__(self, shared=None):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.shared = shared
+
+
+if '_in_flight' not in globals():
+    _in_flight = {}
+    _in_flight_lock = threading.Lock()
+
+
+def run(key, fn, share=None):
+    """
+    Call `fn` and return its result, unless a call with the same (hashable)
+    `key` is already running, in which case wait for it and return (or
+    raise) whatever it produced.
+
+    If `share` is given, it is called once per flight to create an object
+    which is passed to `fn`, and which every caller enters (`with`) for as
+    long as it waits, e.g. a `scheduler.SharedProcess`.  A flight whose
+    shared object has been `killed` is not joined anymore.
+    """
+    with _in_flight_lock:
+        flight = _in_flight.get(key)
+        is_leader = flight is None or getattr(flight.shared, "killed", False)
+        if is_leader:
+            flight = _in_flight[key] = _Flight(share() if share else None)
+        if flight.shared is not None:
+            flight.shared.__enter__()
+
+    try:
+        if not is_leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fn(flight.shared) if share else fn()
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with _in_flight_lock:
+                if _in_flight.get(key) is flight:
+                    del _in_flight[key]
+            flight.done.set()
+
+        return flight.result
+    finally:
+        if flight.shared is not None:
+            flight.shared.__exit__(None, None, None)
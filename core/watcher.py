@@ -0,0 +1,431 @@
+"""
+Watch the git dirs of repositories with open GitSavvy views and refresh
+the views a change affects, e.g. after running git in a terminal.
+
+Changes are reported as topics:
+
+    head    `HEAD`, its reflog and in-progress merge/rebase/cherry-pick state
+    index   the index file
+    refs    the directories below `refs/` and `packed-refs`
+
+On Linux the git dir is watched with inotify, elsewhere (or if inotify is
+not available) its files are `stat()`ed every `POLL_INTERVAL` seconds.
+Events are collected until none arrived for `DEBOUNCE` seconds, but at
+most for `MAX_DELAY` seconds.  Then each open view depending on one of the
+changed topics is refreshed if it is visible, and marked to be refreshed
+on activation otherwise.
+
+The working tree itself is not watched.  Views showing it, e.g. the status
+dashboard, are still refreshed whenever they are activated.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+
+import sublime
+
+from . import repo_paths
+from .settings import GitSavvySettings
+
+
+HEAD = "head"
+INDEX = "index"
+REFS = "refs"
+ALL_TOPICS = frozenset((HEAD, INDEX, REFS))
+
+POLL_INTERVAL = 1.0
+DEBOUNCE = 0.3
+MAX_DELAY = 2.0
+
+# Files directly in the git dir, by topic.
+GIT_DIR_FILES = {
+    "HEAD": HEAD,
+    "MERGE_HEAD": HEAD,
+    "CHERRY_PICK_HEAD": HEAD,
+    "rebase-merge": HEAD,
+    "rebase-apply": HEAD,
+    "index": INDEX,
+}
+
+# The topics each kind of view depends on.
+TOPICS_BY_VIEW_KIND = {
+    "status": {HEAD, INDEX, REFS},
+    "rebase": {HEAD, INDEX, REFS},
+    "branch": {HEAD, REFS},
+    "tags": {REFS},
+    "graph": {HEAD, REFS},
+    "diff": {HEAD, INDEX},
+    "inline_diff": {HEAD, INDEX},
+}
+
+# Kinds of views which only show what is in the git dir, and so don't need
+# to be refreshed on activation while their repo is watched.
+GIT_DIR_ONLY_VIEW_KINDS = ("branch", "tags", "graph")
+
+NEEDS_REFRESH = "git_savvy.needs_refresh"
+
+
+if '_watchers' not in globals():
+    _watchers = {}
+    _lock = threading.Lock()
+
+
+def _stat(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+
+class PollingBackend():
+
+    """
+    Detect changes by comparing `stat()` results.
+    """
+
+    def __init__(self, git_dir, common_dir):
+        self.git_dir = git_dir
+        self.common_dir = common_dir
+        self._signature = self._take_signature()
+
+    def _paths(self):
+        head_paths = [
+            os.path.join(self.git_dir, name)
+            for name, topic in GIT_DIR_FILES.items()
+            if topic == HEAD
+        ]
+        head_paths.append(os.path.join(self.git_dir, "logs", "HEAD"))
+        refs_paths = [dirpath for dirpath, _, _ in os.walk(os.path.join(self.common_dir, "refs"))]
+        refs_paths.append(os.path.join(self.common_dir, "packed-refs"))
+        return {
+            HEAD: head_paths,
+            INDEX: [os.path.join(self.git_dir, "index")],
+            REFS: refs_paths,
+        }
+
+    def _take_signature(self):
+        return {
+            topic: tuple((path, _stat(path)) for path in paths)
+            for topic, paths in self._paths().items()
+        }
+
+    def poll(self, timeout):
+        """
+        Wait `timeout` seconds and return the set of topics which changed.
+        """
+        time.sleep(timeout)
+        signature = self._take_signature()
+        changed = {topic for topic in signature if signature[topic] != self._signature[topic]}
+        self._signature = signature
+        return changed
+
+    def close(self):
+        pass
+
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (
+    IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+    | IN_CREATE | IN_DELETE | IN_ONLYDIR
+)
+EVENT_HEADER = struct.Struct("iIII")
+
+
+def _load_libc():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+class InotifyBackend():
+
+    """
+    Detect changes with inotify.  Raises `OSError` if inotify is not
+    available.
+    """
+
+    _libc = None
+
+    def __init__(self, git_dir, common_dir):
+        if InotifyBackend._libc is None:
+            InotifyBackend._libc = _load_libc() or False
+        if not self._libc:
+            raise OSError("inotify is not available")
+
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        # Watch descriptor to the topics by file name, or to a single topic
+        # for every entry of a directory.
+        self._watches = {}
+        self._add_watch(git_dir, GIT_DIR_FILES)
+        self._add_watch(os.path.join(git_dir, "logs"), {"HEAD": HEAD})
+        self._add_watch(common_dir, {"packed-refs": REFS})
+        self._add_tree(os.path.join(common_dir, "refs"))
+
+    def _add_watch(self, path, topics):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            # Not there (yet), e.g. `logs/` in a fresh repository.
+            return
+        # Watching the same directory twice yields the same descriptor.
+        _, known = self._watches.get(wd, (path, None))
+        if isinstance(topics, dict) and isinstance(known, dict):
+            topics = dict(known, **topics)
+        self._watches[wd] = (path, topics)
+
+    def _add_tree(self, path):
+        for dirpath, _, _ in os.walk(path):
+            self._add_watch(dirpath, REFS)
+
+    def poll(self, timeout):
+        """
+        Wait up to `timeout` seconds for events and return the set of
+        topics which changed.
+        """
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return set()
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        changed = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                changed |= ALL_TOPICS
+                continue
+            if mask & IN_IGNORED:
+                self._watches.pop(wd, None)
+                continue
+
+            path, topics = self._watches.get(wd, (None, None))
+            if topics is None:
+                continue
+            if isinstance(topics, dict):
+                topic = topics.get(name)
+                if topic:
+                    changed.add(topic)
+                continue
+
+            changed.add(topics)
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                self._add_tree(os.path.join(path, name))
+
+        return changed
+
+    def close(self):
+        os.close(self._fd)
+
+
+class Watcher(threading.Thread):
+
+    """
+    Watch one repository and call `on_change(repo_path, topics)` with the
+    coalesced topics of all changes.
+    """
+
+    def __init__(self, repo_path, backend, on_change):
+        super().__init__(name="GitSavvy watcher {}".format(repo_path))
+        self.daemon = True
+        self.repo_path = repo_path
+        self.backend = backend
+        self.on_change = on_change
+        self._stopped = threading.Event()
+
+    def stop(self):
+        self._stopped.set()
+
+    def run(self):
+        pending = set()
+        first_event = last_event = 0
+        try:
+            while not self._stopped.is_set():
+                topics = self.backend.poll(DEBOUNCE if pending else POLL_INTERVAL)
+                now = time.time()
+                if topics:
+                    if not pending:
+                        first_event = now
+                    pending |= topics
+                    last_event = now
+
+                if pending and (now - last_event >= DEBOUNCE or now - first_event >= MAX_DELAY):
+                    if not self._stopped.is_set():
+                        self.on_change(self.repo_path, frozenset(pending))
+                    pending = set()
+        finally:
+            self.backend.close()
+
+
+def make_backend(git_dir, common_dir, mode="auto"):
+    """
+    Return an `InotifyBackend` if `mode` is "auto" and inotify can be used,
+    a `PollingBackend` otherwise.
+    """
+    if mode == "auto":
+        try:
+            return InotifyBackend(git_dir, common_dir)
+        except OSError:
+            pass
+    return PollingBackend(git_dir, common_dir)
+
+
+def view_kind(view):
+    """
+    Return the kind of GitSavvy view `view` is, see `TOPICS_BY_VIEW_KIND`,
+    or `None`.
+    """
+    settings = view.settings()
+    interface_type = settings.get("git_savvy.interface")
+    if interface_type:
+        return interface_type
+    if settings.get("git_savvy.log_graph_view"):
+        return "graph"
+    if settings.get("git_savvy.diff_view"):
+        return "diff"
+    if settings.get("git_savvy.inline_diff_view"):
+        return "inline_diff"
+    return None
+
+
+def _watched_views(repo_path):
+    for window in sublime.windows():
+        for view in window.views():
+            if (
+                view_kind(view) in TOPICS_BY_VIEW_KIND
+                and view.settings().get("git_savvy.repo_path") == repo_path
+            ):
+                yield window, view
+
+
+def watch_view(view):
+    """
+    Start watching the repository of `view` if it is a GitSavvy view.
+    """
+    repo_path = view.settings().get("git_savvy.repo_path")
+    if not repo_path or view_kind(view) not in TOPICS_BY_VIEW_KIND:
+        return
+
+    with _lock:
+        if repo_path in _watchers:
+            return
+        mode = GitSavvySettings().get("watch_git_dir")
+        if not mode:
+            return
+        dirs = repo_paths.git_dirs(repo_path)
+        if not dirs:
+            return
+        watcher = _watchers[repo_path] = Watcher(repo_path, make_backend(*dirs, mode=mode), _on_change)
+    watcher.start()
+
+
+def is_watched(repo_path):
+    return repo_path in _watchers
+
+
+def prune():
+    """
+    Stop watching repositories without open GitSavvy views.
+    """
+    for repo_path in list(_watchers):
+        if not any(True for _ in _watched_views(repo_path)):
+            stop(repo_path)
+
+
+def stop(repo_path=None):
+    """
+    Stop watching `repo_path`, or all repositories.
+    """
+    with _lock:
+        repo_paths_ = [repo_path] if repo_path else list(_watchers)
+        watchers = [_watchers.pop(path) for path in repo_paths_ if path in _watchers]
+    for watcher in watchers:
+        watcher.stop()
+
+
+def _on_change(repo_path, topics):
+    sublime.set_timeout(lambda: refresh_views(repo_path, topics))
+
+
+def refresh_views(repo_path, topics):
+    """
+    Refresh the visible views of `repo_path` which depend on one of `topics`,
+    and mark the others to be refreshed on activation.
+    """
+    for window, view in _watched_views(repo_path):
+        if not TOPICS_BY_VIEW_KIND[view_kind(view)] & topics:
+            continue
+
+        visible = any(
+            window.active_view_in_group(group) == view
+            for group in range(window.num_groups())
+        )
+        if visible:
+            _refresh_view(view)
+        else:
+            view.settings().set(NEEDS_REFRESH, True)
+
+
+def _refresh_view(view):
+    view.settings().erase(NEEDS_REFRESH)
+    kind = view_kind(view)
+    if kind == "graph":
+        view.run_command("gs_log_graph_refresh", {"background": True})
+    elif kind == "diff":
+        view.run_command("gs_diff_refresh", {"sync": False})
+    elif kind == "inline_diff":
+        view.run_command("gs_inline_diff_refresh", {"sync": False})
+    else:
+        view.run_command("gs_interface_refresh", {"background": True})
+
+
+def is_fresh(view):
+    """
+    Return whether `view` is known to be up to date, i.e. it only shows what
+    is in the git dir, its repository is watched and no change to it has
+    been seen since the view was last refreshed.
+    """
+    settings = view.settings()
+    if (
+        view_kind(view) not in GIT_DIR_ONLY_VIEW_KINDS
+        or not is_watched(settings.get("git_savvy.repo_path"))
+    ):
+        return False
+    if settings.get(NEEDS_REFRESH):
+        settings.erase(NEEDS_REFRESH)
+        return False
+    return True
@@ -17,6 +17,11 @@ else:
         if savvy_settings.get("load_additional_codecs"):
             sublime.set_timeout_async(reload_codecs, 0)
 
+    def plugin_unloaded():
+        from .core import cat_file, watcher
+        cat_file.stop_all()
+        watcher.stop()
+
     def reload_codecs():
         savvy_settings = sublime.load_settings("GitSavvy.sublime-settings")
         fallback_encoding = savvy_settings.get("fallback_encoding")
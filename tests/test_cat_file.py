@@ -0,0 +1,83 @@
+import os
+import shutil
+import subprocess
+import tempfile
+
+from unittesting import DeferrableTestCase
+
+from GitSavvy.core import cat_file
+
+
+BINARY = b"\x00\x01\xff\r\n\x00\n"
+
+
+class TestCatFileServer(DeferrableTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.repo_path = tempfile.mkdtemp()
+        cls.git("init", "-q")
+        cls.git("-c", "user.name=GitSavvy", "-c", "user.email=git@savvy", "commit", "-q",
+                "--allow-empty", "-m", "Initial commit")
+        with open(os.path.join(cls.repo_path, "binary"), "wb") as f:
+            f.write(BINARY)
+        cls.binary_oid = cls.git("hash-object", "-w", "binary").strip()
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.repo_path, ignore_errors=True)
+
+    @classmethod
+    def git(cls, *args):
+        return subprocess.check_output(("git", ) + args, cwd=cls.repo_path).decode()
+
+    def setUp(self):
+        self.server = cat_file.CatFileServer(shutil.which("git"), self.repo_path)
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_missing_objects(self):
+        self.assertIsNone(self.server.request("0" * 40))
+        self.assertIsNone(self.server.request("HEAD:does-not-exist"))
+        with self.assertRaises(cat_file.CatFileError):
+            self.server.request("HEAD\nHEAD")
+
+    def test_binary_blob(self):
+        info, content = self.server.request(self.binary_oid)
+        self.assertEqual(info, cat_file.ObjectInfo(self.binary_oid, "blob", len(BINARY)))
+        self.assertEqual(content, BINARY)
+
+    def test_batch_check(self):
+        server = cat_file.CatFileServer(shutil.which("git"), self.repo_path, mode="batch-check")
+        try:
+            info, content = server.request(self.binary_oid)
+        finally:
+            server.stop()
+        self.assertEqual((info.type, info.size, content), ("blob", len(BINARY), None))
+
+    def test_restart_after_the_process_died(self):
+        self.server.request(self.binary_oid)
+        process = self.server._process
+        process.kill()
+        process.wait()
+
+        info, content = self.server.request(self.binary_oid)
+        self.assertEqual(content, BINARY)
+        self.assertIsNot(self.server._process, process)
+
+    def test_idle_shutdown(self):
+        self.server.idle_timeout = 0.5
+        self.server.request(self.binary_oid)
+        timer = self.server._idle_timer
+        for _ in range(20):
+            self.server.request(self.binary_oid)
+        # Requests don't start a timer each.
+        self.assertIs(self.server._idle_timer, timer)
+
+        process = self.server._process
+        yield lambda: self.server._process is None
+        self.assertIsNotNone(process.poll())
+
+        info, content = self.server.request(self.binary_oid)
+        self.assertEqual(content, BINARY)
@@ -0,0 +1,141 @@
+import os
+import subprocess
+
+import sublime
+
+from .common import GitRepoTestCase, startupinfo
+from GitSavvy.core import git_command
+from GitSavvy.core.interfaces.branch import BranchInterface
+from GitSavvy.tests.mockito import unstub, when
+
+
+class TestBranchInterface(GitRepoTestCase, git_command.GitCommand):
+
+    @classmethod
+    def setUpClass(cls):
+        yield from super().setUpClass()
+        commands = [("branch", "feature"), ("branch", "fix")]
+        # Cleaned up together with the repo.
+        for remote_name, branch in (("origin", "feature"), ("upstream", "fix")):
+            remote_dir = os.path.join(cls._temp_dir, remote_name + ".git")
+            url = "file:///" + remote_dir.replace(os.sep, "/").lstrip("/")
+            commands += [
+                ("init", "--bare", remote_dir),
+                ("remote", "add", remote_name, url),
+                ("push", remote_name, branch),
+            ]
+        for args in commands:
+            subprocess.check_call(("git", ) + args, cwd=cls._temp_dir, startupinfo=startupinfo)
+
+    def setUp(self):
+        self.views = []
+        # The dashboard would move the cursor away from where a test puts it.
+        when(BranchInterface).on_new_dashboard().thenReturn(None)
+
+    def tearDown(self):
+        unstub()
+        for view in self.views:
+            view.set_scratch(True)
+            view.close()
+
+    def create_interface(self):
+        interface = BranchInterface(repo_path=self._temp_dir)
+        self.views.append(interface.view)
+        interface.show_remotes = True
+        return interface
+
+    def record_branch_loads(self, interface):
+        loads = []
+        get_branches = interface.get_branches
+
+        def answer(*args, **kwargs):
+            loads.append(kwargs["refs"])
+            return get_branches(*args, **kwargs)
+
+        when(interface).get_branches(...).thenAnswer(answer)
+        return loads
+
+    def content(self, interface):
+        return interface.view.substr(sublime.Region(0, interface.view.size()))
+
+    def find(self, interface, text, start=0):
+        region = interface.view.find(text, start, sublime.LITERAL)
+        self.assertFalse(region.empty(), text)
+        return region
+
+    def test_get_branches_of_one_remote(self):
+        self.assertEqual(
+            [branch.name_with_remote for branch in self.get_branches(refs=("refs/remotes/origin", ))],
+            ["origin/feature"]
+        )
+        self.assertEqual(
+            [branch.name for branch in self.get_branches(refs=("refs/heads", ))],
+            sorted(["feature", "fix", self.get_current_branch_name()])
+        )
+
+    def test_remotes_are_collapsed_and_not_loaded(self):
+        interface = self.create_interface()
+        loads = self.record_branch_loads(interface)
+        interface.render()
+
+        self.assertEqual(loads, [("refs/heads", )])
+        content = self.content(interface)
+        self.assertIn("  ▸ REMOTE (origin)\n", content)
+        self.assertIn("  ▸ REMOTE (upstream)\n", content)
+        self.assertNotIn("REMOTE (origin):", content)
+
+    def test_get_remote_at(self):
+        interface = self.create_interface()
+        interface.expanded_remotes = {"origin"}
+        interface.render()
+
+        header = self.find(interface, "  REMOTE (origin):")
+        branch = self.find(interface, "feature", header.end())
+        collapsed = self.find(interface, "  ▸ REMOTE (upstream)")
+        local_branch = self.find(interface, "feature")
+        self.assertEqual(interface.get_remote_at(header.begin()), "origin")
+        self.assertEqual(interface.get_remote_at(branch.begin()), "origin")
+        self.assertEqual(interface.get_remote_at(collapsed.end()), "upstream")
+        self.assertIsNone(interface.get_remote_at(local_branch.begin()))
+
+    def test_toggle_expands_only_the_remote_under_the_cursor(self):
+        interface = self.create_interface()
+        interface.render()
+        loads = self.record_branch_loads(interface)
+
+        interface.view.sel().clear()
+        interface.view.sel().add(self.find(interface, "  ▸ REMOTE (upstream)").begin())
+        interface.view.run_command("gs_branches_toggle_remotes")
+        yield lambda: "REMOTE (upstream):" in self.content(interface)
+
+        self.assertEqual(interface.expanded_remotes, {"upstream"})
+        self.assertEqual(loads, [("refs/heads", ), ("refs/remotes/upstream", )])
+        content = self.content(interface)
+        self.assertIn("  ▸ REMOTE (origin)\n", content)
+        self.assertIn("fix", content[content.index("REMOTE (upstream):"):])
+
+        interface.view.sel().clear()
+        interface.view.sel().add(self.find(interface, "  REMOTE (upstream):").begin())
+        interface.view.run_command("gs_branches_toggle_remotes")
+        yield lambda: "REMOTE (upstream):" not in self.content(interface)
+
+        self.assertEqual(interface.expanded_remotes, set())
+        self.assertTrue(interface.show_remotes)
+
+    def test_filter_branches(self):
+        interface = self.create_interface()
+        interface.expanded_remotes = {"origin", "upstream"}
+        interface.render()
+
+        interface.filter_text = "FEA"
+        self.assertEqual(
+            [branch.name for branch in interface.filter_branches(interface._branches)], ["feature"])
+        self.assertEqual(interface.filter_branches(interface._remote_branches["upstream"]), [])
+
+        # Typing a filter only draws what is already loaded.
+        when(interface).git(...).thenRaise(AssertionError("git should not run"))
+        interface.draw()
+        content = self.content(interface)
+        self.assertIn("FILTER:  FEA", content)
+        self.assertNotIn("fix", content)
+        self.assertIn("feature", content[content.index("REMOTE (origin):"):])
@@ -0,0 +1,37 @@
+import subprocess
+
+from .common import GitRepoTestCase, startupinfo
+from GitSavvy.core import git_command
+from GitSavvy.core.git_mixins import git_dir
+from GitSavvy.tests.mockito import spy2, unstub, verify, when
+
+
+class TestBranchDescriptions(GitRepoTestCase, git_command.GitCommand):
+
+    @classmethod
+    def setUpClass(cls):
+        yield from super().setUpClass()
+        for name, description in (("feature", "Add a feature\n"), ("Fix/Dots.v2", "Line 1\nLine 2\n")):
+            subprocess.check_call(("git", "branch", name), cwd=cls._temp_dir, startupinfo=startupinfo)
+            subprocess.check_call(
+                ("git", "config", "branch.{}.description".format(name), description),
+                cwd=cls._temp_dir, startupinfo=startupinfo)
+
+    def tearDown(self):
+        unstub()
+
+    def assertDescriptions(self, descriptions):
+        self.assertEqual(descriptions, {
+            "feature": "Add a feature\n",
+            "Fix/Dots.v2": "Line 1\nLine 2\n",
+        })
+
+    def test_read_from_git_dir_without_git(self):
+        when(self).git(...).thenRaise(AssertionError("git should not run"))
+        self.assertDescriptions(self.get_branch_descriptions())
+
+    def test_one_git_call_for_all_branches(self):
+        when(git_dir).git_dirs(...).thenReturn(git_dir.UNKNOWN)
+        spy2(self.git)
+        self.assertDescriptions(self.get_branch_descriptions())
+        verify(self, times=1).git(...)
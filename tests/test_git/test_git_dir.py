@@ -0,0 +1,149 @@
+import os
+import shutil
+import tempfile
+
+from unittesting import DeferrableTestCase
+
+from GitSavvy.core.git_mixins import git_dir
+from GitSavvy.core.git_mixins.git_dir import UNKNOWN
+
+
+SHA_A = "a" * 40
+SHA_B = "b" * 40
+SHA_C = "c" * 40
+
+CONFIG = """\
+[core]
+    bare = false
+[branch "feature"]
+    remote = origin
+    merge = refs/heads/main
+[branch "local"]
+    remote = .
+    merge = refs/heads/feature
+[remote "origin"]
+    url = https://example.com/repo.git
+    fetch = +refs/heads/*:refs/remotes/upstream/*
+"""
+
+
+class TestGitDir(DeferrableTestCase):
+
+    def setUp(self):
+        self.repo_path = tempfile.mkdtemp()
+        self.git_dir = os.path.join(self.repo_path, ".git")
+        self.write("HEAD", "ref: refs/heads/feature\n")
+        self.write("config", CONFIG)
+        os.makedirs(os.path.join(self.git_dir, "refs", "heads"))
+
+    def tearDown(self):
+        shutil.rmtree(self.repo_path, ignore_errors=True)
+
+    def write(self, name, content):
+        path = os.path.join(self.git_dir, *name.split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+
+    def resolve(self, refname):
+        return git_dir.resolve_ref(self.git_dir, self.git_dir, refname)
+
+    def test_git_dirs(self):
+        self.assertEqual(git_dir.git_dirs(self.repo_path), (self.git_dir, self.git_dir))
+
+    def test_reftable_is_unknown(self):
+        os.makedirs(os.path.join(self.git_dir, "reftable"))
+        self.assertIs(git_dir.git_dirs(self.repo_path), UNKNOWN)
+
+    def test_packed_refs(self):
+        self.write("packed-refs", "\n".join((
+            "# pack-refs with: peeled fully-peeled sorted",
+            SHA_A + " refs/heads/main",
+            SHA_B + " refs/tags/v1.0",
+            "^" + SHA_C,
+            "",
+        )))
+        self.write("refs/heads/feature", SHA_C + "\n")
+        self.assertEqual(self.resolve("refs/heads/main"), SHA_A)
+        self.assertEqual(self.resolve("refs/tags/v1.0"), SHA_B)
+        self.assertIsNone(self.resolve("refs/heads/missing"))
+        # Loose refs win over packed ones.
+        self.write("refs/heads/main", SHA_B + "\n")
+        self.assertEqual(self.resolve("refs/heads/main"), SHA_B)
+
+    def test_garbage_in_packed_refs_is_unknown(self):
+        self.write("packed-refs", "not a ref line\n")
+        self.assertIs(self.resolve("refs/heads/main"), UNKNOWN)
+
+    def test_symref_chain(self):
+        self.write("refs/heads/feature", "ref: refs/heads/main\n")
+        self.write("refs/heads/main", SHA_A + "\n")
+        self.assertEqual(git_dir.read_head(self.git_dir), "refs/heads/feature")
+        self.assertEqual(self.resolve("HEAD"), SHA_A)
+
+    def test_symref_loop_is_unknown(self):
+        self.write("refs/heads/feature", "ref: refs/heads/main\n")
+        self.write("refs/heads/main", "ref: refs/heads/feature\n")
+        self.assertIs(self.resolve("HEAD"), UNKNOWN)
+
+    def test_detached_head(self):
+        self.write("HEAD", SHA_A + "\n")
+        self.assertIsNone(git_dir.read_head(self.git_dir))
+        self.assertEqual(self.resolve("HEAD"), SHA_A)
+
+    def test_escaped_config_values(self):
+        for raw, value in (
+            ('plain value  ', "plain value"),
+            ('value ; comment', "value"),
+            ('value # comment', "value"),
+            ('"quoted ; value "', "quoted ; value "),
+            (r'tab\there', "tab\there"),
+            (r'"Line 1\nLine 2\n"', "Line 1\nLine 2\n"),
+            (r'back\\slash', "back\\slash"),
+            (r'"say \"hi\""', 'say "hi"'),
+            (r'trailing\ ', UNKNOWN),
+            ('"unterminated', UNKNOWN),
+        ):
+            if value is UNKNOWN:
+                self.assertIs(git_dir._parse_config_value(raw), UNKNOWN, raw)
+            else:
+                self.assertEqual(git_dir._parse_config_value(raw), value, raw)
+
+    def test_config_values(self):
+        self.assertEqual(
+            git_dir.config_values(self.git_dir, self.git_dir, "branch", "feature", "merge"),
+            ["refs/heads/main"]
+        )
+        self.assertEqual(
+            git_dir.config_subsections(self.git_dir, self.git_dir, "branch", "remote"),
+            {"feature": ["origin"], "local": ["."]}
+        )
+
+    def test_config_includes_are_unknown(self):
+        self.write("config", CONFIG + "[include]\n    path = other.config\n")
+        self.assertIs(
+            git_dir.config_values(self.git_dir, self.git_dir, "branch", "feature", "merge"), UNKNOWN)
+
+    def test_upstream_is_mapped_through_refspecs(self):
+        self.write("refs/remotes/upstream/main", SHA_A + "\n")
+        self.assertEqual(git_dir.read_upstream(self.git_dir, self.git_dir), "upstream/main")
+
+    def test_local_upstream(self):
+        self.write("HEAD", "ref: refs/heads/local\n")
+        self.write("refs/heads/feature", SHA_A + "\n")
+        self.assertEqual(git_dir.read_upstream(self.git_dir, self.git_dir), "feature")
+
+    def test_missing_upstream(self):
+        self.write("HEAD", "ref: refs/heads/main\n")
+        self.assertEqual(git_dir.read_upstream(self.git_dir, self.git_dir), "")
+        # Git refuses to show upstreams which don't exist locally.
+        self.write("HEAD", "ref: refs/heads/feature\n")
+        self.assertIs(git_dir.read_upstream(self.git_dir, self.git_dir), UNKNOWN)
+
+    def test_rebase_state(self):
+        self.assertIsNone(git_dir.rebase_dir(self.git_dir))
+        self.write("rebase-merge/head-name", "refs/heads/feature\n")
+        rebase_dir = git_dir.rebase_dir(self.git_dir)
+        self.assertEqual(rebase_dir, os.path.join(self.git_dir, "rebase-merge"))
+        self.assertEqual(git_dir.read_state_file(rebase_dir, "head-name"), "refs/heads/feature")
+        self.assertIsNone(git_dir.read_state_file(rebase_dir, "onto"))
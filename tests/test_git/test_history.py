@@ -0,0 +1,31 @@
+import subprocess
+
+from .common import GitRepoTestCase, startupinfo
+from GitSavvy.core import git_command
+
+
+class TestLogEmptyMessage(GitRepoTestCase, git_command.GitCommand):
+
+    @classmethod
+    def setUpClass(cls):
+        yield from super().setUpClass()
+        for message in ("", "After an empty message"):
+            subprocess.check_call(
+                ("git", "commit", "--allow-empty", "--allow-empty-message", "-m", message),
+                cwd=cls._temp_dir, startupinfo=startupinfo)
+
+    def assertEntries(self, entries):
+        self.assertEqual(
+            [(entry.summary, entry.raw_body) for entry in entries],
+            [
+                ("After an empty message", "After an empty message"),
+                ("", ""),
+                ("Add README.md", "Add README.md"),
+            ]
+        )
+
+    def test_log(self):
+        self.assertEntries(self.log())
+
+    def test_log_stream(self):
+        self.assertEntries(list(self.log(stream=True)))
@@ -0,0 +1,84 @@
+import os
+import shutil
+import subprocess
+import tempfile
+
+from unittesting import DeferrableTestCase
+
+from GitSavvy.core.git_mixins import index_file
+
+
+FILES = ("a.txt", "dir/b.txt", "dir/sub/c.txt", "ünïcode.txt", "assume.txt", "skip.txt", "zz.txt")
+
+
+class TestReadIndex(DeferrableTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.repo_path = tempfile.mkdtemp()
+        cls.git("init", "-q")
+        for name in FILES:
+            path = os.path.join(cls.repo_path, *name.split("/"))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(name)
+        cls.git("add", "--", *FILES)
+        cls.git("update-index", "--assume-unchanged", "assume.txt")
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.repo_path, ignore_errors=True)
+
+    @classmethod
+    def git(cls, *args):
+        return subprocess.check_output(("git", ) + args, cwd=cls.repo_path)
+
+    def ls_files(self):
+        entries = []
+        for record in self.git("ls-files", "-s", "-z").split(b"\0"):
+            if record:
+                info, path = record.split(b"\t", 1)
+                mode, oid, stage = info.split(b" ")
+                entries.append((path, int(mode, 8), oid.decode(), int(stage)))
+        return entries
+
+    def assertMatchesGit(self, version):
+        self.git("update-index", "--index-version", str(version))
+        index = index_file.read_index(self.repo_path)
+        self.assertEqual(index.version, version)
+
+        entries = list(index.entries())
+        self.assertEqual(
+            [(entry.path, entry.mode, entry.oid, entry.stage) for entry in entries],
+            self.ls_files()
+        )
+        return {entry.path: entry for entry in entries}
+
+    def test_version_2(self):
+        entries = self.assertMatchesGit(2)
+        self.assertTrue(entries[b"assume.txt"].assume_unchanged)
+        self.assertEqual(sum(entry.assume_unchanged for entry in entries.values()), 1)
+
+    def test_version_3_and_4_with_extended_flags(self):
+        self.git("update-index", "--skip-worktree", "skip.txt")
+        with open(os.path.join(self.repo_path, "ita.txt"), "w") as f:
+            f.write("intent to add")
+        self.git("add", "-N", "ita.txt")
+        try:
+            for version in (3, 4):
+                entries = self.assertMatchesGit(version)
+                self.assertTrue(entries[b"assume.txt"].assume_unchanged)
+                self.assertTrue(entries[b"skip.txt"].skip_worktree)
+                self.assertTrue(entries[b"ita.txt"].intent_to_add)
+                self.assertEqual(
+                    [path for path, entry in entries.items()
+                     if entry.skip_worktree or entry.intent_to_add],
+                    [b"ita.txt", b"skip.txt"]
+                )
+                self.assertEqual(
+                    [entry.path for entry in index_file.read_index(self.repo_path).lookup("ünïcode.txt".encode())],
+                    ["ünïcode.txt".encode()]
+                )
+        finally:
+            self.git("update-index", "--no-skip-worktree", "skip.txt")
+            self.git("rm", "-q", "--cached", "ita.txt")
@@ -0,0 +1,129 @@
+import os
+import shutil
+import subprocess
+import tempfile
+
+import sublime
+
+from .common import GitRepoTestCase, startupinfo
+from GitSavvy.core import git_command, remote_tags_cache
+from GitSavvy.core.interfaces.tags import TagsInterface
+from GitSavvy.tests.mockito import unstub, when
+
+
+CACHED_TAGS = [("abcdef0", "v9.9.9")]
+
+
+class TestRemoteTagsCache(GitRepoTestCase, git_command.GitCommand):
+
+    @classmethod
+    def setUpClass(cls):
+        yield from super().setUpClass()
+        # Cleaned up together with the repo.
+        cls.remote_dir = os.path.join(cls._temp_dir, "remote.git")
+        cls.url = "file:///" + cls.remote_dir.replace(os.sep, "/").lstrip("/")
+        for args in (
+            ("init", "--bare", cls.remote_dir),
+            ("tag", "v1.0.0"),
+            ("tag", "-a", "v1.1.0", "-m", "Annotated"),
+            ("remote", "add", "origin", cls.url),
+            ("push", "origin", "--tags"),
+        ):
+            subprocess.check_call(("git", ) + args, cwd=cls._temp_dir, startupinfo=startupinfo)
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        when(remote_tags_cache).cache_dir().thenReturn(self.cache_dir)
+        self.views = []
+        # Run the listings when the test says so.
+        self.fetches = []
+        when(remote_tags_cache).submit_fetch(...).thenAnswer(lambda key, fn: self.fetches.append(fn))
+
+    def tearDown(self):
+        unstub()
+        for view in self.views:
+            view.set_scratch(True)
+            view.close()
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def create_interface(self):
+        interface = TagsInterface(repo_path=self._temp_dir)
+        self.views.append(interface.view)
+        interface.show_remotes = True
+        interface.render()
+        return interface
+
+    def content(self, interface):
+        return interface.view.substr(sublime.Region(0, interface.view.size()))
+
+    def expire(self):
+        when(remote_tags_cache).age(...).thenReturn(10 ** 6)
+
+    def test_store_and_load_tags_of_a_remote(self):
+        tags = self.get_tags("origin")
+        self.assertEqual([tag.tag for tag in tags], ["v1.1.0", "v1.0.0"])
+
+        remote_tags_cache.store(self.repo_path, self.url, tags)
+        entry = remote_tags_cache.load(self.repo_path, self.url)
+        self.assertEqual(entry.tags, [tuple(tag) for tag in tags])
+        self.assertLess(remote_tags_cache.age(entry), 60)
+
+    def test_entries_are_kept_per_repo_and_url(self):
+        remote_tags_cache.store(self.repo_path, self.url, [("abcdef0", "v1.0.0")])
+        self.assertIsNone(remote_tags_cache.load(self.repo_path, self.url + "/other"))
+        self.assertIsNone(remote_tags_cache.load(self.repo_path + "/other", self.url))
+
+        remote_tags_cache.discard(self.repo_path, self.url)
+        self.assertIsNone(remote_tags_cache.load(self.repo_path, self.url))
+
+    def test_fresh_cached_tags_are_shown_without_listing(self):
+        remote_tags_cache.store(self._temp_dir, self.url, CACHED_TAGS)
+        interface = self.create_interface()
+
+        self.assertIn("abcdef0 v9.9.9", self.content(interface))
+        self.assertEqual(self.fetches, [])
+
+    def test_expired_cached_tags_are_shown_until_listed_again(self):
+        remote_tags_cache.store(self._temp_dir, self.url, CACHED_TAGS)
+        self.expire()
+        interface = self.create_interface()
+        self.assertIn("abcdef0 v9.9.9", self.content(interface))
+
+        fetch, = self.fetches
+        fetch()
+        content = self.content(interface)
+        self.assertNotIn("v9.9.9", content)
+        self.assertIn("v1.1.0", content)
+        self.assertEqual(
+            remote_tags_cache.load(self._temp_dir, self.url).tags,
+            [tuple(tag) for tag in self.get_tags("origin")]
+        )
+
+    def test_refresh_lists_fresh_tags_again(self):
+        remote_tags_cache.store(self._temp_dir, self.url, CACHED_TAGS)
+        interface = self.create_interface()
+        self.assertEqual(self.fetches, [])
+
+        interface.reset_remotes()
+        interface.render()
+        self.assertEqual(len(self.fetches), 1)
+
+    def test_unchanged_tags_are_not_rendered_again(self):
+        remote_tags_cache.store(self._temp_dir, self.url, self.get_tags("origin"))
+        self.expire()
+        interface = self.create_interface()
+
+        when(interface).render(...).thenRaise(AssertionError("nothing changed"))
+        fetch, = self.fetches
+        fetch()
+
+    def test_empty_listing_keeps_cached_tags(self):
+        remote_tags_cache.store(self._temp_dir, self.url, CACHED_TAGS)
+        self.expire()
+        interface = self.create_interface()
+
+        when(interface).get_tags("origin").thenReturn([])
+        fetch, = self.fetches
+        fetch()
+        self.assertIn("abcdef0 v9.9.9", self.content(interface))
+        self.assertEqual(remote_tags_cache.load(self._temp_dir, self.url).tags, CACHED_TAGS)
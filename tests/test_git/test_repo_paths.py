@@ -0,0 +1,108 @@
+import os
+import shutil
+import subprocess
+import tempfile
+
+from unittesting import DeferrableTestCase
+
+from .common import startupinfo
+from GitSavvy.core import git_command, repo_paths
+from GitSavvy.core.repo_paths import UNKNOWN
+from GitSavvy.tests.mockito import unstub, when
+
+
+class TestRepoPaths(DeferrableTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_dir = os.path.realpath(tempfile.mkdtemp())
+        cls.repo_path = os.path.join(cls.temp_dir, "repo")
+        cls.worktree_path = os.path.join(cls.temp_dir, "worktree")
+        os.makedirs(os.path.join(cls.repo_path, "sub", "deeper"))
+        cls.git("init", "-q")
+        cls.git("commit", "-q", "--allow-empty", "-m", "Initial")
+        cls.git("worktree", "add", "-q", "-b", "worktree", cls.worktree_path)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.temp_dir, ignore_errors=True)
+
+    @classmethod
+    def git(cls, *args, cwd=None):
+        subprocess.check_call(("git", ) + args, cwd=cwd or cls.repo_path, startupinfo=startupinfo)
+
+    def setUp(self):
+        repo_paths.clear_cache()
+
+    def tearDown(self):
+        unstub()
+        repo_paths.clear_cache()
+
+    def path(self, *parts):
+        return os.path.join(self.repo_path, *parts)
+
+    def test_repo(self):
+        self.assertEqual(repo_paths.find_toplevel(self.repo_path), self.repo_path)
+        git_dir = self.path(".git")
+        self.assertEqual(repo_paths.git_dirs(self.repo_path), (git_dir, git_dir))
+
+    def test_subdirectory(self):
+        self.assertEqual(repo_paths.find_toplevel(self.path("sub", "deeper")), self.repo_path)
+
+    def test_outside_of_a_repo(self):
+        self.assertIsNone(repo_paths.find_toplevel(self.temp_dir))
+
+    def test_linked_worktree(self):
+        # The worktree has a `.git` file pointing into the main repo.
+        self.assertTrue(os.path.isfile(os.path.join(self.worktree_path, ".git")))
+        self.assertEqual(repo_paths.find_toplevel(self.worktree_path), self.worktree_path)
+        self.assertEqual(
+            repo_paths.git_dirs(self.worktree_path),
+            (self.path(".git", "worktrees", "worktree"), self.path(".git"))
+        )
+
+    def test_results_are_cached(self):
+        folder = self.path("sub", "deeper")
+        self.assertEqual(repo_paths.find_toplevel(folder), self.repo_path)
+        when(repo_paths)._walk_up(...).thenRaise(AssertionError("should be cached"))
+        self.assertEqual(repo_paths.find_toplevel(folder), self.repo_path)
+
+    def test_dot_git_appearing_and_disappearing(self):
+        folder = self.path("sub", "deeper")
+        nested = self.path("sub")
+        self.assertEqual(repo_paths.find_toplevel(folder), self.repo_path)
+
+        self.git("init", "-q", cwd=nested)
+        try:
+            self.assertEqual(repo_paths.find_toplevel(folder), nested)
+        finally:
+            shutil.rmtree(os.path.join(nested, ".git"))
+        self.assertEqual(repo_paths.find_toplevel(folder), self.repo_path)
+
+    def test_layouts_git_has_to_resolve(self):
+        self.assertIs(repo_paths.find_toplevel(self.path(".git")), UNKNOWN)
+        self.assertIs(repo_paths.find_toplevel(self.path(".git", "refs")), UNKNOWN)
+        self.assertIs(repo_paths.find_toplevel(self.repo_path, env={"GIT_DIR": ".git"}), UNKNOWN)
+
+    def test_git_fallback(self):
+        command = git_command.GitCommand()
+        settings = {"env": {"GIT_CEILING_DIRECTORIES": self.temp_dir}}
+        get = command.savvy_settings.get
+        when(command.savvy_settings).get(...).thenAnswer(
+            lambda key, default=None: settings[key] if key in settings else get(key, default))
+        calls = []
+        git = command.git
+
+        def answer(*args, **kwargs):
+            calls.append(args)
+            return git(*args, **kwargs)
+
+        when(command).git(...).thenAnswer(answer)
+        folder = self.path("sub")
+        self.assertEqual(command.find_git_toplevel(folder, throw_on_stderr=True), self.repo_path)
+        self.assertEqual(calls, [("rev-parse", "--show-toplevel")])
+
+        # Without special environment variables git is not asked.
+        del settings["env"]
+        self.assertEqual(command.find_git_toplevel(folder, throw_on_stderr=True), self.repo_path)
+        self.assertEqual(len(calls), 1)
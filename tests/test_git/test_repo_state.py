@@ -0,0 +1,127 @@
+import os
+import subprocess
+
+from .common import GitRepoTestCase, startupinfo
+from GitSavvy.core import git_command, repo_state
+from GitSavvy.core.git_mixins import git_dir
+from GitSavvy.tests.mockito import unstub, when
+
+
+class Values:
+    def __init__(self, repo_path):
+        self.repo_path = repo_path
+        self.calls = []
+
+    def get_repo_path(self, offer_init=False):
+        return self.repo_path
+
+    @repo_state.cached(depends_on=("config", ))
+    def value(self, n):
+        self.calls.append(n)
+        return n
+
+
+class TestRepoState(GitRepoTestCase, git_command.GitCommand):
+
+    def setUp(self):
+        # Changes made by the tests are just as recent as racy ones, so
+        # trust all timestamps unless a test says otherwise.
+        self.racy_threshold = repo_state.RACY_THRESHOLD
+        repo_state.RACY_THRESHOLD = -60
+        repo_state.invalidate()
+
+        # Count the git calls of every computation, which would otherwise
+        # read some answers from the git dir.
+        when(git_dir).git_dirs(...).thenReturn(git_dir.UNKNOWN)
+        self.git_calls = []
+        git = self.git
+
+        def count(*args, **kwargs):
+            self.git_calls.append(args[0])
+            return git(*args, **kwargs)
+
+        when(self).git(...).thenAnswer(count)
+
+    def tearDown(self):
+        repo_state.RACY_THRESHOLD = self.racy_threshold
+        repo_state.invalidate()
+        unstub()
+
+    def run_git(self, *args):
+        subprocess.check_call(("git", ) + args, cwd=self.repo_path, startupinfo=startupinfo)
+
+    def assertCached(self, fn, cached=True):
+        calls = len(self.git_calls)
+        result = fn()
+        self.assertEqual(len(self.git_calls) == calls, cached)
+        return result
+
+    def branch_names(self):
+        return [branch.name for branch in self.get_branches()]
+
+    def test_unchanged_state_is_served_from_cache(self):
+        first = self.assertCached(self.branch_names, cached=False)
+        self.assertEqual(self.assertCached(self.branch_names), first)
+        self.assertCached(self.get_current_branch_name, cached=False)
+        self.assertCached(self.get_current_branch_name)
+        self.assertCached(self.get_stashes, cached=False)
+        self.assertCached(self.get_stashes)
+
+    def test_new_branch(self):
+        self.assertCached(self.branch_names, cached=False)
+        self.run_git("branch", "test-new-branch")
+        self.assertIn("test-new-branch", self.assertCached(self.branch_names, cached=False))
+        self.run_git("branch", "-D", "test-new-branch")
+
+    def test_checkout(self):
+        branch = self.assertCached(self.get_current_branch_name, cached=False)
+        self.run_git("checkout", "-q", "-b", "test-checkout")
+        try:
+            self.assertEqual(self.assertCached(self.get_current_branch_name, cached=False), "test-checkout")
+        finally:
+            self.run_git("checkout", "-q", branch)
+            self.run_git("branch", "-D", "test-checkout")
+
+    def test_commit(self):
+        before = self.assertCached(self.get_branches, cached=False)
+        self.run_git("commit", "-q", "--allow-empty", "-m", "Empty")
+        after = self.assertCached(self.get_branches, cached=False)
+        self.assertNotEqual(
+            [branch.commit_hash for branch in before], [branch.commit_hash for branch in after])
+
+    def test_stash(self):
+        self.assertEqual(self.assertCached(self.get_stashes, cached=False), [])
+        with open(os.path.join(self.repo_path, "README.md"), "a") as f:
+            f.write("changed")
+        self.run_git("stash", "-q")
+        try:
+            self.assertEqual(len(self.assertCached(self.get_stashes, cached=False)), 1)
+        finally:
+            self.run_git("stash", "drop", "-q")
+
+    def test_config_edit(self):
+        self.assertCached(self.branch_names, cached=False)
+        self.run_git("config", "gitsavvy.test", "yes")
+        self.assertCached(self.branch_names, cached=False)
+        self.run_git("config", "--unset", "gitsavvy.test")
+
+    def test_racy_timestamps_are_not_trusted(self):
+        repo_state.RACY_THRESHOLD = self.racy_threshold
+        # Refs which just changed.
+        os.utime(os.path.join(self.repo_path, ".git", "refs", "heads"))
+        self.assertIsNone(repo_state.fingerprint(self.repo_path, ("refs", )))
+
+        self.assertCached(self.branch_names, cached=False)
+        self.assertCached(self.branch_names, cached=False)
+
+    def test_least_recently_used_entries_are_evicted(self):
+        max_entries = repo_state.MAX_CACHE_ENTRIES
+        repo_state.MAX_CACHE_ENTRIES = 3
+        try:
+            values = Values(self.repo_path)
+            for n in (1, 2, 3, 1, 4, 1, 3, 2):
+                values.value(n)
+        finally:
+            repo_state.MAX_CACHE_ENTRIES = max_entries
+        # 4 evicts 2, which was used least recently, then 2 evicts 4.
+        self.assertEqual(values.calls, [1, 2, 3, 4, 2])
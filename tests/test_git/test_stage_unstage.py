@@ -0,0 +1,82 @@
+import os
+import subprocess
+
+from unittesting import DeferrableTestCase
+
+from .common import GitRepoTestCase, startupinfo
+from GitSavvy.core import git_command
+from GitSavvy.core.git_mixins import stage_unstage
+from GitSavvy.core.git_mixins.stage_unstage import chunk_paths
+from GitSavvy.tests.mockito import unstub, when
+
+
+class TestChunkPaths(DeferrableTestCase):
+
+    def test_no_paths(self):
+        self.assertEqual(list(chunk_paths([], max_length=10)), [])
+
+    def test_chunks_fill_up_to_max_length(self):
+        # Every path counts with a separator, i.e. 5 characters here.
+        paths = ["aaaa", "bbbb", "cccc", "dddd", "eeee"]
+        self.assertEqual(
+            list(chunk_paths(paths, max_length=10)),
+            [["aaaa", "bbbb"], ["cccc", "dddd"], ["eeee"]]
+        )
+        self.assertEqual(
+            list(chunk_paths(paths, max_length=9)),
+            [["aaaa"], ["bbbb"], ["cccc"], ["dddd"], ["eeee"]]
+        )
+        self.assertEqual(list(chunk_paths(paths, max_length=25)), [paths])
+
+    def test_long_path_gets_a_chunk_of_its_own(self):
+        self.assertEqual(
+            list(chunk_paths(["a", "x" * 20, "b"], max_length=10)),
+            [["a"], ["x" * 20], ["b"]]
+        )
+
+    def test_default_max_length(self):
+        paths = ["x" * 999] * (stage_unstage.MAX_PATHS_LENGTH // 1000 + 1)
+        self.assertEqual([len(chunk) for chunk in chunk_paths(paths)], [len(paths) - 1, 1])
+
+
+class TestStageUnstage(GitRepoTestCase, git_command.GitCommand):
+
+    def setUp(self):
+        # 4 of the paths below fit into a git invocation.
+        self.max_paths_length = stage_unstage.MAX_PATHS_LENGTH
+        stage_unstage.MAX_PATHS_LENGTH = 50
+        self.paths = ["file-{:02d}.txt".format(n) for n in range(18)]
+        for path in self.paths:
+            with open(os.path.join(self.repo_path, path), "w") as f:
+                f.write(path)
+
+        self.git_calls = []
+        git = self.git
+
+        def count(*args, **kwargs):
+            self.git_calls.append(args[0])
+            return git(*args, **kwargs)
+
+        when(self).git(...).thenAnswer(count)
+
+    def tearDown(self):
+        stage_unstage.MAX_PATHS_LENGTH = self.max_paths_length
+        unstub()
+        subprocess.check_call(("git", "reset", "-q"), cwd=self.repo_path, startupinfo=startupinfo)
+        for path in self.paths:
+            os.remove(os.path.join(self.repo_path, path))
+
+    def staged_paths(self):
+        return subprocess.check_output(
+            ("git", "diff", "--cached", "--name-only"),
+            cwd=self.repo_path, startupinfo=startupinfo, universal_newlines=True
+        ).splitlines()
+
+    def test_stage_and_unstage_many_files(self):
+        self.stage_files(self.paths)
+        self.assertEqual(self.git_calls, ["add"] * 5)
+        self.assertEqual(self.staged_paths(), self.paths)
+
+        self.unstage_files(self.paths[:10])
+        self.assertEqual(self.git_calls[5:], ["reset"] * 3)
+        self.assertEqual(self.staged_paths(), self.paths[10:])
@@ -0,0 +1,66 @@
+import os
+
+from .common import GitRepoTestCase
+from GitSavvy.core import git_command
+from GitSavvy.core.git_mixins.status import DEFAULT_STATUS_STRATEGY
+from GitSavvy.tests.mockito import unstub, when
+
+
+class TestStatusStrategy(GitRepoTestCase, git_command.GitCommand):
+
+    def setUp(self):
+        self.settings = {}
+        when(self.savvy_settings).get(...).thenAnswer(
+            lambda key, default=None: self.settings.get(key, default))
+
+    def tearDown(self):
+        unstub()
+        try:
+            os.remove(self.index_lock())
+        except OSError:
+            pass
+
+    def index_lock(self):
+        return os.path.join(self.repo_path, ".git", "index.lock")
+
+    def test_defaults(self):
+        self.assertEqual(self.get_status_strategy(), DEFAULT_STATUS_STRATEGY)
+        self.assertEqual(DEFAULT_STATUS_STRATEGY["refresh_index"], "auto")
+
+    def test_setting_completes_the_defaults(self):
+        self.settings["status_strategy"] = {"untracked_files": "no"}
+        strategy = self.get_status_strategy()
+        self.assertEqual(strategy["untracked_files"], "no")
+        self.assertEqual(strategy["status_bar"], DEFAULT_STATUS_STRATEGY["status_bar"])
+
+    def test_per_repo_override(self):
+        parent, name = os.path.split(self.repo_path)
+        self.settings["status_strategy"] = {"untracked_files": "no", "status_bar": "branch_only"}
+        self.settings["repo_status_strategies"] = {
+            # Paths are normalized before they are compared.
+            os.path.join(parent, name, "..", name): {"untracked_files": "all"},
+            os.path.join(parent, "other"): {"status_bar": "full"},
+        }
+        strategy = self.get_status_strategy()
+        self.assertEqual(strategy["untracked_files"], "all")
+        self.assertEqual(strategy["status_bar"], "branch_only")
+
+    def test_status_args(self):
+        strategy = dict(DEFAULT_STATUS_STRATEGY, untracked_files="no")
+        self.assertEqual(self._status_args(strategy), ["--untracked-files=no"])
+
+        strategy["ignore_submodules"] = "dirty"
+        self.assertEqual(
+            self._status_args(strategy), ["--untracked-files=no", "--ignore-submodules=dirty"])
+
+    def test_status_environ(self):
+        no_refresh = {"GIT_OPTIONAL_LOCKS": "0"}
+        for refresh_index, environ in ((True, None), (False, no_refresh), ("auto", None)):
+            strategy = dict(DEFAULT_STATUS_STRATEGY, refresh_index=refresh_index)
+            self.assertEqual(self._status_environ(strategy), environ, refresh_index)
+
+        # Another git process holds the index lock.
+        open(self.index_lock(), "w").close()
+        for refresh_index, environ in ((True, None), (False, no_refresh), ("auto", no_refresh)):
+            strategy = dict(DEFAULT_STATUS_STRATEGY, refresh_index=refresh_index)
+            self.assertEqual(self._status_environ(strategy), environ, refresh_index)
@@ -0,0 +1,62 @@
+import subprocess
+
+from .common import GitRepoTestCase, startupinfo
+from unittesting import DeferrableTestCase
+
+from GitSavvy.core import git_command
+from GitSavvy.core.git_mixins.tags import version_sort_key
+from GitSavvy.tests.mockito import unstub, verify, when
+
+
+TAGS = ["v1.0", "v1.0-rc1", "v1.0.1", "v1.10", "v1.9", "v2.0-beta", "v2.0", "v1.0-rc2", "foo", "1.0a"]
+
+
+class TestTags(GitRepoTestCase, git_command.GitCommand):
+
+    @classmethod
+    def setUpClass(cls):
+        yield from super().setUpClass()
+        for args in (("v1.0.0", ), ("-a", "v1.1.0", "-m", "Annotated")):
+            subprocess.check_call(("git", "tag") + args, cwd=cls._temp_dir, startupinfo=startupinfo)
+
+    def tearDown(self):
+        unstub()
+
+    def head(self):
+        return subprocess.check_output(
+            ("git", "rev-parse", "HEAD"), cwd=self._temp_dir, startupinfo=startupinfo
+        ).decode().strip()
+
+    def test_local_tags_are_abbreviated_and_peeled(self):
+        short_hash = self.get_short_hash("HEAD")
+        when(self).get_short_hash(...).thenRaise(AssertionError("no rev-parse per tag"))
+        self.assertEqual(
+            [tuple(tag) for tag in self.get_tags()],
+            [(short_hash, "v1.1.0"), (short_hash, "v1.0.0")]
+        )
+
+    def test_remote_tags_are_abbreviated_at_once(self):
+        when(self).get_short_hash(...).thenReturn("abcdefg")
+        head = self.head()
+        self.assertEqual(
+            [tuple(tag) for tag in self.get_tags(".")],
+            [(head[:7], "v1.1.0"), (head[:7], "v1.0.0")]
+        )
+        verify(self, times=1).get_short_hash(...)
+
+
+class TestVersionSortKey(DeferrableTestCase):
+
+    # Both orders are what `git for-each-ref --sort=-v:refname` gives.
+
+    def test_sort_like_git(self):
+        self.assertEqual(
+            sorted(TAGS, key=version_sort_key, reverse=True),
+            ["v2.0-beta", "v2.0", "v1.10", "v1.9", "v1.0.1", "v1.0-rc2", "v1.0-rc1", "v1.0", "foo", "1.0a"]
+        )
+
+    def test_suffixes_sort_before_the_release(self):
+        self.assertEqual(
+            sorted(TAGS, key=lambda tag: version_sort_key(tag, ("-rc", "-beta")), reverse=True),
+            ["v2.0", "v2.0-beta", "v1.10", "v1.9", "v1.0.1", "v1.0", "v1.0-rc2", "v1.0-rc1", "foo", "1.0a"]
+        )
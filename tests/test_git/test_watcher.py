@@ -0,0 +1,227 @@
+import os
+import subprocess
+import sys
+import unittest
+
+from unittesting import DeferrableTestCase
+
+from .common import GitRepoTestCase, startupinfo
+from GitSavvy.common import util
+from GitSavvy.core import watcher
+from GitSavvy.tests.mockito import unstub, when
+
+
+class TestPollingBackend(GitRepoTestCase):
+
+    def setUp(self):
+        self.git_dir = os.path.join(self._temp_dir, ".git")
+        self.backend = watcher.PollingBackend(self.git_dir, self.git_dir)
+
+    def git(self, *args):
+        subprocess.check_call(("git", ) + args, cwd=self._temp_dir, startupinfo=startupinfo)
+
+    def test_nothing_changed(self):
+        self.assertEqual(self.backend.poll(0), set())
+
+    def test_new_branch_changes_refs(self):
+        self.git("branch", "feature/watched")
+        self.assertEqual(self.backend.poll(0), {watcher.REFS})
+
+    def test_checkout_changes_head(self):
+        self.git("checkout", "-q", "-b", "watched-checkout")
+        self.assertIn(watcher.HEAD, self.backend.poll(0))
+
+    def test_staging_changes_index(self):
+        with open(os.path.join(self._temp_dir, "staged"), "w") as f:
+            f.write("staged")
+        self.git("add", "staged")
+        self.assertEqual(self.backend.poll(0), {watcher.INDEX})
+
+
+class TestRefreshViews(GitRepoTestCase):
+
+    def setUp(self):
+        self.views = []
+        self.refreshed = []
+        when(watcher)._refresh_view(...).thenAnswer(lambda view: self.refreshed.append(view))
+        # Keep activating the views below from refreshing or watching them.
+        when(watcher).watch_view(...).thenReturn(None)
+        when(util.view).refresh_gitsavvy(...).thenReturn(None)
+
+    def tearDown(self):
+        unstub()
+        for view in self.views:
+            view.set_scratch(True)
+            view.close()
+
+    def new_view(self, **settings):
+        view = self.window.new_file()
+        self.views.append(view)
+        view.settings().set("git_savvy.repo_path", self._temp_dir)
+        for key, value in settings.items():
+            view.settings().set("git_savvy." + key, value)
+        return view
+
+    def test_views_are_refreshed_by_topic(self):
+        status = self.new_view(interface="status")
+        branch = self.new_view(interface="branch")
+        diff = self.new_view(diff_view=True)
+        graph = self.new_view(log_graph_view=True)
+        # Only the view activated last is visible.
+        self.window.focus_view(graph)
+
+        watcher.refresh_views(self._temp_dir, frozenset((watcher.REFS, )))
+        self.assertEqual(self.refreshed, [graph])
+        self.assertTrue(status.settings().get(watcher.NEEDS_REFRESH))
+        self.assertTrue(branch.settings().get(watcher.NEEDS_REFRESH))
+        # Diffs don't depend on refs.
+        self.assertIsNone(diff.settings().get(watcher.NEEDS_REFRESH))
+
+        watcher.refresh_views(self._temp_dir, frozenset((watcher.INDEX, )))
+        self.assertEqual(self.refreshed, [graph])
+        self.assertTrue(diff.settings().get(watcher.NEEDS_REFRESH))
+
+    def test_other_repos_are_not_refreshed(self):
+        view = self.new_view(interface="branch")
+        view.settings().set("git_savvy.repo_path", os.path.join(self._temp_dir, "other"))
+
+        watcher.refresh_views(self._temp_dir, watcher.ALL_TOPICS)
+        self.assertIsNone(view.settings().get(watcher.NEEDS_REFRESH))
+
+    def test_is_fresh(self):
+        branch = self.new_view(interface="branch")
+        status = self.new_view(interface="status")
+        self.assertFalse(watcher.is_fresh(branch))
+
+        when(watcher).is_watched(self._temp_dir).thenReturn(True)
+        self.assertTrue(watcher.is_fresh(branch))
+        # The status dashboard also shows the working tree.
+        self.assertFalse(watcher.is_fresh(status))
+
+        # A view marked while hidden is refreshed once on activation.
+        branch.settings().set(watcher.NEEDS_REFRESH, True)
+        self.assertFalse(watcher.is_fresh(branch))
+        self.assertTrue(watcher.is_fresh(branch))
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0
+
+    def time(self):
+        return self.now
+
+
+class FakeBackend:
+    """
+    Report the topics of `events`, a list of (seconds, topics) pairs, one
+    per `poll`, then stop `watcher`.
+    """
+
+    def __init__(self, clock, events):
+        self.clock = clock
+        self.events = list(events)
+        self.timeouts = []
+        self.closed = False
+        self.watcher = None
+
+    def poll(self, timeout):
+        self.timeouts.append(timeout)
+        if not self.events:
+            self.watcher.stop()
+            return set()
+        seconds, topics = self.events.pop(0)
+        self.clock.now += seconds
+        return set(topics)
+
+    def close(self):
+        self.closed = True
+
+
+class TestWatcher(DeferrableTestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.time = watcher.time
+        watcher.time = self.clock
+        self.changes = []
+
+    def tearDown(self):
+        watcher.time = self.time
+
+    def run_watcher(self, events):
+        backend = FakeBackend(self.clock, events)
+        backend.watcher = watcher.Watcher(
+            "/repo", backend, lambda repo_path, topics: self.changes.append((self.clock.now, topics)))
+        # Run in this thread, `FakeBackend` stops it.
+        backend.watcher.run()
+        self.assertTrue(backend.closed)
+        return backend
+
+    def test_events_are_debounced(self):
+        backend = self.run_watcher([
+            (0.5, {watcher.REFS}),
+            (0.25, {watcher.HEAD}),
+            (0.25, {watcher.REFS}),
+            (watcher.DEBOUNCE, set()),
+            (0.5, set()),
+        ])
+        self.assertEqual(self.changes, [(1.0 + watcher.DEBOUNCE, {watcher.REFS, watcher.HEAD})])
+        self.assertEqual(
+            backend.timeouts,
+            [watcher.POLL_INTERVAL] + [watcher.DEBOUNCE] * 3 + [watcher.POLL_INTERVAL] * 2
+        )
+
+    def test_steady_events_are_reported_after_max_delay(self):
+        self.run_watcher([(0.25, {watcher.INDEX})] * 12 + [(0.5, set())])
+        self.assertEqual(self.changes, [
+            (0.25 + watcher.MAX_DELAY, {watcher.INDEX}),
+            (3.5, {watcher.INDEX}),
+        ])
+
+    def test_pending_events_are_dropped_when_stopped(self):
+        self.run_watcher([(0.25, {watcher.INDEX})])
+        self.assertEqual(self.changes, [])
+
+
+@unittest.skipUnless(sys.platform.startswith("linux"), "inotify is only available on Linux")
+class TestInotifyBackend(GitRepoTestCase):
+
+    def setUp(self):
+        git_dir = os.path.join(self._temp_dir, ".git")
+        self.backend = watcher.InotifyBackend(git_dir, git_dir)
+
+    def tearDown(self):
+        self.backend.close()
+
+    def git(self, *args):
+        subprocess.check_call(("git", ) + args, cwd=self._temp_dir, startupinfo=startupinfo)
+
+    def changed_topics(self):
+        # Events may be read in more than one go.
+        topics = set()
+        while True:
+            changed = self.backend.poll(0.1)
+            if not changed:
+                return topics
+            topics |= changed
+
+    def test_nothing_changed(self):
+        self.assertEqual(self.backend.poll(0), set())
+
+    def test_new_branch_changes_refs(self):
+        self.git("branch", "inotify/watched")
+        self.assertEqual(self.changed_topics(), {watcher.REFS})
+        # Directories created since are watched too.
+        self.git("branch", "inotify/other")
+        self.assertEqual(self.changed_topics(), {watcher.REFS})
+
+    def test_checkout_changes_head(self):
+        self.git("checkout", "-q", "-b", "inotify-checkout")
+        self.assertIn(watcher.HEAD, self.changed_topics())
+
+    def test_staging_changes_index(self):
+        with open(os.path.join(self._temp_dir, "inotify-staged"), "w") as f:
+            f.write("staged")
+        self.git("add", "inotify-staged")
+        self.assertEqual(self.changed_topics(), {watcher.INDEX})
@@ -0,0 +1,131 @@
+import queue
+import threading
+
+from unittesting import DeferrableTestCase
+from GitSavvy.tests.mockito import unstub, when
+
+from GitSavvy.common import util
+from GitSavvy.core.git_command import LoggingProcessWrapper
+
+
+class FakeStream:
+    def __init__(self):
+        self.chunks = queue.Queue()
+
+    def read1(self, size):
+        return self.chunks.get(timeout=5)
+
+
+class FakeProcess:
+    def __init__(self):
+        self.stdin = None
+        self.stdout = FakeStream()
+        self.stderr = FakeStream()
+        self.exited = threading.Event()
+
+    def wait(self):
+        self.exited.wait(5)
+
+    def exit(self):
+        self.stdout.chunks.put(b"")
+        self.stderr.chunks.put(b"")
+        self.exited.set()
+
+
+class TestLoggingProcessWrapper(DeferrableTestCase):
+
+    def setUp(self):
+        self.appended = []
+        when(util.log).panel_append(...).thenAnswer(
+            lambda *msgs, run_async=True: self.appended.append("\n".join(msgs)))
+        self.process = FakeProcess()
+        self.wrapper = LoggingProcessWrapper(self.process, timeout=5000)
+
+    def tearDown(self):
+        self.process.exit()
+        unstub()
+
+    def communicate(self):
+        result = []
+        thread = threading.Thread(target=lambda: result.append(self.wrapper.communicate(None)))
+        thread.start()
+        return thread, result
+
+    def test_small_output_is_flushed_in_batches(self):
+        for text in (b"a", b"b", b"c"):
+            self.process.stdout.chunks.put(text)
+        thread, result = self.communicate()
+        yield lambda: self.appended
+
+        # Small outputs wait for the flush interval, and then go to the
+        # panel at once.
+        self.assertEqual(self.appended, ["abc"])
+
+        self.process.exit()
+        yield lambda: not thread.is_alive()
+        self.assertEqual(result, [(b"abc", b"")])
+
+    def test_large_output_is_flushed_without_waiting(self):
+        flush_requested = self.wrapper._flush_requested
+        self.wrapper._queue_for_panel("a" * (self.wrapper.PANEL_FLUSH_SIZE - 1))
+        self.assertFalse(flush_requested.is_set())
+        self.wrapper._queue_for_panel("a")
+        self.assertTrue(flush_requested.is_set())
+
+    def test_flusher_waits_for_the_interval(self):
+        self.wrapper.PANEL_FLUSH_INTERVAL = 60
+        thread, result = self.communicate()
+        self.process.stdout.chunks.put(b"a")
+        self.process.stdout.chunks.put(b"b" * self.wrapper.PANEL_FLUSH_SIZE)
+        yield lambda: self.appended
+
+        self.assertEqual(self.appended, ["a" + "b" * self.wrapper.PANEL_FLUSH_SIZE])
+        self.process.stdout.chunks.put(b"c")
+        yield 200
+        self.assertEqual(len(self.appended), 1)
+
+        # The process ending wakes the flusher up right away.
+        self.process.exit()
+        yield lambda: not thread.is_alive()
+        self.assertEqual(self.appended[1:], ["c"])
+
+    def test_oldest_pending_output_is_dropped(self):
+        self.wrapper.PANEL_MAX_PENDING = 10
+        for text in ("1234", "5678", "90ab", "cdef"):
+            self.wrapper._queue_for_panel(text)
+        self.wrapper._flush()
+
+        self.assertEqual(self.appended, ["[... 8 characters omitted ...]\n90abcdef"])
+        self.wrapper._flush()
+        self.assertEqual(len(self.appended), 1)
+
+    def test_dropped_output_is_still_returned(self):
+        self.wrapper.PANEL_MAX_PENDING = 10
+        self.wrapper.PANEL_FLUSH_INTERVAL = 60
+        thread, result = self.communicate()
+        for text in (b"1234", b"5678", b"90ab", b"cdef"):
+            self.process.stdout.chunks.put(text)
+        self.process.stderr.chunks.put(b"error")
+        self.process.exit()
+        yield lambda: not thread.is_alive()
+
+        self.assertEqual(result, [(b"1234567890abcdef", b"error")])
+        self.assertIn("characters omitted", self.appended[0])
+
+    def test_flusher_shuts_down_when_the_process_ends(self):
+        flusher = []
+        flush_periodically = self.wrapper._flush_periodically
+
+        def record():
+            flusher.append("started")
+            flush_periodically()
+            flusher.append("stopped")
+
+        self.wrapper._flush_periodically = record
+        thread, result = self.communicate()
+        yield lambda: flusher == ["started"]
+
+        self.process.exit()
+        yield lambda: not thread.is_alive()
+        self.assertEqual(flusher, ["started", "stopped"])
+        self.assertEqual(self.appended, [])
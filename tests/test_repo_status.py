@@ -1,10 +1,13 @@
 from textwrap import dedent
+import threading
 
 from unittesting import DeferrableTestCase
 from GitSavvy.tests.mockito import unstub, when
 from GitSavvy.tests.parameterized import parameterized as p
 
 from GitSavvy.core.git_command import GitCommand
+from GitSavvy.core.git_mixins.status import diff_status_snapshots, parse_status_v2
+from GitSavvy.core.interfaces.status import StatusInterface
 
 TestShortBranchStatusTestcases = [
 # noqa: E122
@@ -244,6 +247,122 @@ class TestLongBranchStatus(DeferrableTestCase):
     # TODO: Add tests for ?
 
 
+HASH = "2c7d0dd8ac1a3a3e1e7ae1fd1b8db1e9b0a5b3e8"
+STATUS_V2 = "\x00".join([
+    "# branch.oid " + HASH,
+    "# branch.head dev",
+    "# branch.upstream origin/dev",
+    "# branch.ab +1 -2",
+    "1 .M N... 100644 100644 100644 {h} {h} modified".format(h=HASH),
+    "2 R. N... 100644 100644 100644 {h} {h} R87 new name".format(h=HASH),
+    "old name",
+    "u UU N... 100644 100644 100644 100644 {h} {h} {h} conflicted".format(h=HASH),
+    "? untracked",
+    ""
+])
+
+
+class TestStatusV2(DeferrableTestCase):
+    def test_parse_branch_headers(self):
+        snapshot = parse_status_v2(STATUS_V2)
+        self.assertEqual(snapshot.branch_oid, HASH)
+        self.assertEqual(snapshot.branch_head, "dev")
+        self.assertEqual(snapshot.upstream, "origin/dev")
+        self.assertEqual((snapshot.ahead, snapshot.behind), (1, 2))
+
+    def test_parse_records(self):
+        snapshot = parse_status_v2(STATUS_V2)
+        self.assertEqual(
+            [(f.path, f.path_alt, f.index_status, f.working_status, f.score) for f in snapshot.entries],
+            [
+                ("modified", None, " ", "M", None),
+                ("new name", "old name", "R", None, 87),
+                ("conflicted", None, "U", "U", None),
+                ("untracked", None, "?", "?", None),
+            ]
+        )
+        self.assertEqual(
+            {name: [f.path for f in section] for name, section in snapshot.sections.items()},
+            {
+                "staged": ["new name"],
+                "unstaged": ["modified"],
+                "untracked": ["untracked"],
+                "conflicts": ["conflicted"],
+            }
+        )
+
+    def test_unchanged_sections_are_reused(self):
+        previous = parse_status_v2(STATUS_V2)
+        snapshot = parse_status_v2(STATUS_V2 + "? another\x00", previous)
+        self.assertIs(snapshot.sections["staged"], previous.sections["staged"])
+        self.assertIs(snapshot.entries[0], previous.entries[0])
+
+        deltas = diff_status_snapshots(previous, snapshot)
+        self.assertEqual(list(deltas), ["untracked"])
+        self.assertEqual([f.path for f in deltas["untracked"].added], ["another"])
+        self.assertEqual(deltas["untracked"].removed, [])
+        self.assertEqual(deltas["untracked"].changed, [])
+
+    def test_changed_entries_are_reported(self):
+        previous = parse_status_v2(STATUS_V2)
+        snapshot = parse_status_v2(STATUS_V2.replace("1 .M", "1 .D"), previous)
+        deltas = diff_status_snapshots(previous, snapshot)
+        self.assertEqual(list(deltas), ["unstaged"])
+        self.assertEqual([f.working_status for f in deltas["unstaged"].changed], ["D"])
+
+
+
+class FakeStatusInterface:
+    fetch_repo_status = StatusInterface.fetch_repo_status
+
+    def __init__(self, *snapshots):
+        self._lock = threading.Lock()
+        self._status_snapshot = None
+        self._status_fetches = 0
+        self._status_applied = 0
+        self.state = {}
+        self.snapshots = list(snapshots)
+
+    def get_status_snapshot(self, previous=None):
+        return self.snapshots.pop(0)()
+
+    def _get_branch_status_components_from_snapshot(self, snapshot):
+        return snapshot.branch_head
+
+    def _format_branch_status(self, branch_head, delim=None):
+        return branch_head
+
+
+class TestFetchRepoStatus(DeferrableTestCase):
+    def test_refreshes_finishing_out_of_order(self):
+        older = parse_status_v2(STATUS_V2)
+        newer = parse_status_v2(STATUS_V2 + "? another\x00")
+        started, release = threading.Event(), threading.Event()
+
+        def slow():
+            started.set()
+            release.wait(5)
+            return older
+
+        interface = FakeStatusInterface(slow, lambda: newer, lambda: parse_status_v2(STATUS_V2 + "? another\x00"))
+        thread = threading.Thread(target=interface.fetch_repo_status)
+        thread.start()
+        started.wait(5)
+        interface.fetch_repo_status()
+        release.set()
+        thread.join(5)
+
+        # The older result is dropped instead of replacing the newer one.
+        self.assertIs(interface._status_snapshot, newer)
+        self.assertIs(interface.state["untracked_files"], newer.sections["untracked"])
+
+        # And a refresh which finds nothing new keeps the applied lists.
+        interface.fetch_repo_status()
+        self.assertIs(interface.state["untracked_files"], newer.sections["untracked"])
+        self.assertEqual([f.path for f in interface.state["untracked_files"]], ["untracked", "another"])
+        self.assertEqual(interface.state["branch_status"], "dev")
+
+
 # TestLongBranchStatusTestcases = [
 # ("""\
 # ## optimize-status-interface...fork/optimize-status-interface [ahead 1]
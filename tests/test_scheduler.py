@@ -0,0 +1,126 @@
+from functools import partial
+import subprocess
+import threading
+
+from unittesting import DeferrableTestCase
+
+from GitSavvy.core import scheduler, single_flight
+
+
+class TestScheduler(DeferrableTestCase):
+
+    def setUp(self):
+        self.ran = []
+        self.events = []
+
+    def tearDown(self):
+        for event in self.events:
+            event.set()
+
+    def event(self):
+        event = threading.Event()
+        self.events.append(event)
+        return event
+
+    def test_newer_job_with_same_key_supersedes(self):
+        started, release = self.event(), self.event()
+        key = ("test_scheduler", id(self))
+
+        def first():
+            started.set()
+            release.wait(5)
+            self.ran.append(("first", scheduler.current_job().cancelled))
+
+        first_job = scheduler.submit(first, key=key)
+        yield started.is_set
+
+        scheduler.submit(lambda: self.ran.append(("second", False)), key=key)
+        self.assertTrue(first_job.cancelled)
+        release.set()
+        yield lambda: len(self.ran) == 2
+        self.assertEqual(sorted(self.ran), [("first", True), ("second", False)])
+
+    def test_cancel_kills_registered_processes(self):
+        started, finished = self.event(), self.event()
+
+        def run():
+            process = subprocess.Popen(
+                ("git", "hash-object", "--stdin"), stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+            scheduler.register_process(process)
+            started.set()
+            # Waits for input forever, unless killed.
+            process.wait()
+            self.ran.append(process.returncode)
+            finished.set()
+
+        job = scheduler.submit(run)
+        yield started.is_set
+
+        job.cancel()
+        yield finished.is_set
+        self.assertNotEqual(self.ran, [0])
+
+    def test_higher_priorities_run_first(self):
+        started = [self.event() for _ in range(scheduler.MAX_WORKERS - 1)]
+        releases = [self.event() for _ in started]
+        for started_event, release in zip(started, releases):
+            scheduler.submit(lambda s=started_event, r=release: (s.set(), r.wait(5)))
+        yield lambda: all(event.is_set() for event in started)
+
+        # All workers for background jobs are busy now.
+        for name, priority in (
+            ("prefetch", scheduler.PREFETCH),
+            ("visible", scheduler.VISIBLE_REFRESH),
+            ("interactive", scheduler.INTERACTIVE),
+        ):
+            scheduler.submit(lambda name=name: self.ran.append(name), priority=priority)
+
+        yield lambda: self.ran == ["interactive"]
+        releases[0].set()
+        yield lambda: len(self.ran) == 3
+        self.assertEqual(self.ran, ["interactive", "visible", "prefetch"])
+
+    def share_process(self):
+        """
+        Start two jobs, with keys of their own, which share one process via
+        `single_flight`, and return them once both wait for it.
+        """
+        key = ("test_scheduler", id(self))
+        started, self.release = self.event(), self.event()
+        self.results = {}
+
+        def run_process(shared):
+            # Reads stdin until it is closed, unless killed.
+            process = subprocess.Popen(
+                ("git", "hash-object", "--stdin"), stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+            shared.start(process)
+            started.set()
+            self.release.wait(5)
+            process.communicate(b"")
+            return process.returncode
+
+        def call(name):
+            self.results[name] = single_flight.run(key, run_process, share=scheduler.SharedProcess)
+
+        leader = scheduler.submit(partial(call, "leader"), key=key + ("leader", ))
+        yield started.is_set
+        sharer = scheduler.submit(partial(call, "sharer"), key=key + ("sharer", ))
+        yield lambda: len(single_flight._in_flight[key].shared._waiters) == 2
+        return leader, sharer
+
+    def test_cancelled_job_keeps_shared_process_alive(self):
+        leader, sharer = yield from self.share_process()
+
+        leader.cancel()
+        self.release.set()
+        yield lambda: len(self.results) == 2
+        self.assertEqual(self.results, {"leader": 0, "sharer": 0})
+
+    def test_shared_process_is_killed_once_all_jobs_are_cancelled(self):
+        leader, sharer = yield from self.share_process()
+
+        leader.cancel()
+        sharer.cancel()
+        self.release.set()
+        yield lambda: len(self.results) == 2
+        self.assertNotEqual(self.results["sharer"], 0)
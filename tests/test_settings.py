@@ -0,0 +1,76 @@
+import sublime
+
+from unittesting import DeferrableTestCase
+
+from GitSavvy.core import settings
+from GitSavvy.core.settings import GitSavvySettings
+from GitSavvy.tests.mockito import unstub, when
+
+
+KEY = "test_settings_key"
+
+
+class TestSettings(DeferrableTestCase):
+
+    def setUp(self):
+        self.window = sublime.active_window()
+        self.views = [self.window.new_file() for _ in range(2)]
+
+    def tearDown(self):
+        unstub()
+        for view in self.views:
+            view.set_scratch(True)
+            view.close()
+
+    def test_view_settings_follow_changes(self):
+        first, second = self.views
+        self.window.focus_view(first)
+        settings.reset_active()
+        first.settings().set("GitSavvy", {KEY: "first"})
+        self.assertEqual(GitSavvySettings().get(KEY, "global"), "first")
+
+        first.settings().set("GitSavvy", {KEY: "changed"})
+        self.assertEqual(GitSavvySettings().get(KEY, "global"), "changed")
+
+        self.window.focus_view(second)
+        settings.reset_active()
+        self.assertEqual(GitSavvySettings().get(KEY, "global"), "global")
+
+    def test_lookups_only_read_dicts(self):
+        first, _ = self.views
+        self.window.focus_view(first)
+        first.settings().set("GitSavvy", {KEY: "first"})
+        settings.reset_active()
+        self.assertEqual(GitSavvySettings().get(KEY, "global"), "first")
+
+        when(sublime).active_window().thenRaise(AssertionError("the active view is known"))
+        when(sublime.View).settings().thenRaise(AssertionError("the view settings are cached"))
+        self.assertEqual(GitSavvySettings().get(KEY, "global"), "first")
+        self.assertEqual(GitSavvySettings().get(KEY + "_missing", "global"), "global")
+
+    def test_values_are_frozen(self):
+        first, _ = self.views
+        self.window.focus_view(first)
+        first.settings().set("GitSavvy", {KEY: {"args": ["--graph"]}})
+        settings.reset_active()
+
+        value = GitSavvySettings().get(KEY)
+        self.assertEqual(value["args"], ("--graph", ))
+        with self.assertRaises(TypeError):
+            value["args"] = []
+
+    def test_forget_view(self):
+        first, _ = self.views
+        settings.view_settings(first)
+        self.assertIn(first.id(), settings._view_settings)
+
+        settings.forget_view(first.id())
+        self.assertNotIn(first.id(), settings._view_settings)
+
+    def test_prune_drops_snapshots_of_closed_windows(self):
+        settings.snapshot(self.window)
+        settings._snapshots[(-1, None)] = settings._Snapshot({}, None)
+
+        settings.prune()
+        self.assertNotIn((-1, None), settings._snapshots)
+        self.assertIn((self.window.id(), self.window.project_file_name()), settings._snapshots)
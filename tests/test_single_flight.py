@@ -0,0 +1,109 @@
+import subprocess
+import threading
+
+from unittesting import DeferrableTestCase
+
+from GitSavvy.core import single_flight
+
+
+class Waiters:
+    """Counts the callers waiting for a flight."""
+
+    def __init__(self):
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        with self.lock:
+            self.count += 1
+
+    def __exit__(self, *args):
+        with self.lock:
+            self.count -= 1
+
+
+class TestSingleFlight(DeferrableTestCase):
+
+    def setUp(self):
+        self.key = ("test_single_flight", id(self))
+        self.release = threading.Event()
+        self.calls = []
+        self.results = {}
+
+    def tearDown(self):
+        self.release.set()
+
+    def run_concurrently(self, fn, names):
+        """
+        Call `fn` via `single_flight.run` from a thread per name, and return
+        the flight once all of them wait for it.
+        """
+        def call(name):
+            try:
+                self.results[name] = single_flight.run(self.key, fn, share=Waiters)
+            except Exception as e:
+                self.results[name] = e
+
+        for name in names:
+            threading.Thread(target=call, args=(name, )).start()
+        yield lambda: (
+            self.key in single_flight._in_flight
+            and single_flight._in_flight[self.key].shared.count == len(names)
+        )
+        return single_flight._in_flight[self.key]
+
+    def test_concurrent_calls_share_one_process(self):
+        def hash_object(shared):
+            self.calls.append(shared)
+            process = subprocess.Popen(
+                ("git", "hash-object", "--stdin"), stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+            self.release.wait(5)
+            return process.communicate(b"test")[0]
+
+        flight = yield from self.run_concurrently(hash_object, ("a", "b", "c"))
+        self.release.set()
+        yield lambda: len(self.results) == 3
+
+        self.assertEqual(self.calls, [flight.shared])
+        self.assertEqual(len(set(self.results.values())), 1)
+        self.assertEqual(len(self.results["a"].strip()), 40)
+        self.assertEqual(flight.shared.count, 0)
+
+    def test_exception_reaches_every_waiter(self):
+        error = RuntimeError("failed")
+
+        def fail(shared):
+            self.calls.append(shared)
+            self.release.wait(5)
+            raise error
+
+        yield from self.run_concurrently(fail, ("a", "b", "c"))
+        self.release.set()
+        yield lambda: len(self.results) == 3
+
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(self.results, {"a": error, "b": error, "c": error})
+        self.assertNotIn(self.key, single_flight._in_flight)
+
+    def test_finished_flight_is_not_reused(self):
+        def count():
+            self.calls.append(len(self.calls))
+            return len(self.calls)
+
+        self.assertEqual(single_flight.run(self.key, count), 1)
+        self.assertNotIn(self.key, single_flight._in_flight)
+        self.assertEqual(single_flight.run(self.key, count), 2)
+        self.assertEqual(self.calls, [0, 1])
+
+    def test_different_keys_do_not_share(self):
+        def wait():
+            self.release.wait(5)
+            return "first"
+
+        thread = threading.Thread(target=lambda: single_flight.run(self.key, wait))
+        thread.start()
+        yield lambda: self.key in single_flight._in_flight
+
+        self.assertEqual(single_flight.run(self.key + ("other", ), lambda: "second"), "second")
+        self.release.set()
+        yield lambda: not thread.is_alive()
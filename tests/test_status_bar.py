@@ -0,0 +1,120 @@
+import time
+
+import sublime
+
+from unittesting import DeferrableTestCase
+from GitSavvy.tests.mockito import unstub, verify, when
+
+from GitSavvy.core import repo_state
+from GitSavvy.core.commands import status_bar
+from GitSavvy.core.commands.status_bar import GsUpdateStatusBarCommand, RepoStatus, STATUS_KEY
+
+
+REPO_PATH = "/not/a/repo"
+
+
+class TestStatusBar(DeferrableTestCase):
+
+    def setUp(self):
+        self.window = sublime.active_window()
+        self.views = []
+        self.polls = []
+        when(RepoStatus)._schedule_poll().thenAnswer(lambda: self.polls.append(True))
+
+    def tearDown(self):
+        unstub()
+        status_bar._repos.pop(REPO_PATH, None)
+        for view in self.views:
+            status_bar._view_repos.pop(view.id(), None)
+            view.set_scratch(True)
+            view.close()
+
+    def new_view(self):
+        view = self.window.new_file()
+        self.views.append(view)
+        return view
+
+    def fresh_repo(self, text="main"):
+        repo = status_bar.repo_status(REPO_PATH)
+        repo.text = text
+        repo.updated_at = time.time()
+        return repo
+
+    def test_subscribe_and_unsubscribe(self):
+        repo = self.fresh_repo()
+        view = self.new_view()
+
+        repo.subscribe(view)
+        self.assertEqual(view.get_status(STATUS_KEY), "main")
+        self.assertEqual(repo.views(), [view])
+        self.assertEqual(len(self.polls), 1)
+
+        # A second view shares the poller.
+        other = self.new_view()
+        repo.subscribe(other)
+        self.assertEqual(len(self.polls), 1)
+
+        repo.unsubscribe(view)
+        self.assertEqual(repo.views(), [other])
+
+    def test_activation_of_a_fresh_repo_runs_no_git(self):
+        repo = self.fresh_repo()
+        view = self.new_view()
+        when(GsUpdateStatusBarCommand).get_repo_path(offer_init=False).thenReturn(REPO_PATH)
+        when(GsUpdateStatusBarCommand).git(...).thenRaise(AssertionError("git should not run"))
+        when(repo).refresh(...).thenRaise(AssertionError("nothing to refresh"))
+
+        GsUpdateStatusBarCommand(view).run_async(force=False)
+        self.assertEqual(view.get_status(STATUS_KEY), "main")
+        self.assertEqual(repo.views(), [view])
+
+    def test_outdated_repo_is_refreshed_on_activation(self):
+        repo = self.fresh_repo()
+        repo.updated_at = time.time() - status_bar.MAX_AGE - 1
+        view = self.new_view()
+        when(GsUpdateStatusBarCommand).get_repo_path(offer_init=False).thenReturn(REPO_PATH)
+        when(repo).refresh(...).thenReturn(None)
+
+        GsUpdateStatusBarCommand(view).run_async(force=False)
+        verify(repo, times=1).refresh(False)
+
+    def test_poller_refreshes_when_the_fingerprint_changes(self):
+        repo = self.fresh_repo()
+        view = self.new_view()
+        self.window.focus_view(view)
+        repo.subscribe(view)
+        when(repo_state).fingerprint(REPO_PATH).thenReturn(("changed", ))
+        when(repo).refresh(...).thenReturn(None)
+
+        repo._poll()
+        verify(repo, times=1).refresh(force=False)
+        self.assertEqual(len(self.polls), 2)
+        self.assertTrue(repo.polling)
+
+    def test_poller_stops_while_no_view_is_visible(self):
+        repo = self.fresh_repo()
+        view = self.new_view()
+        repo.subscribe(view)
+        # Hides `view` behind another one in the same group.
+        self.window.focus_view(self.new_view())
+        when(repo_state).fingerprint(...).thenRaise(AssertionError("should not poll"))
+
+        repo._poll()
+        self.assertFalse(repo.polling)
+        self.assertEqual(len(self.polls), 1)
+
+        # Activating the view starts polling again.
+        repo.subscribe(view)
+        self.assertTrue(repo.polling)
+        self.assertEqual(len(self.polls), 2)
+
+    def test_poller_shuts_down_without_views(self):
+        repo = self.fresh_repo()
+        view = self.new_view()
+        repo.subscribe(view)
+        repo.unsubscribe(view)
+
+        repo._poll()
+        self.assertFalse(repo.polling)
+        self.assertNotIn(REPO_PATH, status_bar._repos)
+        self.assertEqual(len(self.polls), 1)
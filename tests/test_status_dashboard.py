@@ -6,7 +6,12 @@ import sublime
 from unittesting import DeferrableTestCase
 from GitSavvy.tests.mockito import unstub, when, spy2
 
-from GitSavvy.core.interfaces.status import StatusInterface
+from GitSavvy.core.git_mixins.status import FileStatus
+from GitSavvy.core.interfaces.status import StatusInterface, render_file_tree
+
+
+HASH = "2c7d0dd8ac1a3a3e1e7ae1fd1b8db1e9b0a5b3e8"
+NULL_HASH = "0" * 40
 
 
 if os.name == 'nt':
@@ -90,14 +95,15 @@ class TestStatusDashboard(DeferrableTestCase):
     def test_extract_clickable_filepaths_from_view(self):
         REPO_PATH = '/not/here'
         FILE_STATUS = dedent("""\
-            ## the-branch
-             M modified_file
-            ?? new_file
-            A  staged_file
-            R  moved_file_new
+            # branch.oid d9b34774d9b34774d9b34774d9b34774d9b34774
+            # branch.head the-branch
+            1 .M N... 100644 100644 100644 {h} {h} modified_file
+            1 A. N... 000000 100644 100644 {z} {h} staged_file
+            2 R. N... 100644 100644 100644 {h} {h} R100 moved_file_new
             moved_file_old
-            MM staged_and_unstaged_changes
-        """.rstrip()).replace('\n', '\x00')
+            1 MM N... 100644 100644 100644 {h} {h} staged_and_unstaged_changes
+            ? new_file
+        """.rstrip()).format(h=HASH, z=NULL_HASH).replace('\n', '\x00')
         LAST_COMMIT = 'd9b34774 The last commit message'
         STASH_LIST = dedent("""\
             stash@{0}: On fix-1055: /not/here/but_like_a_filename.py
@@ -125,7 +131,8 @@ class TestStatusDashboard(DeferrableTestCase):
     def test_clean_working_dir_has_no_clickable_elements(self):
         REPO_PATH = '/not/here'
         FILE_STATUS = dedent("""\
-            ## the-branch
+            # branch.oid d9b34774d9b34774d9b34774d9b34774d9b34774
+            # branch.head the-branch
         """.rstrip()).replace('\n', '\x00')
         LAST_COMMIT = 'd9b34774 The last commit message'
         STASH_LIST = dedent("""\
@@ -142,3 +149,42 @@ class TestStatusDashboard(DeferrableTestCase):
         actual = view.find_all_results()
         expected = []
         self.assertEqual(actual, expected)
+
+
+class TestRenderFileTree(DeferrableTestCase):
+    FILES = [
+        FileStatus(path, None, "?", "?")
+        for path in ("README.md", "build/a.o", "build/b.o", "build/sub/c.o",
+                     "src/x/y/1.py", "src/x/y/2.py", "vendor/only.js")
+    ]
+
+    def render(self, expanded, limit):
+        return render_file_tree(self.FILES, lambda f: "    " + f.path, expanded, limit)
+
+    def test_collapses_directories(self):
+        lines, labels = self.render(set(), 10)
+        self.assertEqual(lines, [
+            "    README.md",
+            "  \u25b8 build/ (3 files)",
+            "  \u25b8 src/x/y/ (2 files)",
+            "    vendor/only.js",
+        ])
+        self.assertEqual(labels["build/ (3 files)"], ["build/a.o", "build/b.o", "build/sub/c.o"])
+
+    def test_expands_directories(self):
+        lines, labels = self.render({"build/"}, 10)
+        self.assertEqual(lines[1:5], [
+            "  \u25be build/ (3 files)",
+            "    build/a.o",
+            "    build/b.o",
+            "    build/sub/c.o",
+        ])
+
+    def test_summarizes_files_after_limit(self):
+        lines, labels = self.render({"build/"}, 3)
+        self.assertEqual(lines[-1], "  \u2026 5 more files")
+        self.assertEqual(
+            labels["5 more files"],
+            ["build/b.o", "build/sub/c.o", "src/x/y/1.py", "src/x/y/2.py", "vendor/only.js"]
+        )
+        self.assertNotIn("src/x/y/ (2 files)", labels)
@@ -0,0 +1,145 @@
+from collections import OrderedDict
+from textwrap import dedent
+import re
+
+from unittesting import DeferrableTestCase
+
+from GitSavvy.common.ui import diff_contents, render_template
+from GitSavvy.core.interfaces.branch import BranchInterface
+from GitSavvy.core.interfaces.status import StatusInterface
+from GitSavvy.core.interfaces.tags import TagsInterface
+
+
+def render_by_substitution(template, keyed_content):
+    """
+    Substitute one key after the other into the whole string, the way
+    `Interface._render_template` used to do.
+    """
+    rendered = template
+    regions = {}
+
+    def adjust(idx, orig_len, new_len):
+        shift = new_len - orig_len
+        for region in regions.values():
+            if region[0] > idx:
+                region[0] += shift
+                region[1] += shift
+            elif region[1] > idx or region[0] == idx:
+                region[1] += shift
+
+    for key, new_content in keyed_content.items():
+        pattern = re.compile(r"\{(<+ )?" + re.escape(key) + r"\}")
+        match = pattern.search(rendered)
+        while match:
+            start, end = match.span()
+            backspace_group = match.groups()[0]
+            start -= backspace_group.count("<") if backspace_group else 0
+            rendered = rendered[:start] + new_content + rendered[end:]
+            adjust(start, end - start, len(new_content))
+            if new_content:
+                regions[key] = [start, start + len(new_content)]
+            match = pattern.search(rendered)
+
+    return rendered, regions
+
+
+class TestRenderTemplate(DeferrableTestCase):
+
+    def assertRendersLikeSubstitution(self, template, keyed_content):
+        keyed_content = OrderedDict(keyed_content)
+        self.assertEqual(
+            render_template(template, keyed_content),
+            render_by_substitution(template, keyed_content)
+        )
+
+    def test_status_template(self):
+        template = dedent(StatusInterface.template)
+        content = [
+            ("branch_status", "On branch `master`."),
+            ("git_root", "~/repo"),
+            ("head", "abc1234 Initial commit"),
+            ("staged_files", "\n  STAGED:\n    a.py\n"),
+            ("unstaged_files", ""),
+            ("untracked_files", "\n  UNTRACKED:\n    b.py\n"),
+            ("merge_conflicts", ""),
+            ("no_status_message", ""),
+            ("stashes", "\n  STASHES:\n    (0) WIP\n"),
+            ("help", dedent(StatusInterface.template_help).format(conflicts_bindings="")),
+        ]
+        self.assertRendersLikeSubstitution(template, content)
+        self.assertRendersLikeSubstitution(template, [(key, "") for key, _ in content])
+
+    def test_branch_template_with_nested_partials(self):
+        template = dedent(BranchInterface.template)
+        remote = dedent(BranchInterface.template_remote)
+        content = [
+            ("branch_status", "On branch `master`."),
+            ("git_root", "~/repo"),
+            ("head", "abc1234 Initial commit"),
+            ("filter", "\n  FILTER:  feat"),
+            ("branch_list", "  * abc1234 master\n    def5678 feature"),
+            ("remotes", "{branch_list_origin}{branch_list_upstream}"),
+            ("help", dedent(BranchInterface.template_help)),
+            ("branch_list_origin", remote.format(
+                remote_name="origin", remote_branch_list="    abc1234 master")),
+            ("branch_list_upstream", remote.format(
+                remote_name="upstream", remote_branch_list="    def5678 feature")),
+        ]
+        self.assertRendersLikeSubstitution(template, content)
+
+    def test_tags_template(self):
+        template = dedent(TagsInterface.template)
+        content = [
+            ("branch_status", "On branch `master`."),
+            ("repo_root", "~/repo"),
+            ("head", "abc1234 Initial commit"),
+            ("local_tags", "    abc1234 v1.0.0"),
+            ("remote_tags", "{remote_tags_list_origin}"),
+            ("help", ""),
+            ("remote_tags_list_origin", "\n  REMOTE (origin):\n    abc1234 v1.0.0\n"),
+        ]
+        self.assertRendersLikeSubstitution(template, content)
+
+    def test_repeated_and_unknown_keys(self):
+        self.assertRendersLikeSubstitution(
+            "{a} {b} {a}\n\n{<< c}{unknown} {< d}",
+            [("a", "A"), ("b", "{a}{c}"), ("c", "C"), ("d", "")]
+        )
+
+    def test_content_only_replaces_later_keys(self):
+        self.assertRendersLikeSubstitution(
+            "{a}|{b}|{c}",
+            [("a", "x"), ("b", "{a}{c}"), ("c", "y")]
+        )
+
+
+class TestDiffContents(DeferrableTestCase):
+
+    def apply(self, content, edits):
+        for begin, end, text in edits:
+            content = content[:begin] + text + content[end:]
+        return content
+
+    def test_only_changed_partials_are_replaced(self):
+        files = "".join("    file{}\n".format(i) for i in range(5000))
+        old_content = "HEAD: abc\n" + files + "STASHES: 1\n"
+        new_content = "HEAD: def\n" + files + "STASHES: 2\n"
+        stashes = [len(old_content) - 2, len(old_content) - 1]
+        old_regions = {"head": [6, 9], "files": [10, 10 + len(files)], "stashes": stashes}
+        new_regions = {"head": [6, 9], "files": [10, 10 + len(files)], "stashes": stashes}
+
+        edits = diff_contents(old_content, old_regions, new_content, new_regions)
+        self.assertEqual(edits, [(len(old_content) - 2, len(old_content) - 1, "2"), (6, 9, "def")])
+        self.assertEqual(self.apply(old_content, edits), new_content)
+
+    def test_added_and_removed_partials(self):
+        old_content = "A\n\n  STAGED:\n    a.py\n\nB\n"
+        new_content = "A\n\n  UNSTAGED:\n    b.py\n\n  STAGED:\n    a.py\n\nB\n"
+        old_regions = {"staged": [2, 23]}
+        new_regions = {"unstaged": [2, 25], "staged": [25, 46]}
+
+        edits = diff_contents(old_content, old_regions, new_content, new_regions)
+        self.assertEqual(self.apply(old_content, edits), new_content)
+        # Just one insertion, the staged files are left alone.
+        (begin, end, text), = edits
+        self.assertEqual((begin, end, len(text)), (5, 5, len(new_content) - len(old_content)))
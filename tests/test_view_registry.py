@@ -0,0 +1,43 @@
+import sublime
+
+from unittesting import DeferrableTestCase
+
+from GitSavvy.common import view_registry
+
+
+class TestViewRegistry(DeferrableTestCase):
+
+    def setUp(self):
+        self.window = sublime.active_window()
+        self.view = self.window.new_file()
+        self.view.set_scratch(True)
+
+    def tearDown(self):
+        if self.view.is_valid():
+            self.view.close()
+        view_registry.forget(self.view.id())
+
+    def test_find_registered_view(self):
+        view_registry.register(self.view, "diff", "/repo")
+        self.assertEqual(view_registry.find(self.window, "diff", "/repo").id(), self.view.id())
+        self.assertIsNone(view_registry.find(self.window, "diff", "/other/repo"))
+        self.assertIsNone(view_registry.find(self.window, "inline_diff", "/repo"))
+
+    def test_forget_drops_state_and_index(self):
+        view_registry.register(self.view, "diff", "/repo")
+        view_registry.set_state(self.view.id(), "hunks", [1, 2])
+        self.assertEqual(view_registry.get_state(self.view.id(), "hunks"), [1, 2])
+
+        view_registry.forget(self.view.id())
+        self.assertIsNone(view_registry.find(self.window, "diff", "/repo"))
+        self.assertIsNone(view_registry.get_state(self.view.id(), "hunks"))
+
+    def test_closed_views_are_not_found(self):
+        view_registry.register(self.view, "diff", "/repo")
+        view_registry.set_state(self.view.id(), "hunks", [1, 2])
+        self.view.close()
+        yield lambda: not self.view.is_valid()
+
+        self.assertIsNone(view_registry.find(self.window, "diff", "/repo"))
+        view_registry.prune()
+        self.assertIsNone(view_registry.get_state(self.view.id(), "hunks"))